@@ -0,0 +1,322 @@
+import os
+import sys
+import argparse
+import logging
+import time
+import json
+
+from pbwizard.physics import PymunkEngine, MULTIBALL_MAX_BALLS
+from pbwizard.vision import PinballLayout
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+# 60 FPS simulation loop
+DEFAULT_FRAME_BUDGET_MS = 1000.0 / 60.0
+
+
+def list_layouts(layouts_dir='layouts'):
+    return sorted(f[:-5] for f in os.listdir(layouts_dir) if f.endswith('.json'))
+
+
+def bench_physics_layout(layout_id, ball_counts, frames=300, warmup=60, dt=1.0 / 60.0,
+                         width=450, height=800, spatial_hash=False, layouts_dir='layouts'):
+    """Measure ms per engine.update() frame for each ball count on one layout."""
+    layout = PinballLayout(filepath=os.path.join(layouts_dir, f"{layout_id}.json"))
+    if 'name' in layout.config:
+        layout.name = layout.config['name']
+
+    results = []
+    for count in ball_counts:
+        engine = PymunkEngine(layout, width, height, seed=f"bench_{layout_id}_{count}")
+        engine.enable_stress_mode(max_balls=max(count, 1), spatial_hash=spatial_hash)
+        # Keep drop-target multiball from adding balls on top of the requested count
+        engine.multiball_max_balls = min(engine.multiball_max_balls, count)
+        engine.chaos_multiball(count)
+
+        for _ in range(warmup):
+            engine.update(dt)
+            engine.events.clear()
+
+        frame_times = []
+        for _ in range(frames):
+            start = time.perf_counter()
+            engine.update(dt)
+            frame_times.append((time.perf_counter() - start) * 1000.0)
+            engine.events.clear()
+
+        frame_times.sort()
+        results.append({
+            'layout': layout_id,
+            'balls_requested': count,
+            'balls': len(engine.balls),
+            'mean_ms': sum(frame_times) / len(frame_times),
+            'p95_ms': frame_times[int(len(frame_times) * 0.95) - 1],
+            'max_ms': frame_times[-1]
+        })
+    return results
+
+
+def run_physics(args):
+    layouts = args.layouts or list_layouts()
+    budget = args.budget_ms
+
+    all_results = []
+    print(f"{'layout':<20} {'balls':>6} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}  budget")
+    for layout_id in layouts:
+        for r in bench_physics_layout(layout_id, args.balls, frames=args.frames, warmup=args.warmup,
+                                      spatial_hash=args.spatial_hash):
+            r['within_budget'] = r['p95_ms'] <= budget
+            all_results.append(r)
+            print(f"{r['layout']:<20} {r['balls']:>6} {r['mean_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['max_ms']:>9.2f}  "
+                  f"{'OK' if r['within_budget'] else 'OVER'}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'benchmark': 'physics', 'budget_ms': budget, 'spatial_hash': args.spatial_hash,
+                       'results': all_results}, f, indent=2)
+        logger.info(f"Results written to {args.json}")
+
+    over = [r for r in all_results if not r['within_budget']]
+    if over:
+        logger.warning(f"{len(over)} layout/ball-count combinations exceeded the {budget:.1f}ms frame budget")
+        return 1
+    return 0
+
+
+# --- Environment throughput -------------------------------------------------
+
+# 'other': step() time outside the timed calls (termination checks, bookkeeping)
+ENV_PHASES = ('physics', 'observation', 'events', 'reward', 'other')
+ENV_POLICIES = ('random', 'scripted')
+
+
+class PhaseTimer:
+    """Accumulates wall time per phase around wrapped callables (outermost call only)."""
+
+    def __init__(self):
+        self.totals = dict.fromkeys(ENV_PHASES, 0.0)
+        self._depth = 0
+
+    def wrap(self, fn, phase):
+        def timed(*args, **kwargs):
+            if self._depth:
+                return fn(*args, **kwargs)
+            self._depth += 1
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.totals[phase] += time.perf_counter() - start
+                self._depth -= 1
+        return timed
+
+    def instrument(self, env):
+        """Patch an unwrapped PinballEnv (and its backend) so step() phases get timed."""
+        backend = env.backend
+        env._advance_frame = self.wrap(env._advance_frame, 'physics')
+        env._ball_out = self.wrap(env._ball_out, 'physics')
+        for name in ('ball_status', 'drop_targets', 'dimensions'):
+            if getattr(backend, name) is not None:
+                setattr(backend, name, self.wrap(getattr(backend, name), 'observation'))
+        env._create_observation = self.wrap(env._create_observation, 'observation')
+        if env.multiball_obs is not None:
+            env.multiball_obs.build = self.wrap(env.multiball_obs.build, 'observation')
+        if env.rasterizer is not None:
+            env.rasterizer.render = self.wrap(env.rasterizer.render, 'observation')
+        if backend.events is not None:
+            backend.events = self.wrap(backend.events, 'events')
+        pipeline = env.reward_pipeline
+        for name in ('begin', 'event_reward', 'total'):
+            setattr(pipeline, name, self.wrap(getattr(pipeline, name), 'reward'))
+        env.reward_stats.add = self.wrap(env.reward_stats.add, 'reward')
+
+
+def force_multiball(engine, balls):
+    """
+    Top the table up to `balls` the way a drop-target multiball does: extra
+    balls in the plunger lane that auto-launch and drain like any other
+    (capped at the engine's multiball_max_balls).
+    """
+    for _ in range(min(balls, engine.multiball_max_balls) - len(engine.balls)):
+        engine.award_multiball_ball()
+
+
+def scripted_policy(ball_status, width, height):
+    """Flip the side the ball is on once it reaches the flipper zone."""
+    def act():
+        status = ball_status()
+        if not status:
+            return 0
+        (x, y), _ = status
+        if y < height * 0.8:
+            return 0
+        return 1 if x < width * 0.5 else 2
+    return act
+
+
+def bench_env_case(layout_id, balls=1, policy='random', obs_mode='single', steps=2000, warmup=100,
+                   frame_skip=1, seed=0):
+    """Measure steps/sec, reset latency and per-phase ms/step for one headless PinballEnv setup."""
+    import numpy as np
+    from pbwizard import env_factory
+
+    env, cap = env_factory.make_training_env({'layout': layout_id, 'obs_mode': obs_mode, 'frame_skip': frame_skip},
+                                             monitor=False)
+    try:
+        width, height = env.backend.dimensions()
+        if balls > cap.physics_engine.multiball_max_balls:
+            logger.warning(f"Multiball is capped at {cap.physics_engine.multiball_max_balls} balls; "
+                           f"measuring that instead of {balls}")
+        if policy == 'random':
+            rng = np.random.default_rng(seed)
+            act = lambda: int(rng.integers(4))
+        elif policy == 'scripted':
+            act = scripted_policy(env.backend.ball_status, width, height)
+        else:
+            raise ValueError(f"Unknown policy: {policy}")
+
+        reset_times = []
+
+        def reset():
+            start = time.perf_counter()
+            env.reset(seed=seed + len(reset_times))
+            reset_times.append((time.perf_counter() - start) * 1000.0)
+            if balls > 1:
+                # Forced multiball: top the table up after every reset
+                force_multiball(cap.physics_engine, balls)
+
+        reset()
+        for _ in range(warmup):
+            _, _, terminated, truncated, _ = env.step(act())
+            if terminated or truncated:
+                reset()
+
+        timer = PhaseTimer()
+        timer.instrument(env)
+        reset_times.clear()
+        episodes = 0
+        step_time = 0.0
+        for _ in range(steps):
+            action = act()
+            start = time.perf_counter()
+            _, _, terminated, truncated, _ = env.step(action)
+            step_time += time.perf_counter() - start
+            if terminated or truncated:
+                episodes += 1
+                reset()
+
+        timer.totals['other'] = max(step_time - sum(timer.totals.values()), 0.0)
+        reset_times.sort()
+        return {
+            'layout': layout_id,
+            'balls': balls,
+            'policy': policy,
+            'obs_mode': obs_mode,
+            'frame_skip': frame_skip,
+            'steps': steps,
+            'episodes': episodes,
+            'steps_per_sec': steps / step_time if step_time > 0 else 0.0,
+            'reset_ms': sum(reset_times) / len(reset_times) if reset_times else None,
+            'reset_p95_ms': reset_times[int(len(reset_times) * 0.95) - 1] if len(reset_times) > 1 else None,
+            'phase_ms': {phase: total * 1000.0 / steps for phase, total in timer.totals.items()}
+        }
+    finally:
+        cap.stop()
+
+
+def env_case_key(r):
+    return f"{r['layout']}|balls={r['balls']}|{r['policy']}|{r['obs_mode']}|skip={r['frame_skip']}"
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    """
+    Compare env results to a baseline results list.
+
+    Flags a case when steps/sec drops, or mean reset latency grows, by more than
+    tolerance (fraction). Cases missing from the baseline are ignored.
+    Returns a list of human readable regression strings.
+    """
+    reference = {env_case_key(r): r for r in baseline}
+    regressions = []
+    for r in results:
+        base = reference.get(env_case_key(r))
+        if base is None:
+            continue
+        if r['steps_per_sec'] < base['steps_per_sec'] * (1.0 - tolerance):
+            regressions.append(f"{env_case_key(r)}: {r['steps_per_sec']:.0f} steps/s "
+                               f"(baseline {base['steps_per_sec']:.0f})")
+        if r.get('reset_ms') and base.get('reset_ms') and r['reset_ms'] > base['reset_ms'] * (1.0 + tolerance):
+            regressions.append(f"{env_case_key(r)}: reset {r['reset_ms']:.2f}ms (baseline {base['reset_ms']:.2f}ms)")
+    return regressions
+
+
+def run_env(args):
+    layouts = args.layouts or list_layouts()
+
+    all_results = []
+    print(f"{'layout':<20} {'balls':>5} {'policy':>8} {'steps/s':>9} {'reset ms':>9}  "
+          + ' '.join(f"{p:>11}" for p in ENV_PHASES))
+    for layout_id in layouts:
+        for balls in args.balls:
+            for policy in args.policies:
+                r = bench_env_case(layout_id, balls=balls, policy=policy, obs_mode=args.obs_mode,
+                                   steps=args.steps, warmup=args.warmup, frame_skip=args.frame_skip)
+                all_results.append(r)
+                reset_ms = f"{r['reset_ms']:>9.2f}" if r['reset_ms'] is not None else f"{'-':>9}"
+                print(f"{layout_id:<20} {balls:>5} {policy:>8} {r['steps_per_sec']:>9.0f} {reset_ms}  "
+                      + ' '.join(f"{r['phase_ms'][p]:>9.3f}ms" for p in ENV_PHASES))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'benchmark': 'env', 'results': all_results}, f, indent=2)
+        logger.info(f"Results written to {args.json}")
+
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            logger.warning(f"Baseline {args.baseline} not found, skipping regression check")
+            return 0
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('results', [])
+        regressions = compare_to_baseline(all_results, baseline, args.tolerance)
+        for line in regressions:
+            logger.warning(f"REGRESSION {line}")
+        if regressions:
+            logger.warning(f"{len(regressions)} env benchmark regressions beyond {args.tolerance:.0%} tolerance")
+            return 1
+        logger.info(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pinball Wizard benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    physics_parser = subparsers.add_parser('physics', help="Physics ms/frame vs ball count (stress mode)")
+    physics_parser.add_argument("--layouts", nargs='+', help="Layout ids (default: all bundled layouts)")
+    physics_parser.add_argument("--balls", nargs='+', type=int, default=[1, 10, 25, 50, 100], help="Ball counts to measure")
+    physics_parser.add_argument("--frames", type=int, default=300, help="Measured frames per run")
+    physics_parser.add_argument("--warmup", type=int, default=60, help="Unmeasured frames before timing")
+    physics_parser.add_argument("--budget-ms", type=float, default=DEFAULT_FRAME_BUDGET_MS, help="Per-frame budget (p95)")
+    physics_parser.add_argument("--spatial-hash", action="store_true", help="Use spatial hash broadphase instead of BB tree")
+    physics_parser.add_argument("--json", help="Write results to this JSON file")
+    physics_parser.set_defaults(func=run_physics)
+
+    env_parser = subparsers.add_parser('env', help="Headless PinballEnv steps/sec, reset latency and per-phase cost")
+    env_parser.add_argument("--layouts", nargs='+', help="Layout ids (default: all bundled layouts)")
+    env_parser.add_argument("--balls", nargs='+', type=int, default=[1, 5], help=f"Balls on the table (>1 forces a regular multiball, at most {MULTIBALL_MAX_BALLS})")
+    env_parser.add_argument("--policies", nargs='+', choices=ENV_POLICIES, default=list(ENV_POLICIES), help="Action policies")
+    env_parser.add_argument("--obs-mode", default='single', choices=['single', 'multiball', 'pixels'], help="Observation mode")
+    env_parser.add_argument("--frame-skip", type=int, default=1, help="Physics frames per env step")
+    env_parser.add_argument("--steps", type=int, default=2000, help="Measured env steps per case")
+    env_parser.add_argument("--warmup", type=int, default=100, help="Unmeasured steps before timing")
+    env_parser.add_argument("--json", help="Write results to this JSON file")
+    env_parser.add_argument("--baseline", help="Compare against a previous --json file; exit 1 on regression")
+    env_parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown fraction vs baseline")
+    env_parser.set_defaults(func=run_env)
+
+    args = parser.parse_args()
+    # Per-frame engine logging would dominate the measurement
+    logging.getLogger('pbwizard').setLevel(logging.WARNING)
+    sys.exit(args.func(args))
@@ -0,0 +1,34 @@
+import os
+import sys
+import argparse
+import logging
+
+from pbwizard import imitation
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+# Force Headless Mode for Simulation
+os.environ['HEADLESS_SIM'] = 'true'
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Re-simulate saved replays into (observation, action) datasets for behavior cloning. "
+                    "Train on the result with the 'pretrain_dataset' config key.")
+    parser.add_argument("--replays", default="replays", help="Directory of replay JSON files")
+    parser.add_argument("--out", default=os.path.join("datasets", "replays"), help="Output dataset directory")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--obs-mode", default='single', choices=['single', 'multiball', 'pixels'],
+                        help="Observation mode (must match training)")
+    parser.add_argument("--frame-skip", type=int, default=1, help="Physics frames per env step (must match training)")
+    parser.add_argument("--tail-frames", type=int, default=imitation.DEFAULT_TAIL_FRAMES,
+                        help="Frames simulated after the last input before stopping")
+    args = parser.parse_args()
+
+    config = {'obs_mode': args.obs_mode, 'frame_skip': args.frame_skip, 'tail_frames': args.tail_frames}
+    result = imitation.convert_replays(args.replays, args.out, config=config, workers=args.workers)
+    if result['failed']:
+        logger.warning(f"{len(result['failed'])} replays failed: {result['failed']}")
+    sys.exit(0 if result['pairs'] else 1)
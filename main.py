@@ -26,9 +26,18 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 from pbwizard import vision, hardware, agent, web_server, constants
+from pbwizard.live_view import LiveStateRing
+from pbwizard.control import ControlChannel
 import train # Import train module
 
 
+def multiball_builder_for(agnt):
+    """MultiballObservation matching the loaded RL model, or None for single-ball models."""
+    if not hasattr(agnt, 'multiball_observation'):
+        return None
+    return agnt.multiball_observation()
+
+
 def main():
     logger.info("Starting Pinball Bot...")
     
@@ -44,6 +53,11 @@ def main():
         # Create capture with default layout first
         cap = vision.SimulatedFrameCapture(width=450, height=800, layout_config=None, socketio=web_server.socketio)
 
+        # Keep engines for likely-next layouts warm so layout switches are instant
+        engine_pool_size = int(os.getenv('ENGINE_POOL_SIZE', 6))
+        if engine_pool_size > 0:
+            cap.enable_engine_pool(max_engines=engine_pool_size)
+
         # Try to load last selected layout (this will properly set filepath)
         last_layout_name = None
         try:
@@ -376,7 +390,19 @@ def main():
                 
             return stats
 
+        def sync_live_view(self):
+            """While training, show the latest published training table (never blocks)."""
+            controller = getattr(self, 'controller', None)
+            if controller is None or controller.mode != 'TRAIN' or not hasattr(self.capture, 'set_state'):
+                return
+            state = controller.live_view.read()
+            if state is not None:
+                self.capture.external_control = True
+                self.capture.set_state(state)
+
         def get_game_state(self):
+            # Called by stream_frames at the UI refresh rate
+            self.sync_live_view()
             if hasattr(self.capture, 'get_game_state'):
                 return self.capture.get_game_state()
             return {}
@@ -404,10 +430,12 @@ def main():
             
             # Multiprocessing queues (Use Manager for eventlet compatibility)
             self.manager = multiprocessing.Manager()
-            self.state_queue = self.manager.Queue(maxsize=10)
-            self.command_queue = self.manager.Queue()
             self.status_queue = self.manager.Queue()
             self.training_process = None
+            # Training table -> UI, through shared memory (see LiveStateRing)
+            self.live_view = LiveStateRing.create()
+            # Stop / pause / reward updates -> worker, checked every step without IPC
+            self.control = ControlChannel.create()
 
         def start_training(self, config):
             with self.lock:
@@ -420,8 +448,7 @@ def main():
                 self.stop_training_flag = False
                 
                 # Clear queues
-                while not self.state_queue.empty(): self.state_queue.get()
-                while not self.command_queue.empty(): self.command_queue.get()
+                self.control.clear()
                 while not self.status_queue.empty(): self.status_queue.get()
                 
                 logger.info(f"Switching to TRAINING mode with config: {config}")
@@ -429,7 +456,7 @@ def main():
                 # Start Training Process
                 self.training_process = multiprocessing.Process(
                     target=train.train_worker,
-                    args=(config, self.state_queue, self.command_queue, self.status_queue)
+                    args=(config, self.live_view.name, self.control.name, self.status_queue)
                 )
                 self.training_process.start()
 
@@ -437,13 +464,19 @@ def main():
             with self.lock:
                 self.stop_training_flag = True
                 logger.info("Stop training requested...")
-                self.command_queue.put('STOP')
+                self.control.request_stop()
+
+        def pause_training(self, paused=True):
+            with self.lock:
+                if self.mode == 'TRAIN':
+                    logger.info("Pausing training" if paused else "Resuming training")
+                    self.control.set_paused(paused)
 
         def update_rewards(self, rewards):
             with self.lock:
                 if self.mode == 'TRAIN' and self.training_process and self.training_process.is_alive():
                     logger.info(f"Sending reward update to training process: {rewards}")
-                    self.command_queue.put({'type': 'UPDATE_REWARDS', 'rewards': rewards})
+                    self.control.update_rewards(rewards)
 
         def switch_to_play(self):
             with self.lock:
@@ -452,7 +485,7 @@ def main():
                 logger.info("Switching to PLAY mode")
                 
                 if self.training_process and self.training_process.is_alive():
-                    self.command_queue.put('STOP')
+                    self.control.request_stop()
                     self.training_process.join(timeout=5)
                     if self.training_process.is_alive():
                         self.training_process.terminate()
@@ -495,6 +528,15 @@ def main():
                         if msg_type == 'stats':
 
                             vision_wrapper.update_training_stats(msg_data)
+                        elif msg_type == 'eval':
+                            # Latest out-of-process evaluation (fixed seeds, deterministic policy)
+                            vision_wrapper.update_training_stats({'eval': msg_data})
+                        elif msg_type == 'pbt':
+                            # Population based training: per-round member scores
+                            vision_wrapper.update_training_stats({'pbt': msg_data})
+                        elif msg_type == 'remote':
+                            # Remote rollouts: per-round worker / throughput stats
+                            vision_wrapper.update_training_stats({'remote': msg_data})
                         elif msg_type == 'status':
                             # Handle both string and dict status for backward compatibility
                             status_state = msg_data
@@ -535,21 +577,6 @@ def main():
                 except Exception as e:
                     logger.error(f"Error processing status queue: {e}")
                 
-                # 2. Check State Queue (Visuals)
-                try:
-                    latest_state = None
-                    while not controller.state_queue.empty():
-                        latest_state = controller.state_queue.get_nowait()
-                    
-                    if latest_state:
-                        # Update local vision wrapper
-                        # We need to set external_control = True on the capture object
-                        if hasattr(vision_wrapper.capture, 'external_control'):
-                            vision_wrapper.capture.external_control = True
-                            vision_wrapper.capture.set_state(latest_state)
-                except:
-                    pass
-                
                 # Sleep a bit to avoid busy loop
                 time.sleep(0.01)
                 
@@ -584,39 +611,62 @@ def main():
                         should_flip_right = False
                         any_action = False
 
-                        for b_pos, b_vel in balls_data:
-                            if b_pos is None: continue
+                        multiball_obs = multiball_builder_for(agnt)
+                        if multiball_obs is not None and getattr(vision_wrapper.capture, 'physics_engine', None) is not None:
+                            # Multiball model: one forward pass over all balls (threat-sorted slots)
+                            if vision_wrapper.ai_enabled:
+                                obs = multiball_obs.build(vision_wrapper.capture.physics_engine, width, height,
+                                                          getattr(vision_wrapper.capture, 'drop_target_states', None))
+                                action = agnt.predict(obs)
+                                any_action = action != constants.ACTION_NOOP
+
+                                # A flipper fires if any ball is in its zone
+                                in_left = in_right = False
+                                for b_pos, _ in balls_data:
+                                    if b_pos is None: continue
+                                    zones = zone_manager.get_zone_status(b_pos[0], b_pos[1])
+                                    in_left = in_left or zones['left']
+                                    in_right = in_right or zones['right']
+
+                                if (action == constants.ACTION_FLIP_LEFT or action == constants.ACTION_FLIP_BOTH) and in_left:
+                                    should_flip_left = True
+                                if (action == constants.ACTION_FLIP_RIGHT or action == constants.ACTION_FLIP_BOTH) and in_right:
+                                    should_flip_right = True
+                        else:
+                            # Single-ball model: one predict per ball
+                            for b_pos, b_vel in balls_data:
+                                if b_pos is None: continue
 
-                            # Check zones for THIS ball
-                            zones = zone_manager.get_zone_status(b_pos[0], b_pos[1])
+                                # Check zones for THIS ball
+                                zones = zone_manager.get_zone_status(b_pos[0], b_pos[1])
                             
-                            # Construct Obs for THIS ball
-                            obs = np.zeros(8, dtype=np.float32)
-                            obs[0] = b_pos[0] / width
-                            obs[1] = b_pos[1] / height
-                            obs[2] = np.clip(b_vel[0] / 50.0, -1, 1)
-                            obs[3] = np.clip(b_vel[1] / 50.0, -1, 1)
+                                # Construct Obs for THIS ball
+                                obs = np.zeros(8, dtype=np.float32)
+                                obs[0] = b_pos[0] / width
+                                obs[1] = b_pos[1] / height
+                                obs[2] = np.clip(b_vel[0] / 50.0, -1, 1)
+                                obs[3] = np.clip(b_vel[1] / 50.0, -1, 1)
                             
-                            # Drop Targets (Global State)
-                            target_states = []
-                            if hasattr(vision_wrapper.capture, 'drop_target_states'):
-                                target_states = vision_wrapper.capture.drop_target_states
+                                # Drop Targets (Global State)
+                                target_states = []
+                                if hasattr(vision_wrapper.capture, 'drop_target_states'):
+                                    target_states = vision_wrapper.capture.drop_target_states
                             
-                            for i in range(4):
-                                if i < len(target_states):
-                                    obs[4 + i] = 1.0 if target_states[i] else 0.0
+                                for i in range(4):
+                                    if i < len(target_states):
+                                        obs[4 + i] = 1.0 if target_states[i] else 0.0
                             
-                            # Predict Action for THIS ball
-                            if vision_wrapper.ai_enabled:
-                                action = agnt.predict(obs)
-                                if action != constants.ACTION_NOOP:
-                                    any_action = True
+                                # Predict Action for THIS ball
+                                if vision_wrapper.ai_enabled:
+                                    action = agnt.predict(obs)
+                                    if action != constants.ACTION_NOOP:
+                                        any_action = True
                                 
-                                # Aggregate Desires
-                                if (action == constants.ACTION_FLIP_LEFT or action == constants.ACTION_FLIP_BOTH) and zones['left']:
-                                    should_flip_left = True
-                                if (action == constants.ACTION_FLIP_RIGHT or action == constants.ACTION_FLIP_BOTH) and zones['right']:
-                                    should_flip_right = True
+                                    # Aggregate Desires
+                                    if (action == constants.ACTION_FLIP_LEFT or action == constants.ACTION_FLIP_BOTH) and zones['left']:
+                                        should_flip_left = True
+                                    if (action == constants.ACTION_FLIP_RIGHT or action == constants.ACTION_FLIP_BOTH) and zones['right']:
+                                        should_flip_right = True
 
                         # Anti-Holding Logic (Global)
                         if not hasattr(vision_wrapper, 'rl_hold_steps'): vision_wrapper.rl_hold_steps = 0
@@ -665,6 +715,8 @@ def main():
         logger.info("Stopping...")
     finally:
         cap.stop()
+        controller.live_view.close()
+        controller.control.close()
         logger.info("Clean exit.")
 
 
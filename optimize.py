@@ -11,12 +11,20 @@ import argparse
 import logging
 import time
 import json
+
+from pbwizard import threads
+
+# Thread pools are sized when torch / BLAS load, so budgets have to be in the
+# environment before the imports below. Workers inherit theirs from the
+# manager (see the worker spawn below); anything else gets one thread per pool.
+threads.default_env(1)
+
 import optuna
 from stable_baselines3 import PPO
 from stable_baselines3.common.monitor import Monitor
 from stable_baselines3.common.callbacks import BaseCallback
 
-from pbwizard import vision, hardware
+from pbwizard import vision, hardware, env_factory
 from pbwizard.environment import PinballEnv
 
 # Configure logging
@@ -26,14 +34,15 @@ logger = logging.getLogger(__name__)
 # Force Headless Mode for Simulation
 os.environ['HEADLESS_SIM'] = 'true'
 
-# Prevent NumPy/PyTorch from using multiple threads per process (oversubscription)
-os.environ['OMP_NUM_THREADS'] = '1'
-os.environ['MKL_NUM_THREADS'] = '1'
-os.environ['OPENBLAS_NUM_THREADS'] = '1'
-
 # Conditional imports for Main process
 socketio_server = None
 
+# Parallel environments per trial (set from --n-envs)
+N_ENVS = 1
+# This process's thread budget and whether it is pinned (set in __main__)
+THREAD_BUDGET = None
+PIN_CPUS = False
+
 class ProgressCallback(BaseCallback):
     def __init__(self, verbose=0, socketio=None):
         super().__init__(verbose)
@@ -139,32 +148,9 @@ def create_env(trial=None, socketio=None):
     # Mock Controller
     hw = hardware.MockController(vision_system=cap)
 
-    # Training Vision Wrapper
-    class TrainingVisionWrapper:
-        def __init__(self, capture):
-            self.capture = capture
-        def update(self): pass
-        def get_stats(self): return {}
-        def get_events(self): 
-            if hasattr(self.capture, 'get_events'):
-                return self.capture.get_events()
-            return []
-        def get_score(self):
-            if hasattr(self.capture, 'get_score'):
-                return self.capture.get_score()
-            return 0
-        def get_ball_status(self):
-            if hasattr(self.capture, 'get_ball_status'):
-                return self.capture.get_ball_status()
-            return None
-
-    vision_wrapper = TrainingVisionWrapper(cap)
-    
-    # Mock Score Reader
-    class MockScoreReader:
-        def read_score(self, frame): return 0
-    
-    score_reader = MockScoreReader()
+    # Shared headless wrappers; PinballEnv binds the capture directly
+    vision_wrapper = env_factory.TrainingVisionWrapper(cap)
+    score_reader = env_factory.MockScoreReader()
 
     # Create Environment
     env = PinballEnv(vision_wrapper, hw, score_reader, headless=True)
@@ -184,12 +170,33 @@ def objective(trial):
     gae_lambda = trial.suggest_categorical("gae_lambda", [0.9, 0.95, 0.98])
     
     # Setup Environment
-    # Pass global socketio_server only if this process has one (Manager)
-    env, cap = create_env(socketio=socketio_server)
-    
     from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
-    env = Monitor(env) # Monitor for stats
-    env = DummyVecEnv([lambda: env])
+    cap = None
+    if N_ENVS > 1:
+        # Headless tables in worker processes, exchanged through shared memory
+        from pbwizard.env_factory import make_env_fns
+        from pbwizard.vec_env import SharedMemoryVecEnv
+        env_config = {'layout': 'default'}
+        if os.path.exists('config.json'):
+            try:
+                with open('config.json', 'r') as f:
+                    env_config.update(json.load(f))
+                env_config['layout'] = 'default'
+            except Exception as e:
+                logger.error(f"Failed to load config.json: {e}")
+        if THREAD_BUDGET:
+            # Env workers share this worker's CPUs, one thread each
+            cpus = THREAD_BUDGET['cpus']
+            env_config['env_thread_budgets'] = [{'threads': 1, 'cpus': [cpus[i % len(cpus)]] if cpus else None}
+                                                for i in range(N_ENVS)]
+            env_config['pin_cpus'] = PIN_CPUS
+        env = SharedMemoryVecEnv(make_env_fns(N_ENVS, env_config))
+    else:
+        # Pass global socketio_server only if this process has one (Manager)
+        env, cap = create_env(socketio=socketio_server)
+        env = Monitor(env) # Monitor for stats
+        single_env = env
+        env = DummyVecEnv([lambda: single_env])
     env = VecNormalize(env, norm_obs=True, norm_reward=True, clip_obs=10., gamma=gamma)
     
     try:
@@ -231,7 +238,8 @@ def objective(trial):
         traceback.print_exc()
         return float('-inf')
     finally:
-        cap.stop()
+        if cap:
+            cap.stop()
         env.close()
 
 def run_worker(study_name, storage_name, n_trials=None):
@@ -253,13 +261,23 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Pinball Optimization")
     parser.add_argument("--worker", action="store_true", help="Run in worker mode (no web server)")
     parser.add_argument("--trials", type=int, default=100, help="Total number of trials (approximate)")
+    parser.add_argument("--n-envs", type=int, default=1, help="Parallel environments per trial (shared memory VecEnv)")
+    parser.add_argument("--pin-cpus", action="store_true", help="Pin every worker to its own CPUs")
+    parser.add_argument("--threads", type=int, default=1, help=argparse.SUPPRESS)
+    parser.add_argument("--cpus", default="", help=argparse.SUPPRESS)
     args = parser.parse_args()
+    N_ENVS = max(1, args.n_envs)
+    PIN_CPUS = args.pin_cpus
 
     study_name = "pinball_ppo_optimization"
     storage_name = "sqlite:///{}.db".format(study_name)
 
     if args.worker:
         # WORKER MODE: No Eventlet, No UI
+        # Budget handed down by the manager (--threads / --cpus)
+        THREAD_BUDGET = threads.apply({'threads': args.threads,
+                                       'cpus': [int(c) for c in args.cpus.split(',') if c]},
+                                      pin=PIN_CPUS, name="optimization worker")
         run_worker(study_name, storage_name, n_trials=25) # Each worker does chunk
     else:
         # MANAGER MODE: Eventlet + UI + Subprocesses
@@ -291,14 +309,23 @@ if __name__ == "__main__":
 
         # Spawn Workers
         workers = []
-        num_cores = max(1, os.cpu_count())
-        num_workers = max(1, num_cores - 1) # Reserve 1 core for Manager+Server
-        
-        logger.info(f"Spawning {num_workers} background workers...")
-        
-        for i in range(num_workers):
-            cmd = [sys.executable, "optimize.py", "--worker"]
-            p = subprocess.Popen(cmd)
+        cpus = threads.available_cpus()
+        num_workers = max(1, (len(cpus) - threads.DEFAULT_RESERVE) // N_ENVS) # Reserve 1 core for Manager+Server
+        budgets = threads.split(num_workers, cpus=cpus, reserve=threads.DEFAULT_RESERVE)
+        # The manager (visual trials + server) stays unpinned: the reserved core is
+        # the one no worker is pinned to
+        THREAD_BUDGET = threads.apply({'threads': 1, 'cpus': None}, name="optimization manager")
+
+        logger.info(f"Spawning {num_workers} background workers ({N_ENVS} envs each)...")
+
+        for i, budget in enumerate(budgets):
+            logger.info(f"Worker {i}: {threads.describe(budget, PIN_CPUS)}")
+            cmd = [sys.executable, "optimize.py", "--worker", "--n-envs", str(N_ENVS),
+                   "--threads", str(budget['threads']), "--cpus", ",".join(map(str, budget['cpus']))]
+            if PIN_CPUS:
+                cmd.append("--pin-cpus")
+            # Thread pool sizes must be set before the worker imports torch
+            p = subprocess.Popen(cmd, env=dict(os.environ, **threads.env_vars(budget['threads'])))
             workers.append(p)
         
         try:
@@ -1,14 +1,105 @@
+import json
 import logging
 import os
 import random
 
+import numpy as np
 from stable_baselines3 import PPO
 
 from pbwizard.constants import ACTION_NOOP
+from pbwizard.observation import DEFAULT_BALL_SLOTS, MultiballObservation
 
 
 logger = logging.getLogger(__name__)
 
+# Flat size of PinballEnv's 'single' observation
+SINGLE_OBS_SIZE = 8
+
+
+def normalize_obs(observation, mean, var, clip_obs=10.0, epsilon=1e-8):
+    """Same transform as VecNormalize.normalize_obs, from saved running stats."""
+    obs = (np.asarray(observation, dtype=np.float64) - mean) / np.sqrt(var + epsilon)
+    return np.clip(obs, -clip_obs, clip_obs).astype(np.float32)
+
+
+def vec_normalize_path(model_path):
+    """Where the VecNormalize stats for a saved model live (models/x_v3.zip -> models/x_v3_vecnormalize.pkl)."""
+    base = model_path[:-4] if model_path.endswith('.zip') else model_path
+    return f"{base}_vecnormalize.pkl"
+
+
+def obs_meta_path(model_path):
+    """Where the observation layout of a saved model lives (models/x_v3.zip -> models/x_v3_obs.json)."""
+    base = model_path[:-4] if model_path.endswith('.zip') else model_path
+    return f"{base}_obs.json"
+
+
+def save_obs_meta(model_path, config):
+    """Record the observation layout (obs_mode, ball_slots, frame_stack) a model was trained on next to it."""
+    config = config or {}
+    meta = {
+        'obs_mode': config.get('obs_mode', 'single'),
+        'ball_slots': int(config.get('ball_slots', DEFAULT_BALL_SLOTS)),
+        'frame_stack': int(config.get('frame_stack', 1))
+    }
+    with open(obs_meta_path(model_path), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def multiball_observation_for(obs_meta, size):
+    """
+    MultiballObservation for a model, or None if it is not a multiball model
+    (or a frame-stacked one, which live play can't feed). Read from the saved
+    observation layout; models saved without one fall back to the flat
+    observation size unless that is ambiguous (e.g. 32 is 3 ball slots or 4
+    stacked single-ball frames).
+    """
+    if obs_meta is not None:
+        if obs_meta.get('obs_mode') != 'multiball' or int(obs_meta.get('frame_stack', 1)) > 1:
+            return None
+        return MultiballObservation(ball_slots=int(obs_meta.get('ball_slots', DEFAULT_BALL_SLOTS)))
+
+    builder = MultiballObservation.from_size(size)
+    if builder is not None and size % SINGLE_OBS_SIZE == 0:
+        logger.warning(f"Observation size {size} could be multiball or frame-stacked single-ball and the model "
+                       f"has no saved observation layout; using single-ball observations")
+        return None
+    return builder
+
+
+def policy_for(config):
+    """SB3 policy for a training config: a CNN over pixel frames (obs_mode 'pixels'), an MLP otherwise."""
+    return "CnnPolicy" if (config or {}).get('obs_mode') == 'pixels' else "MlpPolicy"
+
+
+def make_vec_normalize(venv, config):
+    """
+    Training VecNormalize for a config. Pixel frames are not z-scored
+    (CnnPolicy scales the uint8 images to [0, 1] itself); rewards always are.
+    """
+    from stable_baselines3.common.vec_env import VecNormalize
+    config = config or {}
+    return VecNormalize(venv, norm_obs=config.get('obs_mode') != 'pixels', norm_reward=True, clip_obs=10.,
+                        gamma=config.get('gamma', 0.99))
+
+
+def make_ppo(env, hyperparams, tensorboard_log=None, verbose=1):
+    """PPO with the training hyperparameters from a config dict (defaults for missing keys)."""
+    return PPO(
+        policy_for(hyperparams),
+        env,
+        verbose=verbose,
+        ent_coef=hyperparams.get('ent_coef', 0.01),
+        learning_rate=hyperparams.get('learning_rate', 3e-4),
+        n_steps=int(hyperparams.get('n_steps', 2048)),
+        batch_size=int(hyperparams.get('batch_size', 64)),
+        gamma=hyperparams.get('gamma', 0.99),
+        gae_lambda=hyperparams.get('gae_lambda', 0.95),
+        device=hyperparams.get('device', 'cpu'),
+        tensorboard_log=tensorboard_log
+    )
+
 
 class ReflexAgent:
     
@@ -176,9 +267,19 @@ class RLAgent:
         self.model = None
         self.enabled = True  # AI enabled by default
         self._warned_no_model = False
+        # Observation normalization the model was trained with (VecNormalize), if saved
+        self.obs_rms = None
+        self.clip_obs = 10.0
+        self.norm_epsilon = 1e-8
+        # Observation layout the model was trained on, if saved
+        self.obs_meta = None
+        self._multiball_obs = None
+        self._multiball_obs_model = None
         if model_path and os.path.exists(model_path):
             logger.info(f"Loading RL model from {model_path}")
             self.model = PPO.load(model_path)
+            self._load_normalization(model_path)
+            self._load_obs_meta(model_path)
         elif env:
             # Check for optimized hyperparameters
             hp_path = "hyperparams.json"
@@ -221,32 +322,89 @@ class RLAgent:
         else:
             logger.warning("RLAgent initialized without env or model_path. Cannot train or predict.")
 
-    def train(self, total_timesteps=10000, callbacks=None, hyperparams=None):
+    def train(self, total_timesteps=10000, callbacks=None, hyperparams=None, resume_from=None,
+              pretrain_from=None):
         if hyperparams:
             logger.info(f"Re-initializing model with custom hyperparameters: {hyperparams}")
-            self.model = PPO(
-                "MlpPolicy",
-                self.model.env if self.model else None, # Reuse env if available
-                verbose=1,
-                ent_coef=hyperparams.get('ent_coef', 0.01),
-                learning_rate=hyperparams.get('learning_rate', 3e-4),
-                n_steps=int(hyperparams.get('n_steps', 2048)),
-                batch_size=int(hyperparams.get('batch_size', 64)),
-                gamma=hyperparams.get('gamma', 0.99),
-                gae_lambda=hyperparams.get('gae_lambda', 0.95),
-                device='cpu',
-                tensorboard_log=self.model.tensorboard_log if self.model else None
-            )
+            self.model = make_ppo(self.model.env if self.model else None, # Reuse env if available
+                                  hyperparams,
+                                  tensorboard_log=self.model.tensorboard_log if self.model else None)
 
         if self.model:
+            reset_num_timesteps = True
+            if resume_from:
+                # Continue a checkpointed run: weights, optimizer, normalization, RNG and step counter
+                from pbwizard import checkpoint
+                path = checkpoint.resolve(resume_from)
+                if path is None:
+                    raise FileNotFoundError(f"No checkpoint found at {resume_from}")
+                checkpoint.restore(self.model, path)
+                total_timesteps = max(0, total_timesteps - self.model.num_timesteps)
+                reset_num_timesteps = False
+            elif pretrain_from:
+                # Behavior cloning on converted replays before RL starts
+                from pbwizard import imitation
+                hyperparams = hyperparams or {}
+                imitation.behavior_clone(self.model, pretrain_from,
+                                         epochs=int(hyperparams.get('pretrain_epochs', imitation.DEFAULT_BC_EPOCHS)),
+                                         batch_size=int(hyperparams.get('pretrain_batch_size', imitation.DEFAULT_BC_BATCH_SIZE)),
+                                         learning_rate=hyperparams.get('pretrain_learning_rate', imitation.DEFAULT_BC_LEARNING_RATE))
             logger.info(f"Starting training for {total_timesteps} timesteps...")
-            self.model.learn(total_timesteps=total_timesteps, callback=callbacks)
+            self.model.learn(total_timesteps=total_timesteps, callback=callbacks,
+                             reset_num_timesteps=reset_num_timesteps)
             logger.info("Training complete.")
         else:
             logger.error("No model to train.")
 
+    def _load_normalization(self, model_path):
+        """Pick up the VecNormalize stats saved next to a model (if any)."""
+        self.obs_rms = None
+        path = vec_normalize_path(model_path)
+        if not os.path.exists(path):
+            return
+        try:
+            import pickle
+            with open(path, 'rb') as f:
+                norm = pickle.load(f)
+            if norm.norm_obs:
+                self.obs_rms = norm.obs_rms
+                self.clip_obs = norm.clip_obs
+                self.norm_epsilon = norm.epsilon
+                logger.info(f"Loaded observation normalization from {path}")
+        except Exception as e:
+            logger.error(f"Failed to load normalization stats {path}: {e}")
+
+    def _load_obs_meta(self, model_path):
+        """Pick up the observation layout saved next to a model (if any)."""
+        self.obs_meta = None
+        path = obs_meta_path(model_path)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r') as f:
+                self.obs_meta = json.load(f)
+            logger.info(f"Loaded observation layout from {path}: {self.obs_meta}")
+        except Exception as e:
+            logger.error(f"Failed to load observation layout {path}: {e}")
+
+    def multiball_observation(self):
+        """MultiballObservation matching the loaded model, or None for single-ball models."""
+        if self.model is None:
+            return None
+        if self._multiball_obs_model is not self.model:
+            size = int(np.prod(self.model.observation_space.shape))
+            self._multiball_obs = multiball_observation_for(self.obs_meta, size)
+            self._multiball_obs_model = self.model
+        return self._multiball_obs
+
+    def normalize_observation(self, observation):
+        if self.obs_rms is None or np.shape(observation) != self.obs_rms.mean.shape:
+            return observation
+        return normalize_obs(observation, self.obs_rms.mean, self.obs_rms.var, self.clip_obs, self.norm_epsilon)
+
     def predict(self, observation):
         if self.model:
+            observation = self.normalize_observation(observation)
             try:
                 action, _ = self.model.predict(observation)
                 logger.debug(f"RL Agent predict: obs={observation}, action={action}")
@@ -276,6 +434,8 @@ class RLAgent:
             # We need to preserve the environment if we reload
             env = self.model.get_env() if self.model else None
             self.model = PPO.load(path, env=env)
+            self._load_normalization(path)
+            self._load_obs_meta(path)
             self._warned_no_model = False
             return True
         else:
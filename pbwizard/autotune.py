@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import logging
+import platform
+
+from pbwizard import agent, env_factory
+
+
+logger = logging.getLogger(__name__)
+
+
+# Sweep defaults (each can be overridden with the matching autotune_* config key)
+DEFAULT_ENV_COUNTS = (1, 2, 4, 8)
+DEFAULT_N_STEPS = (256, 512, 1024, 2048)
+DEFAULT_BATCH_SIZES = (64, 128, 256, 512)
+
+# Rollout size used while ranking env counts / threads (stage 1)
+PROBE_N_STEPS = 256
+PROBE_BATCH_SIZE = 64
+
+
+def valid_ppo_settings(n_envs, n_steps, batch_size):
+    """PPO needs more than one sample per minibatch and minibatches that tile the rollout."""
+    rollout = n_envs * n_steps
+    return 1 < batch_size <= rollout and rollout % batch_size == 0
+
+
+def default_thread_counts(cpu_count=None):
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return sorted({1, max(1, cpu_count // 2), cpu_count})
+
+
+def default_devices():
+    import torch
+    return ['cpu', 'cuda'] if torch.cuda.is_available() else ['cpu']
+
+
+def measure_throughput(config, n_envs, n_steps, batch_size, threads, device='cpu', iterations=1,
+                       width=450, height=800):
+    """
+    Train PPO for `iterations` rollouts with these settings and time it.
+
+    Env construction is not timed; the measurement covers collection and the
+    PPO update, which is what a real run spends its time on.
+    """
+    import torch
+    from stable_baselines3 import PPO
+
+    torch.set_num_threads(threads)
+    venv, cap = env_factory.make_training_vec_env(config, n_envs, width=width, height=height)
+    try:
+        venv = agent.make_vec_normalize(venv, config)
+        model = PPO(agent.policy_for(config), venv, n_steps=n_steps, batch_size=batch_size, device=device, verbose=0)
+        timesteps = n_envs * n_steps * iterations
+        start = time.perf_counter()
+        model.learn(total_timesteps=timesteps)
+        elapsed = time.perf_counter() - start
+    finally:
+        venv.close()
+        if cap is not None:
+            cap.stop()
+
+    result = {
+        'n_envs': n_envs,
+        'n_steps': n_steps,
+        'batch_size': batch_size,
+        'torch_threads': threads,
+        'device': device,
+        'timesteps': timesteps,
+        'seconds': elapsed,
+        'steps_per_sec': timesteps / elapsed if elapsed > 0 else 0.0
+    }
+    logger.info(f"Autotune: envs={n_envs} n_steps={n_steps} batch={batch_size} threads={threads} "
+                f"device={device} -> {result['steps_per_sec']:.0f} steps/s")
+    return result
+
+
+def autotune(config, width=450, height=800, measure=measure_throughput):
+    """
+    Short calibration sweep for training throughput on this host.
+
+    Stage 1 ranks env count x torch threads x device at a small probe
+    rollout; stage 2 sweeps n_steps x batch_size with the stage 1 winner.
+    Only combinations valid for PPO are measured. Returns a report with the
+    chosen settings ('chosen', ready to merge into the training config) and
+    every measurement.
+    """
+    cpu_count = os.cpu_count() or 1
+    # More worker processes than cores only adds contention (unless asked for explicitly)
+    env_counts = config.get('autotune_envs') or [n for n in DEFAULT_ENV_COUNTS if n <= cpu_count]
+    n_steps_options = config.get('autotune_n_steps', DEFAULT_N_STEPS)
+    batch_options = config.get('autotune_batch_sizes', DEFAULT_BATCH_SIZES)
+    thread_options = config.get('autotune_threads') or default_thread_counts(cpu_count)
+    devices = config.get('autotune_devices') or default_devices()
+    iterations = int(config.get('autotune_iterations', 1))
+    probe_steps = int(config.get('autotune_probe_n_steps', PROBE_N_STEPS))
+    probe_batch = int(config.get('autotune_probe_batch_size', PROBE_BATCH_SIZE))
+
+    started = time.time()
+    measurements = []
+
+    def run(n_envs, n_steps, batch_size, threads, device, stage):
+        try:
+            r = measure(config, n_envs, n_steps, batch_size, threads, device=device,
+                        iterations=iterations, width=width, height=height)
+        except Exception as e:
+            logger.warning(f"Autotune candidate failed (envs={n_envs}, n_steps={n_steps}, "
+                           f"batch={batch_size}, threads={threads}, device={device}): {e}")
+            return None
+        r['stage'] = stage
+        measurements.append(r)
+        return r
+
+    # Stage 1: parallelism
+    best = None
+    for device in devices:
+        for n_envs in env_counts:
+            for threads in thread_options:
+                batch = probe_batch if valid_ppo_settings(n_envs, probe_steps, probe_batch) else n_envs * probe_steps
+                r = run(n_envs, probe_steps, batch, threads, device, 1)
+                if r and (best is None or r['steps_per_sec'] > best['steps_per_sec']):
+                    best = r
+    if best is None:
+        raise RuntimeError("Autotune: no candidate could be measured")
+
+    # Stage 2: rollout / minibatch size
+    for n_steps in n_steps_options:
+        for batch_size in batch_options:
+            if not valid_ppo_settings(best['n_envs'], n_steps, batch_size):
+                continue
+            run(best['n_envs'], n_steps, batch_size, best['torch_threads'], best['device'], 2)
+
+    winner = max(measurements, key=lambda r: r['steps_per_sec'])
+    chosen = {k: winner[k] for k in ('n_envs', 'n_steps', 'batch_size', 'torch_threads', 'device')}
+    logger.info(f"Autotune chose {chosen} ({winner['steps_per_sec']:.0f} steps/s, "
+                f"{len(measurements)} runs in {time.time() - started:.0f}s)")
+
+    import torch
+    return {
+        'chosen': chosen,
+        'steps_per_sec': winner['steps_per_sec'],
+        'measurements': measurements,
+        'host': {
+            'hostname': platform.node(),
+            'cpu_count': cpu_count,
+            'torch_version': torch.__version__,
+            'cuda_available': torch.cuda.is_available()
+        },
+        'seconds': time.time() - started
+    }
+
+
+def save_report(path, report):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Autotune report written to {path}")
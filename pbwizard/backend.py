@@ -0,0 +1,138 @@
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+def _first_method(name, *owners):
+    """Return the first owner's bound method called `name`, or None."""
+    for owner in owners:
+        if owner is not None and hasattr(owner, name):
+            return getattr(owner, name)
+    return None
+
+
+def _first_owner(name, *owners):
+    """Return the first owner that has attribute `name`, or None."""
+    for owner in owners:
+        if owner is not None and hasattr(owner, name):
+            return owner
+    return None
+
+
+class EnvBackend:
+    """
+    Simulation / camera backend for PinballEnv.
+
+    Every member is a plain callable resolved once at construction, so the
+    environment's step loop makes direct calls instead of probing
+    vision / vision.capture / score_reader with hasattr on every frame.
+
+    Members:
+        step(dt)          advance the table one frame (headless only)
+        ball_status()     ((x, y), (vx, vy)) of the tracked ball, or None
+        score(frame)      current score, or None if no source is available
+        events()          list of collision events since the last call
+        drop_targets()    list of drop target up/down states
+        reset(seed=None)  reset the game / physics state (seed only passed when given)
+        nudge_left()      nudge the table left
+        nudge_right()     nudge the table right
+        frame()           latest camera / render frame, or None
+        frame_seq()       counter bumped on every new capture frame
+        process_frame(f)  CV tracking on a frame -> (ball_pos, processed_frame)
+        ball_lost()       whether the backend has flagged the ball as drained
+        game_over()       whether the game has ended (last ball drained)
+        dimensions()      (width, height) of the playfield, or None
+        physics_engine()  live physics engine (combo / multiplier), or None
+
+    Members that a backend cannot provide are None; PinballEnv checks for
+    None where the original code had a fallback. Attributes that change at
+    runtime (physics engine after a layout switch, ball_lost flags, target
+    states) are read through the bound owner on every call, never cached.
+
+    A custom backend (e.g. a batched sim) can subclass this or be built with
+    keyword arguments and passed to PinballEnv(backend=...).
+    """
+
+    MEMBERS = ('step', 'ball_status', 'score', 'events', 'drop_targets', 'reset',
+               'nudge_left', 'nudge_right', 'frame', 'process_frame', 'ball_lost',
+               'game_over', 'dimensions', 'physics_engine', 'frame_seq')
+
+    def __init__(self, capture=None, **members):
+        # The underlying capture (if any), for layout management in reset()
+        self.capture = capture
+        unknown = set(members) - set(self.MEMBERS)
+        if unknown:
+            raise ValueError(f"Unknown backend members: {sorted(unknown)}")
+        for name in self.MEMBERS:
+            setattr(self, name, members.get(name))
+
+    @classmethod
+    def from_capture(cls, capture):
+        """Sim backend bound directly to a SimulatedFrameCapture."""
+        return cls.from_vision(None, None, capture=capture)
+
+    @classmethod
+    def from_vision(cls, vision, score_reader=None, capture=None):
+        """
+        Resolve a backend from a vision wrapper (and its .capture), keeping the
+        same lookup priority PinballEnv has always used.
+        """
+        if capture is None and vision is not None and hasattr(vision, 'capture'):
+            capture = vision.capture
+
+        members = {}
+
+        # Physics step: capture first (no render), then the wrapper
+        if capture is not None and hasattr(capture, 'manual_step'):
+            capture_step = capture.manual_step
+            members['step'] = lambda dt: capture_step(dt=dt, render=False)
+        elif vision is not None and hasattr(vision, 'manual_step'):
+            members['step'] = vision.manual_step
+
+        members['ball_status'] = _first_method('get_ball_status', vision, capture)
+        members['events'] = _first_method('get_events', vision, capture)
+        members['frame'] = _first_method('get_frame', vision, capture)
+        members['nudge_left'] = _first_method('nudge_left', vision, capture)
+        members['nudge_right'] = _first_method('nudge_right', vision, capture)
+        if vision is not None and hasattr(vision, 'process_frame'):
+            members['process_frame'] = vision.process_frame
+
+        # Score: vision / capture score, else OCR from the frame
+        score_source = _first_method('get_score', vision, capture)
+        if score_source is not None:
+            members['score'] = lambda frame: score_source()
+        elif score_reader is not None and hasattr(score_reader, 'read_score'):
+            read_score = score_reader.read_score
+            members['score'] = lambda frame: read_score(frame) if frame is not None else None
+
+        # Live attributes
+        owner = _first_owner('drop_target_states', vision, capture)
+        if owner is not None:
+            members['drop_targets'] = lambda: owner.drop_target_states
+        lost_owner = _first_owner('ball_lost', vision, capture)
+        if lost_owner is not None:
+            members['ball_lost'] = lambda: lost_owner.ball_lost
+        over_owner = _first_owner('game_over', vision, capture)
+        if over_owner is not None:
+            members['game_over'] = lambda: over_owner.game_over
+        if capture is not None and hasattr(capture, 'width'):
+            members['dimensions'] = lambda: (capture.width, capture.height)
+        if capture is not None and hasattr(capture, 'physics_engine'):
+            members['physics_engine'] = lambda: capture.physics_engine
+        if capture is not None and isinstance(getattr(capture, 'frame_seq', None), int):
+            members['frame_seq'] = lambda: capture.frame_seq
+
+        # Reset: full game reset if available, else clear the balls by hand
+        if capture is not None and hasattr(capture, 'reset_game_state'):
+            members['reset'] = capture.reset_game_state
+        elif vision is not None and hasattr(vision, 'reset_game_state'):
+            members['reset'] = vision.reset_game_state
+        elif capture is not None and hasattr(capture, 'physics_engine'):
+            def clear_balls(seed=None):
+                if hasattr(capture.physics_engine, 'balls'):
+                    capture.physics_engine.balls = [] # Force clear
+                    logger.info("Cleared balls from physics engine (manual)")
+            members['reset'] = clear_balls
+
+        return cls(capture=capture, **members)
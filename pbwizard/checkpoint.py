@@ -0,0 +1,178 @@
+import os
+import re
+import copy
+import random
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+
+
+logger = logging.getLogger(__name__)
+
+
+CHECKPOINT_FORMAT = 1
+DEFAULT_CHECKPOINT_DIR = "checkpoints"
+DEFAULT_KEEP = 3
+
+_CKPT_PATTERN = re.compile(r"ckpt_(\d+)\.pt$")
+
+
+def _find_vec_normalize(venv):
+    """The VecNormalize wrapper in a VecEnv stack, or None."""
+    from stable_baselines3.common.vec_env import VecNormalize, VecEnvWrapper
+    while venv is not None:
+        if isinstance(venv, VecNormalize):
+            return venv
+        venv = venv.venv if isinstance(venv, VecEnvWrapper) else None
+    return None
+
+
+def _cpu_state_dict(state_dict):
+    return {k: v.detach().to('cpu', copy=True) for k, v in state_dict.items()}
+
+
+def snapshot(model, extra=None):
+    """
+    Copy everything needed to continue training into plain CPU objects.
+
+    Runs on the training thread, so it only copies (small MLP tensors, the
+    optimizer state, normalization stats); serialization happens later on
+    the writer thread.
+    """
+    state = {
+        'format': CHECKPOINT_FORMAT,
+        'num_timesteps': model.num_timesteps,
+        'episode_num': model._episode_num,
+        'n_updates': getattr(model, '_n_updates', 0),
+        'policy': _cpu_state_dict(model.policy.state_dict()),
+        'optimizer': copy.deepcopy(model.policy.optimizer.state_dict()),
+        'rng': {
+            'python': random.getstate(),
+            'numpy': np.random.get_state(),
+            'torch': torch.get_rng_state(),
+            'cuda': torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None
+        },
+        'vec_normalize': None
+    }
+    norm = _find_vec_normalize(model.get_env())
+    if norm is not None:
+        state['vec_normalize'] = {
+            'obs_rms': copy.deepcopy(norm.obs_rms),
+            'ret_rms': copy.deepcopy(norm.ret_rms),
+            'returns': np.array(norm.returns, copy=True),
+            'clip_obs': norm.clip_obs,
+            'epsilon': norm.epsilon
+        }
+    if extra:
+        state.update(extra)
+    return state
+
+
+def restore(model, path):
+    """Load a checkpoint into a freshly built model (same hyperparams / env). Returns the checkpoint dict."""
+    state = torch.load(path, map_location=model.device, weights_only=False)
+    if state.get('format') != CHECKPOINT_FORMAT:
+        raise ValueError(f"Unsupported checkpoint format in {path}: {state.get('format')}")
+
+    model.policy.load_state_dict(state['policy'])
+    model.policy.optimizer.load_state_dict(state['optimizer'])
+    model.num_timesteps = state['num_timesteps']
+    model._episode_num = state['episode_num']
+    if hasattr(model, '_n_updates'):
+        model._n_updates = state['n_updates']
+
+    norm_state = state.get('vec_normalize')
+    norm = _find_vec_normalize(model.get_env())
+    if norm_state is not None and norm is not None:
+        norm.obs_rms = norm_state['obs_rms']
+        norm.ret_rms = norm_state['ret_rms']
+        if len(norm_state['returns']) == len(norm.returns):
+            norm.returns = norm_state['returns']
+    elif norm_state is not None:
+        logger.warning("Checkpoint has VecNormalize stats but the env is not normalized")
+
+    rng = state['rng']
+    random.setstate(rng['python'])
+    np.random.set_state(rng['numpy'])
+    torch.set_rng_state(rng['torch'])
+    if rng.get('cuda') is not None and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(rng['cuda'])
+
+    logger.info(f"Resumed from {path} at {model.num_timesteps} timesteps")
+    return state
+
+
+def list_checkpoints(directory):
+    """(timesteps, path) for every checkpoint in directory, oldest first."""
+    if not os.path.isdir(directory):
+        return []
+    found = []
+    for filename in os.listdir(directory):
+        match = _CKPT_PATTERN.match(filename)
+        if match:
+            found.append((int(match.group(1)), os.path.join(directory, filename)))
+    return sorted(found)
+
+
+def resolve(path):
+    """A checkpoint file, or the latest checkpoint in a directory (None if there is none)."""
+    if os.path.isdir(path):
+        found = list_checkpoints(path)
+        return found[-1][1] if found else None
+    return path if os.path.exists(path) else None
+
+
+class CheckpointWriter:
+    """
+    Serializes snapshots on a single background thread.
+
+    Files are written to a temp name and renamed, so a crash mid-write never
+    leaves a truncated checkpoint behind. Only the newest `keep` are kept.
+    """
+
+    def __init__(self, directory, keep=DEFAULT_KEEP):
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        self._pending = []
+
+    def submit(self, state):
+        path = os.path.join(self.directory, f"ckpt_{state['num_timesteps']}.pt")
+        self._pending = [f for f in self._pending if not f.done()]
+        self._pending.append(self._executor.submit(self._write, state, path))
+        return path
+
+    def _write(self, state, path):
+        try:
+            tmp = path + ".tmp"
+            torch.save(state, tmp)
+            os.replace(tmp, path)
+            logger.info(f"Checkpoint written: {path}")
+            if self.keep:
+                for _, old in list_checkpoints(self.directory)[:-self.keep]:
+                    os.remove(old)
+        except Exception as e:
+            logger.error(f"Failed to write checkpoint {path}: {e}")
+
+    def flush(self):
+        """Wait for pending writes."""
+        for f in self._pending:
+            f.result()
+        self._pending = []
+
+    def close(self):
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+
+def save_vec_normalize(model, path):
+    """Save the model env's VecNormalize stats (for inference) if it has one."""
+    norm = _find_vec_normalize(model.get_env())
+    if norm is None:
+        return False
+    norm.save(path)
+    logger.info(f"Normalization stats saved to {path}")
+    return True
@@ -0,0 +1,158 @@
+import json
+import logging
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+# Header (int64): [version, flags, rewards revision, payload length]
+VERSION, FLAGS, REWARDS_REV, PAYLOAD_LEN = range(4)
+HEADER_SIZE = 4
+HEADER_BYTES = 8 * HEADER_SIZE
+
+FLAG_STOP = 1
+FLAG_PAUSE = 2
+
+# Room for the merged reward weights as JSON
+DEFAULT_PAYLOAD_BYTES = 16384
+
+
+class ControlCommand:
+    """Snapshot of the control channel returned by ControlChannel.poll()."""
+
+    __slots__ = ('stop', 'paused', 'rewards')
+
+    def __init__(self, stop, paused, rewards=None):
+        self.stop = stop
+        self.paused = paused
+        # Merged reward weights, only set when they changed since the last poll
+        self.rewards = rewards
+
+
+class ControlChannel:
+    """
+    Main process -> training worker commands (stop, pause, reward weights)
+    through shared memory instead of a Manager queue.
+
+    The main process is the only writer. Every change bumps a version
+    counter (odd while writing), so the worker's per-step check is a single
+    integer compare; flags and the reward payload are read only when the
+    version moved. Reward updates are merged on the writer side and sent
+    whole, so an update cannot be lost if several arrive between polls.
+
+    The main process creates the channel and owns / unlinks it; the worker
+    attaches by name.
+    """
+
+    def __init__(self, name=None, payload_bytes=DEFAULT_PAYLOAD_BYTES):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=HEADER_BYTES + payload_bytes)
+            self.owner = True
+        else:
+            # Like SharedBuffers: attaching workers share the parent's resource tracker
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.header = np.ndarray((HEADER_SIZE,), dtype=np.int64, buffer=self.shm.buf)
+        self.payload = self.shm.buf[HEADER_BYTES:]
+        if self.owner:
+            self.header[:] = 0
+
+        # Writer state
+        self._rewards = {}
+        # Reader state
+        self._seen_version = 0
+        self._seen_rewards = 0
+
+    @classmethod
+    def create(cls, payload_bytes=DEFAULT_PAYLOAD_BYTES):
+        return cls(payload_bytes=payload_bytes)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(name=name)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    # --- Writer (main process) ---------------------------------------------
+
+    def _begin(self):
+        self.header[VERSION] += 1 # odd: write in progress
+
+    def _end(self):
+        self.header[VERSION] += 1
+
+    def _set_flag(self, flag, on):
+        self._begin()
+        if on:
+            self.header[FLAGS] |= flag
+        else:
+            self.header[FLAGS] &= ~flag
+        self._end()
+
+    def request_stop(self):
+        self._set_flag(FLAG_STOP, True)
+
+    def set_paused(self, paused):
+        self._set_flag(FLAG_PAUSE, paused)
+
+    def update_rewards(self, rewards):
+        self._rewards.update(rewards or {})
+        data = json.dumps(self._rewards).encode('utf-8')
+        if len(data) > len(self.payload):
+            raise ValueError(f"Reward update too large for control channel ({len(data)} bytes)")
+        self._begin()
+        self.payload[:len(data)] = data
+        self.header[PAYLOAD_LEN] = len(data)
+        self.header[REWARDS_REV] += 1
+        self._end()
+
+    def clear(self):
+        """Reset flags and rewards before a new training run."""
+        self._rewards = {}
+        self._begin()
+        self.header[FLAGS] = 0
+        self.header[PAYLOAD_LEN] = 0
+        self._end()
+
+    # --- Reader (training worker) ------------------------------------------
+
+    def changed(self):
+        return int(self.header[VERSION]) != self._seen_version
+
+    def poll(self):
+        """ControlCommand if anything changed since the last poll, else None. Never blocks."""
+        version = int(self.header[VERSION])
+        if version == self._seen_version or version % 2:
+            return None
+
+        flags = int(self.header[FLAGS])
+        rewards_rev = int(self.header[REWARDS_REV])
+        rewards = None
+        if rewards_rev != self._seen_rewards:
+            length = int(self.header[PAYLOAD_LEN])
+            raw = bytes(self.payload[:length])
+        if int(self.header[VERSION]) != version:
+            # Writer got in between: try again next step
+            return None
+        if rewards_rev != self._seen_rewards:
+            rewards = json.loads(raw.decode('utf-8')) if raw else {}
+            self._seen_rewards = rewards_rev
+
+        self._seen_version = version
+        return ControlCommand(stop=bool(flags & FLAG_STOP), paused=bool(flags & FLAG_PAUSE), rewards=rewards)
+
+    def close(self):
+        self.header = None
+        self.payload.release()
+        self.payload = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
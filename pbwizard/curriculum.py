@@ -0,0 +1,111 @@
+import logging
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_TEMPERATURE = 1.0
+# Every layout keeps at least this share of the sampling weight
+DEFAULT_MIN_SHARE = 0.05
+# How far each update moves the weights toward the new target (1 = jump)
+DEFAULT_RATE = 0.5
+
+
+class LayoutCurriculum:
+    """
+    Weighted set of training layouts; each vec env worker is pinned to one.
+
+    update() shifts the weights toward layouts with the lowest evaluation
+    reward (softmax over negated, standardized rewards), smoothed against
+    the previous weights and floored at min_share so no table is forgotten.
+    assign() turns the weights into per-worker layouts and apply() pushes
+    them to a VecEnv, moving as few workers as possible. Workers switch
+    tables at their next reset.
+    """
+
+    def __init__(self, layouts, temperature=DEFAULT_TEMPERATURE, min_share=DEFAULT_MIN_SHARE,
+                 rate=DEFAULT_RATE, seed=None):
+        if isinstance(layouts, dict):
+            self.layouts = list(layouts)
+            weights = np.array([float(layouts[l]) for l in self.layouts])
+        else:
+            self.layouts = list(layouts)
+            weights = np.ones(len(self.layouts))
+        if not self.layouts:
+            raise ValueError("Curriculum needs at least one layout")
+        if (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError(f"Invalid layout weights: {layouts}")
+        self.weights = weights / weights.sum()
+        self.temperature = temperature
+        # A floor that can't be met by every layout at once is scaled down
+        self.min_share = min(min_share, 1.0 / len(self.layouts))
+        self.rate = rate
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, rewards):
+        """Move the weights toward layouts whose evaluation reward is lowest. rewards: {layout: mean reward}."""
+        known = [l for l in self.layouts if l in rewards]
+        if len(known) < 2:
+            return self.weights
+        values = np.array([rewards[l] for l in known], dtype=np.float64)
+        z = (values - values.mean()) / (values.std() + 1e-8)
+        logits = -z / max(self.temperature, 1e-6)
+        target_known = np.exp(logits - logits.max())
+        target_known /= target_known.sum()
+
+        # Layouts without a result keep their current share
+        target = self.weights.copy()
+        idx = [self.layouts.index(l) for l in known]
+        target[idx] = target_known * self.weights[idx].sum()
+
+        weights = (1.0 - self.rate) * self.weights + self.rate * target
+        floor = self.min_share
+        weights = floor + (1.0 - floor * len(weights)) * weights / weights.sum()
+        self.weights = weights / weights.sum()
+        return self.weights
+
+    def assign(self, n_envs):
+        """
+        Layout per worker: floor(weight * n) workers each, the remaining
+        slots drawn by the fractional remainders (so small weights still get
+        a worker now and then when there are fewer workers than layouts).
+        """
+        quotas = self.weights * n_envs
+        counts = np.floor(quotas).astype(int)
+        remaining = n_envs - counts.sum()
+        if remaining > 0:
+            frac = quotas - counts
+            p = frac / frac.sum() if frac.sum() > 0 else None
+            extra = self.rng.choice(len(self.layouts), size=remaining, replace=False, p=p)
+            counts[extra] += 1
+        return [layout for layout, count in zip(self.layouts, counts) for _ in range(count)]
+
+    def apply(self, venv, current=None):
+        """
+        Pin a VecEnv's workers to a fresh assignment. Workers already on a
+        layout that keeps its share stay where they are (their warm engine is
+        already active). Returns the new per-worker layout list.
+        """
+        target = self.assign(venv.num_envs)
+        if current is None:
+            current = [None] * venv.num_envs
+        wanted = {}
+        for layout in target:
+            wanted[layout] = wanted.get(layout, 0) + 1
+
+        result = [None] * venv.num_envs
+        for i, layout in enumerate(current):
+            if wanted.get(layout, 0) > 0:
+                result[i] = layout
+                wanted[layout] -= 1
+        leftovers = [l for l, n in wanted.items() for _ in range(n)]
+        for i in range(venv.num_envs):
+            if result[i] is None:
+                result[i] = leftovers.pop()
+                venv.env_method('set_layout', result[i], indices=[i])
+        return result
+
+    def as_dict(self):
+        return dict(zip(self.layouts, self.weights.tolist()))
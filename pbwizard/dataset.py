@@ -0,0 +1,208 @@
+import os
+import json
+import logging
+
+import numpy as np
+
+from pbwizard import rewards
+
+
+logger = logging.getLogger(__name__)
+
+
+DATASET_FORMAT = 1
+INDEX_FILE = "index.json"
+DEFAULT_SHARD_SIZE = 65536
+# Upper bound on rows written since the last msync, per shard
+DEFAULT_FLUSH_EVERY = 4096
+
+# 'done' field flags
+DONE_TERMINATED = 1
+DONE_TRUNCATED = 2
+
+# Per-transition fields besides the observation: name -> (dtype, per-row shape)
+FIELDS = {
+    'action': (np.int8, ()),
+    'reward': (np.float32, ()),
+    'done': (np.uint8, ()),
+    # Event counts per physics event code over the step (see rewards.event_code)
+    'events': (np.uint16, (rewards.EVENT_CODE_COUNT,)),
+}
+
+
+def _shard_path(directory, shard, field):
+    return os.path.join(directory, f"shard_{shard:05d}_{field}.npy")
+
+
+class TransitionWriter:
+    """
+    Streams (obs, action, reward, done, event counts) into fixed-size shards
+    of memory-mapped .npy files, one file per field.
+
+    Each step is copied straight into the open shard's memmaps, so nothing
+    is kept per step on the Python side. Dirty pages are flushed every
+    `flush_every` rows and when a shard fills up; index.json lists the
+    finished shards and their lengths and is rewritten (atomically) after
+    every shard, so a crashed run leaves a readable dataset behind.
+    """
+
+    def __init__(self, directory, observation_space, shard_size=DEFAULT_SHARD_SIZE,
+                 flush_every=DEFAULT_FLUSH_EVERY):
+        self.directory = directory
+        self.obs_shape = tuple(observation_space.shape)
+        self.obs_dtype = np.dtype(observation_space.dtype)
+        self.shard_size = int(shard_size)
+        self.flush_every = max(1, int(flush_every))
+        os.makedirs(directory, exist_ok=True)
+
+        self.shards = []
+        self.total = 0
+        self._arrays = None
+        self._row = 0
+        self._unflushed = 0
+        self._event_scratch = np.zeros(rewards.EVENT_CODE_COUNT, dtype=np.intp)
+
+    def _open_shard(self):
+        shard = len(self.shards)
+        open_memmap = np.lib.format.open_memmap
+        self._arrays = {'obs': open_memmap(_shard_path(self.directory, shard, 'obs'), mode='w+',
+                                           dtype=self.obs_dtype, shape=(self.shard_size,) + self.obs_shape)}
+        for name, (dtype, shape) in FIELDS.items():
+            self._arrays[name] = open_memmap(_shard_path(self.directory, shard, name), mode='w+',
+                                             dtype=dtype, shape=(self.shard_size,) + shape)
+        self._row = 0
+
+    def _flush(self):
+        for arr in self._arrays.values():
+            arr.flush()
+        self._unflushed = 0
+
+    def _close_shard(self):
+        self._flush()
+        self.shards.append({'id': len(self.shards), 'length': self._row})
+        self._arrays = None
+        self._write_index()
+
+    def _write_index(self):
+        index = {
+            'format': DATASET_FORMAT,
+            'obs_shape': list(self.obs_shape),
+            'obs_dtype': self.obs_dtype.str,
+            'shard_size': self.shard_size,
+            'fields': ['obs'] + list(FIELDS),
+            'shards': self.shards,
+            'total': self.total
+        }
+        path = os.path.join(self.directory, INDEX_FILE)
+        tmp = path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp, path)
+
+    def add(self, obs, action, reward, terminated, truncated, events=None):
+        """Record one transition (obs is the observation the action was taken from)."""
+        if self._arrays is None:
+            self._open_shard()
+        row = self._row
+        arrays = self._arrays
+        arrays['obs'][row] = obs
+        arrays['action'][row] = action
+        arrays['reward'][row] = reward
+        arrays['done'][row] = (DONE_TERMINATED if terminated else 0) | (DONE_TRUNCATED if truncated else 0)
+        counts = arrays['events'][row]
+        if events:
+            scratch = self._event_scratch
+            scratch[:] = 0
+            for e in events:
+                scratch[rewards.event_code(e)] += 1
+            scratch[rewards.EVENT_NONE] = 0
+            np.minimum(scratch, np.iinfo(np.uint16).max, out=scratch)
+            counts[:] = scratch
+        else:
+            counts[:] = 0
+
+        self._row += 1
+        self.total += 1
+        self._unflushed += 1
+        if self._row >= self.shard_size:
+            self._close_shard()
+        elif self._unflushed >= self.flush_every:
+            self._flush()
+
+    def close(self):
+        """Flush and index the partially filled shard (if any)."""
+        if self._arrays is not None:
+            if self._row:
+                self._close_shard()
+            else:
+                self._arrays = None
+        elif not self.shards:
+            self._write_index()
+        logger.info(f"Transition dataset closed: {self.total} transitions in {len(self.shards)} shards ({self.directory})")
+
+
+def find_datasets(path):
+    """Every dataset directory (one with an index.json) at or below path."""
+    found = []
+    for root, _, files in os.walk(path):
+        if INDEX_FILE in files:
+            found.append(root)
+    return sorted(found)
+
+
+class TransitionDataset:
+    """
+    Read side of TransitionWriter. Accepts a dataset directory or a root
+    holding several (e.g. one per training env) and streams them back as
+    batches; shards are opened memory-mapped, one at a time.
+    """
+
+    def __init__(self, path):
+        self.datasets = []
+        for directory in find_datasets(path):
+            with open(os.path.join(directory, INDEX_FILE)) as f:
+                index = json.load(f)
+            if index.get('format') != DATASET_FORMAT:
+                raise ValueError(f"Unsupported dataset format in {directory}: {index.get('format')}")
+            self.datasets.append((directory, index))
+        if not self.datasets:
+            raise FileNotFoundError(f"No transition datasets found under {path}")
+
+        shapes = {tuple(index['obs_shape']) for _, index in self.datasets}
+        if len(shapes) > 1:
+            raise ValueError(f"Datasets under {path} have different observation shapes: {sorted(shapes)}")
+        self.obs_shape = shapes.pop()
+
+    def __len__(self):
+        return sum(shard['length'] for _, index in self.datasets for shard in index['shards'])
+
+    def shards(self):
+        """(directory, shard id, length) for every shard."""
+        return [(directory, shard['id'], shard['length'])
+                for directory, index in self.datasets for shard in index['shards']]
+
+    def load_shard(self, directory, shard, length, fields=None):
+        """Memory-mapped views of one shard's fields, trimmed to its length."""
+        fields = fields or ['obs'] + list(FIELDS)
+        return {name: np.load(_shard_path(directory, shard, name), mmap_mode='r')[:length] for name in fields}
+
+    def iter_batches(self, batch_size=256, fields=None, shuffle=False, seed=None):
+        """
+        Yield dicts of field -> array batches (in-memory copies). With
+        shuffle, shard order and rows within each shard are permuted; only
+        one shard is touched at a time.
+        """
+        rng = np.random.default_rng(seed)
+        shards = self.shards()
+        if shuffle:
+            shards = [shards[i] for i in rng.permutation(len(shards))]
+        for directory, shard, length in shards:
+            arrays = self.load_shard(directory, shard, length, fields)
+            order = rng.permutation(length) if shuffle else None
+            for start in range(0, length, batch_size):
+                if order is None:
+                    yield {name: np.array(arr[start:start + batch_size]) for name, arr in arrays.items()}
+                else:
+                    # Sorted indices keep the memmap reads mostly sequential
+                    idx = np.sort(order[start:start + batch_size])
+                    yield {name: arr[idx] for name, arr in arrays.items()}
@@ -0,0 +1,212 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from pbwizard.physics import PymunkEngine
+
+
+logger = logging.getLogger(__name__)
+
+
+# Rough per-object footprint used to keep the pool under its memory cap.
+# Measured on pymunk 6.x: a static Poly/Segment plus its BB tree node is a few
+# hundred bytes, dynamic bodies (flippers, plungers) carry more state.
+SHAPE_COST_BYTES = 512
+BODY_COST_BYTES = 1024
+ENGINE_BASE_COST_BYTES = 64 * 1024
+
+
+class EnginePool:
+    """
+    Background-built pool of ready-to-run physics engines keyed by layout id.
+
+    Building a PinballLayout + PymunkEngine happens on a worker thread so the
+    socket handler only has to pop a prebuilt engine. Each engine is handed out
+    once (it carries its own seed / game hash) and the slot is refilled in the
+    background. Entries are evicted least-recently-used first when either
+    max_engines or max_bytes is exceeded.
+
+    Training tables that switch layouts between episodes hand their outgoing
+    engine back with release() and take the next one with
+    acquire(refill=False). A released engine still holds the game it was
+    playing, so callers that start a game on the engine as is (load_layout)
+    ask for fresh=True. Layouts passed to keep_warm() are prepared up front
+    and evicted only after every other entry.
+    """
+
+    def __init__(self, width, height, layouts_dir='layouts', max_engines=6, max_bytes=8 * 1024 * 1024,
+                 simplify_tolerance=None):
+        self.width = width
+        self.height = height
+        self.simplify_tolerance = simplify_tolerance
+        self.layouts_dir = layouts_dir
+        self.max_engines = max_engines
+        self.max_bytes = max_bytes
+
+        # layout_id -> {'layout', 'engine', 'mtime', 'size'}
+        self._entries = OrderedDict()
+        self._pending = set()
+        self._keep_warm = set()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._running = True
+
+        self.hits = 0
+        self.misses = 0
+
+        self._thread = threading.Thread(target=self._build_loop, name='EnginePool', daemon=True)
+        self._thread.start()
+
+    def _layout_path(self, layout_id):
+        return os.path.join(self.layouts_dir, f"{layout_id}.json")
+
+    def _layout_mtime(self, layout_id):
+        try:
+            return os.path.getmtime(self._layout_path(layout_id))
+        except OSError:
+            return None
+
+    @staticmethod
+    def estimate_size(engine):
+        """Approximate memory held by an engine's pymunk space."""
+        space = engine.space
+        return (ENGINE_BASE_COST_BYTES
+                + len(space.shapes) * SHAPE_COST_BYTES
+                + len(space.bodies) * BODY_COST_BYTES)
+
+    @property
+    def total_bytes(self):
+        with self._lock:
+            return sum(e['size'] for e in self._entries.values())
+
+    def prefetch(self, layout_ids):
+        """Queue layouts for background construction (no-op if ready or pending)."""
+        for layout_id in layout_ids:
+            with self._lock:
+                if layout_id in self._entries or layout_id in self._pending:
+                    continue
+                self._pending.add(layout_id)
+            self._queue.put(layout_id)
+
+    def keep_warm(self, layout_ids):
+        """Prepare these layouts now and prefer evicting any other layout's engine."""
+        with self._lock:
+            self._keep_warm = set(layout_ids)
+        self.prefetch(layout_ids)
+
+    def acquire(self, layout_id, refill=True, fresh=False):
+        """
+        Pop a prebuilt (layout, engine) pair for layout_id.
+
+        Returns None on a miss, or if the layout file changed on disk since the
+        engine was built. With fresh=True a released (used) engine counts as a
+        miss and is dropped. Unless refill is False the slot is refilled in the
+        background either way.
+        """
+        with self._lock:
+            entry = self._entries.pop(layout_id, None)
+
+        if entry is not None and entry['mtime'] != self._layout_mtime(layout_id):
+            logger.info(f"EnginePool: discarding stale engine for '{layout_id}' (layout file changed)")
+            entry = None
+        elif entry is not None and fresh and entry.get('released'):
+            logger.debug(f"EnginePool: discarding used engine for '{layout_id}' (fresh engine requested)")
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            result = None
+        else:
+            self.hits += 1
+            result = (entry['layout'], entry['engine'])
+
+        if refill:
+            self.prefetch([layout_id])
+        return result
+
+    def release(self, layout_id, layout, engine):
+        """
+        Hand an engine that is no longer in use back to the pool (LRU-capped
+        like a built one). It keeps its game state; only acquire() without
+        fresh=True hands it out again.
+        """
+        self._store(layout_id, {
+            'layout': layout,
+            'engine': engine,
+            'mtime': self._layout_mtime(layout_id),
+            'size': self.estimate_size(engine),
+            'released': True
+        })
+
+    def build(self, layout_id):
+        """Build a (layout, engine) pair for layout_id right now, bypassing the pool. None if there is no such layout."""
+        entry = self._build(layout_id)
+        return None if entry is None else (entry['layout'], entry['engine'])
+
+    def invalidate(self, layout_id=None):
+        """Drop a prebuilt engine (or all of them) so it is rebuilt from disk."""
+        with self._lock:
+            if layout_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(layout_id, None)
+
+    def stop(self):
+        self._running = False
+        self._queue.put(None)
+
+    def _build(self, layout_id):
+        # Imported here to avoid a circular import (vision imports this module)
+        from pbwizard.vision import PinballLayout
+
+        filepath = self._layout_path(layout_id)
+        if not os.path.exists(filepath):
+            logger.warning(f"EnginePool: layout file not found: {filepath}")
+            return None
+
+        mtime = self._layout_mtime(layout_id)
+        layout = PinballLayout(filepath=filepath)
+        if 'name' in getattr(layout, 'config', {}):
+            layout.name = layout.config['name']
+
+        engine = PymunkEngine(layout, self.width, self.height, seed=str(time.time_ns()),
+                              simplify_tolerance=self.simplify_tolerance)
+        return {
+            'layout': layout,
+            'engine': engine,
+            'mtime': mtime,
+            'size': self.estimate_size(engine)
+        }
+
+    def _store(self, layout_id, entry):
+        with self._lock:
+            self._entries[layout_id] = entry
+            self._entries.move_to_end(layout_id)
+            # LRU eviction: oldest first (keep-warm layouts last), but never the entry we just stored
+            total = sum(e['size'] for e in self._entries.values())
+            while len(self._entries) > 1 and (len(self._entries) > self.max_engines or total > self.max_bytes):
+                candidates = [k for k in self._entries if k != layout_id]
+                evicted_id = next((k for k in candidates if k not in self._keep_warm), candidates[0])
+                evicted = self._entries.pop(evicted_id)
+                total -= evicted['size']
+                logger.debug(f"EnginePool: evicted '{evicted_id}' ({evicted['size']} bytes)")
+
+    def _build_loop(self):
+        while self._running:
+            layout_id = self._queue.get()
+            if layout_id is None:
+                break
+            try:
+                start = time.perf_counter()
+                entry = self._build(layout_id)
+                if entry is not None:
+                    self._store(layout_id, entry)
+                    logger.debug(f"EnginePool: prepared '{layout_id}' in {(time.perf_counter() - start) * 1000:.1f}ms")
+            except Exception as e:
+                logger.error(f"EnginePool: failed to build engine for '{layout_id}': {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(layout_id)
@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import logging
+import functools
+
+from pbwizard import vision, hardware
+from pbwizard.environment import PinballEnv
+from pbwizard.observation import DEFAULT_BALL_SLOTS
+from pbwizard.raster import DEFAULT_PIXEL_SHAPE
+from pbwizard.rewards import DEFAULT_REWARD_WINDOW
+from pbwizard.wrappers import RingFrameStack
+
+
+logger = logging.getLogger(__name__)
+
+
+# Top-level config keys that are really physics params (config.json is mostly flat)
+PHYSICS_OVERRIDE_KEYS = ['launch_angle', 'flipper_speed', 'auto_plunge_enabled', 'plunger_release_speed']
+
+
+class TrainingVisionWrapper:
+    """Minimal vision wrapper around a headless SimulatedFrameCapture."""
+
+    def __init__(self, capture):
+        self.capture = capture
+
+    def update(self):
+        # In headless training, we don't need to process frames with CV
+        # We just need to step the environment which steps the sim
+        pass
+
+    def get_stats(self):
+        return {}
+
+    def manual_step(self, dt=None):
+        if hasattr(self.capture, 'manual_step'):
+            self.capture.manual_step(dt)
+
+
+class MockScoreReader:
+    def read_score(self, frame): return 0
+
+
+def load_layout_config(layout_name, layouts_dir='layouts'):
+    """Read a layout JSON by name ("Default" maps to default.json). Returns None if missing."""
+    if not layout_name:
+        return None
+
+    # Check if it's a filename or "Default"
+    if layout_name.lower() == 'default':
+        layout_file = 'default.json'
+    else:
+        layout_file = f"{layout_name}.json"
+
+    layout_path = os.path.join(os.getcwd(), layouts_dir, layout_file)
+    if not os.path.exists(layout_path):
+        logger.warning(f"Layout file not found: {layout_path}")
+        return None
+
+    try:
+        with open(layout_path, 'r') as f:
+            layout_config = json.load(f)
+        logger.info(f"Training using layout: {layout_name}")
+        return layout_config
+    except Exception as e:
+        logger.error(f"Failed to load layout {layout_path}: {e}")
+        return None
+
+
+def training_physics_config(config):
+    """Physics overrides for training from a training config dict."""
+    physics_config = dict(config.get('physics') or {})
+
+    # Merge top-level config keys into physics_config for backward compatibility
+    for key in PHYSICS_OVERRIDE_KEYS:
+        if key in config:
+            physics_config[key] = config[key]
+    # Force auto-plunge for training to prevent negative reward loops
+    physics_config['auto_plunge_enabled'] = True
+    return physics_config
+
+
+def make_training_env(config=None, width=450, height=800, monitor=True):
+    """
+    Build one headless PinballEnv with its own SimulatedFrameCapture and MockController.
+
+    Returns (env, capture). The capture is returned so callers can stop it or
+    render from it; env is wrapped in Monitor unless monitor=False. A
+    'frame_stack' > 1 stacks that many observations with RingFrameStack;
+    'record_transitions' (a directory) records every transition with a
+    dataset.TransitionWriter.
+    """
+    config = config or {}
+    layout_config = load_layout_config(config.get('layout'))
+
+    cap = vision.SimulatedFrameCapture(layout_config=layout_config, width=width, height=height)
+    # Env drives the simulation via manual_step(); never start the capture thread
+    cap.headless = True
+    # Reuse the engine between episodes; replays only if asked for (written
+    # off-thread, and recording them turns the engine reuse off)
+    cap.fast_reset = config.get('fast_reset', True)
+    cap.set_replay_recording(config.get('record_replays', False))
+
+    if hasattr(cap, 'update_physics_params'):
+        cap.update_physics_params(training_physics_config(config))
+    # Multi-layout training: engines built for later layout switches get the same overrides
+    layout_id = config.get('layout') or 'default'
+    cap.current_layout_id = 'default' if layout_id.lower() == 'default' else layout_id
+    cap.warm_layout_params = training_physics_config(config)
+    if config.get('train_layouts'):
+        # Curriculum / random layouts: prepare every table in the background
+        cap.keep_layouts_warm(config['train_layouts'])
+    cap.start()
+
+    hw = hardware.MockController(vision_system=cap)
+    env = PinballEnv(TrainingVisionWrapper(cap), hw, MockScoreReader(), headless=True,
+                     random_layouts=config.get('random_layouts', False),
+                     frame_skip=config.get('frame_skip', 1),
+                     obs_mode=config.get('obs_mode', 'single'),
+                     ball_slots=config.get('ball_slots', DEFAULT_BALL_SLOTS),
+                     pixel_shape=tuple(config.get('pixel_shape', DEFAULT_PIXEL_SHAPE)),
+                     reward_window=config.get('reward_window', DEFAULT_REWARD_WINDOW),
+                     layout_pool=config.get('train_layouts'))
+    if config.get('record_transitions'):
+        env.recorder = _make_recorder(config, env.observation_space)
+
+    frame_stack = int(config.get('frame_stack', 1))
+    if frame_stack > 1:
+        env = RingFrameStack(env, k=frame_stack)
+
+    if monitor:
+        from stable_baselines3.common.monitor import Monitor
+        env = Monitor(env)
+    return env, cap
+
+
+def _make_recorder(config, observation_space):
+    """TransitionWriter under config['record_transitions'] (a root directory)."""
+    from pbwizard.dataset import TransitionWriter, DEFAULT_SHARD_SIZE
+    # One dataset per env (vec env workers are separate processes)
+    directory = os.path.join(config['record_transitions'], f"env_{os.getpid()}_{time.time_ns()}")
+    return TransitionWriter(directory, observation_space,
+                            shard_size=config.get('transition_shard_size', DEFAULT_SHARD_SIZE))
+
+
+def _build_env(config, width, height):
+    # Runs in the vec env worker process, before the table is built
+    if config.get('thread_budget'):
+        from pbwizard import threads
+        threads.apply(config['thread_budget'], pin=config.get('pin_cpus', False), name="env worker")
+    env, cap = make_training_env(config, width=width, height=height)
+    if config.get('live_view_name'):
+        from pbwizard.live_view import LiveViewPublisher, DEFAULT_PUBLISH_HZ
+        env = LiveViewPublisher(env, cap, config['live_view_name'],
+                                max_hz=config.get('live_view_hz', DEFAULT_PUBLISH_HZ))
+    return env
+
+
+def _env_config(config, index):
+    """
+    Config for worker `index`: an 'env_layouts' list pins each worker to its
+    own layout, an 'env_thread_budgets' list gives it its thread budget.
+    Only worker 0 publishes to the 'live_view_name' ring.
+    """
+    config = dict(config or {})
+    if index != 0:
+        config.pop('live_view_name', None)
+    env_layouts = config.get('env_layouts')
+    if env_layouts:
+        config['layout'] = env_layouts[index % len(env_layouts)]
+    budgets = config.pop('env_thread_budgets', None)
+    config['thread_budget'] = budgets[index % len(budgets)] if budgets else None
+    return config
+
+
+def make_env_fns(n_envs, config=None, width=450, height=800):
+    """Picklable env constructors for SharedMemoryVecEnv / SubprocVecEnv workers."""
+    return [functools.partial(_build_env, _env_config(config, i), width, height) for i in range(n_envs)]
+
+
+def make_training_vec_env(config=None, n_envs=1, width=450, height=800):
+    """
+    Build the (un-normalized) VecEnv used for training.
+
+    One env runs in-process (DummyVecEnv) and its capture is returned so
+    the caller can stop it / sync state from it; more than one env runs one
+    headless table per worker process (SharedMemoryVecEnv) and the capture
+    is None. Those workers publish to a live view themselves: worker 0 does
+    when config has a 'live_view_name'. Returns (venv, capture).
+    """
+    from stable_baselines3.common.vec_env import DummyVecEnv
+
+    if n_envs > 1:
+        from pbwizard.vec_env import SharedMemoryVecEnv
+        return SharedMemoryVecEnv(make_env_fns(n_envs, config, width=width, height=height)), None
+
+    # The caller syncs the in-process table's live view itself
+    config = dict(_env_config(config, 0), live_view_name=None)
+    env, cap = make_training_env(config, width=width, height=height)
+    return DummyVecEnv([lambda: env]), cap
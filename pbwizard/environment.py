@@ -1,16 +1,25 @@
+import os
 import logging
+import math
 import time
 import numpy as np
 
 import gymnasium as gym
 from gymnasium import spaces
 
-from pbwizard import constants
+from pbwizard import constants, rewards
+from pbwizard.backend import EnvBackend
+from pbwizard.observation import MultiballObservation, DEFAULT_BALL_SLOTS
+from pbwizard.pacing import ControlClock, DEFAULT_CONTROL_PERIOD
+from pbwizard.raster import TableRasterizer, DEFAULT_PIXEL_SHAPE
 
 
 logger = logging.getLogger(__name__)
 
 
+FLIP_ACTIONS = frozenset((constants.ACTION_FLIP_LEFT, constants.ACTION_FLIP_RIGHT, constants.ACTION_FLIP_BOTH))
+
+
 class PinballEnv(gym.Env):
 
     metadata = {'render_modes': ['human', 'rgb_array'], 'render_fps': 30}
@@ -22,16 +31,44 @@ class PinballEnv(gym.Env):
                  score_reader,
                  headless: bool = False,
                  random_layouts: bool = False,
-                 difficulty: str = 'medium'):
+                 difficulty: str = 'medium',
+                 frame_skip: int = 1,
+                 backend: EnvBackend = None,
+                 obs_mode: str = 'single',
+                 ball_slots: int = DEFAULT_BALL_SLOTS,
+                 pixel_shape: tuple = DEFAULT_PIXEL_SHAPE,
+                 reward_window: int = rewards.DEFAULT_REWARD_WINDOW,
+                 realtime_pacing: bool = False,
+                 control_period: float = DEFAULT_CONTROL_PERIOD,
+                 skip_stale_frames: bool = True,
+                 recorder=None,
+                 layout_pool=None):
 
         super(PinballEnv, self).__init__()
         
         self.vision = vision_system
         self.hw = hardware_controller
         self.score_reader = score_reader
+        # Resolve vision / capture / score reader into direct callables once
+        self.backend = backend or EnvBackend.from_vision(vision_system, score_reader)
         self.headless = headless
         self.random_layouts = random_layouts
-        self.difficulty = difficulty  # easy, medium, hard
+        # Layouts random_layouts picks from (default: every layout file)
+        self.layout_pool = list(layout_pool) if layout_pool else None
+        # Layout to switch to at the next reset (set_layout / curriculum)
+        self.pinned_layout = None
+        self._difficulty = difficulty  # easy, medium, hard
+        # Action repeat: physics frames advanced per agent decision
+        self.frame_skip = max(1, int(frame_skip))
+        # Real table: hold a fixed control period (minus processing time)
+        # instead of a flat sleep per step; optionally skip re-processing a
+        # camera frame that was already seen last step
+        self.clock = ControlClock(control_period) if realtime_pacing and not headless else None
+        self.skip_stale_frames = skip_stale_frames
+        self._last_frame_seq = None
+        # (height, width) of the last processed frame, for normalizing on stale steps
+        self._last_frame_size = None
+        self._last_velocity = (0.0, 0.0)
         
         # Action Space: 0: No-op, 1: Left Flip, 2: Right Flip, 3: Both Flip
         self.action_space = spaces.Discrete(4)
@@ -39,6 +76,20 @@ class PinballEnv(gym.Env):
         # Observation Space: [ball_x, ball_y, ball_vx, ball_vy, target_1, target_2, target_3, target_4]
         # We use a fixed size of 4 targets to handle layout randomization
         self.observation_space = spaces.Box(low=0, high=1, shape=(8,), dtype=np.float32)
+
+        # Multiball mode: K ball slots + table state, read straight from the physics engine
+        # Pixels mode: low-res grayscale (1, H, W) image rasterized from physics state (CNN policies)
+        self.obs_mode = obs_mode
+        self.multiball_obs = None
+        self.rasterizer = None
+        if obs_mode == 'multiball':
+            self.multiball_obs = MultiballObservation(ball_slots=ball_slots)
+            self.observation_space = self.multiball_obs.observation_space
+        elif obs_mode == 'pixels':
+            self.rasterizer = TableRasterizer(*pixel_shape)
+            self.observation_space = spaces.Box(low=0, high=255, shape=(1,) + tuple(pixel_shape), dtype=np.uint8)
+        elif obs_mode != 'single':
+            raise ValueError(f"Unknown obs_mode: {obs_mode}")
         
         self.last_score = 0
         self.current_score = 0
@@ -52,6 +103,15 @@ class PinballEnv(gym.Env):
         self.step_count = 0
         self.max_episode_steps = 5000  # Prevent infinite episodes
 
+        # Reward breakdown sums, reported in info only at episode end
+        # ('reward_episode') and every reward_window steps ('reward_window')
+        self.reward_stats = rewards.RewardAggregator(window=reward_window)
+
+        # Optional dataset.TransitionWriter; only the last observation is kept
+        # between steps, everything else goes straight into its shards
+        self.recorder = recorder
+        self._recorder_obs = None
+
         self.load_config()
 
     def load_config(self):
@@ -59,25 +119,53 @@ class PinballEnv(gym.Env):
         import os
 
         # Default rewards
-        self.rewards_config = {
-            "score_log_scale": 0.106,
-            "combo_increase_factor": 0.1,
-            "multiplier_increase_factor": 0.5,
-            "flipper_penalty": 0.00001,  # Updated from 0.0001 to match config.json
-            "bumper_hit": 0.5,
-            "drop_target_hit": 1.0,
-            "rail_hit": 0.5
-        }
+        self.rewards_config = dict(rewards.DEFAULT_REWARDS)
 
         try:
             if os.path.exists("config.json"):
                 with open("config.json", 'r') as f:
                     config_data = json.load(f)
-                    rewards = config_data.get('rewards', {})
-                    self.rewards_config.update(rewards)
+                    self.rewards_config.update(config_data.get('rewards', {}))
         except Exception as e:
             logger.error(f"Error loading config: {e}")
 
+        self.reward_pipeline = rewards.RewardPipeline(self.rewards_config, self._difficulty)
+
+    def set_layout(self, layout_id):
+        """Pin this env to a layout from the next reset on (called via VecEnv.env_method)."""
+        self.pinned_layout = layout_id
+
+    def current_layout(self):
+        capture = self.backend.capture
+        return getattr(capture, 'current_layout_id', None)
+
+    def _next_layout(self):
+        if not self.random_layouts:
+            return self.pinned_layout
+        pool = self.layout_pool
+        if pool is None:
+            layouts_dir = 'layouts'
+            pool = sorted(f[:-5] for f in os.listdir(layouts_dir) if f.endswith('.json')) if os.path.isdir(layouts_dir) else []
+            self.layout_pool = pool
+        return pool[self.np_random.integers(len(pool))] if pool else None
+
+    def update_rewards(self, new_rewards):
+        """Hot-update reward weights (called via VecEnv.env_method during training)."""
+        self.rewards_config.update(new_rewards or {})
+        self.reward_pipeline.compile(self.rewards_config, self._difficulty)
+        logger.info(f"Updated rewards config: {new_rewards}")
+
+    @property
+    def difficulty(self):
+        return self._difficulty
+
+    @difficulty.setter
+    def difficulty(self, value):
+        self._difficulty = value
+        # Difficulty presets are compiled into the reward pipeline
+        if hasattr(self, 'reward_pipeline'):
+            self.reward_pipeline.compile(self.rewards_config, value)
+
     def step(self, action: int):
         """
         Execute one time step within the environment.
@@ -92,40 +180,50 @@ class PinballEnv(gym.Env):
         self._execute_action(action)
 
         # 3. Wait for Latency/Physics
-        if not self.headless:
-            time.sleep(0.033) # ~30Hz control loop
-        else:
-            # In headless mode, manually step the physics simulation
-            if hasattr(self.vision, 'capture') and hasattr(self.vision.capture, 'manual_step'):
-                self.vision.capture.manual_step(dt=0.016, render=False)  # Step physics at ~60Hz (No render)
-            elif hasattr(self.vision, 'manual_step'):
-                self.vision.manual_step(dt=0.016)
+        # The action is held for frame_skip frames. Events and score accumulate
+        # in the sim, so the reward pipeline below runs once over all of them.
+        frames_run = 0
+        for _ in range(self.frame_skip):
+            self._advance_frame()
+            frames_run += 1
+            # Stop repeating as soon as the ball is out so termination is not delayed
+            if self.frame_skip > 1 and self._ball_out():
+                break
 
         # 4. Get New State (Observation)
+        backend = self.backend
         frame = None
+        stale = False
         if not self.headless:
-            frame = self._get_current_frame()
-            
+            if self.clock is not None and self.skip_stale_frames and backend.frame_seq is not None:
+                seq = backend.frame_seq()
+                stale = seq == self._last_frame_seq
+                self._last_frame_seq = seq
+            if stale:
+                self.clock.stale_frames += 1
+            else:
+                frame = self._get_current_frame()
+
         ball_pos = None
         vx, vy = 0.0, 0.0
         
         # Always process frame if available (for visualization wrappers)
-        if hasattr(self.vision, 'process_frame') and frame is not None:
+        if backend.process_frame is not None and frame is not None:
             # We ignore the result if we have better status from sim, but we need to call it
             # so the wrapper can update its internal display frame
-            vision_ball_pos, _ = self.vision.process_frame(frame)
+            vision_ball_pos, _ = backend.process_frame(frame)
             if ball_pos is None:
                 ball_pos = vision_ball_pos
 
         # Check if we can get direct status from sim (more accurate for multiball)
-        if hasattr(self.vision, 'get_ball_status'):
-             status = self.vision.get_ball_status()
-             if status:
-                 ball_pos, (vx, vy) = status
-        elif hasattr(self.vision, 'capture') and hasattr(self.vision.capture, 'get_ball_status'):
-             status = self.vision.capture.get_ball_status()
+        if backend.ball_status is not None:
+             status = backend.ball_status()
              if status:
                  ball_pos, (vx, vy) = status
+        elif stale:
+            # No new camera frame since last step: keep the last vision estimate
+            ball_pos = self.last_ball_pos
+            vx, vy = self._last_velocity
         else:
             # Vision fallback (already processed above)
             pass
@@ -140,137 +238,106 @@ class PinballEnv(gym.Env):
                 vy = (ball_pos[1] - self.last_ball_pos[1]) / dt
         
         self.last_ball_pos = ball_pos
+        self._last_velocity = (vx, vy)
         
         # Normalize observation
         # Use default dimensions if frame is not available (headless)
         if frame is not None:
-            height, width = frame.shape[:2]
-        elif hasattr(self.vision, 'capture') and hasattr(self.vision.capture, 'width'):
-            width = self.vision.capture.width
-            height = self.vision.capture.height
+            height, width = self._last_frame_size = frame.shape[:2]
+        elif stale and self._last_frame_size is not None:
+            # The reused position is in the last frame's pixels
+            height, width = self._last_frame_size
+        elif backend.dimensions is not None:
+            width, height = backend.dimensions()
         else:
             height, width = constants.DEFAULT_HEIGHT, constants.DEFAULT_WIDTH
-        obs = self._create_observation(ball_pos, vx, vy, width, height)
+        if self.rasterizer is not None and backend.physics_engine is not None:
+            obs = np.empty(self.observation_space.shape, dtype=np.uint8)
+            self.rasterizer.render(backend.physics_engine(), out=obs[0])
+        elif self.multiball_obs is not None and backend.physics_engine is not None:
+            drop_targets = backend.drop_targets() if backend.drop_targets is not None else None
+            # Copy out: the builder's buffer is reused next step
+            obs = self.multiball_obs.build(backend.physics_engine(), width, height, drop_targets).copy()
+        else:
+            obs = self._create_observation(ball_pos, vx, vy, width, height)
             
         # 5. Calculate Reward
         self._update_score(frame)
         score_diff = self.current_score - self.last_score
         self.last_score = self.current_score
         
-        # Get difficulty parameters
-        difficulty_params = self._get_difficulty_params()
+        pipeline = self.reward_pipeline
+        b = pipeline.begin()
         
         # Reward Shaping
         # Log scaling to handle exponential score explosion (e.g. 100 -> 4.6, 1M -> 13.8)
         # We scale by 0.1 to keep rewards in a manageable range (~0-1.5 mostly)
         # Clip negative diffs to 0 to ignore read errors/resets
-        clipped_diff = max(0, score_diff)
-        score_reward = np.log1p(clipped_diff) * self.rewards_config['score_log_scale']
-        reward = score_reward
-        reward += difficulty_params['survival_reward'] # Survival reward (scaled by difficulty)
-        reward_components = {
-            'score': score_reward,
-            'survival': difficulty_params['survival_reward'],
-            'combo': 0.0,
-            'multiplier': 0.0,
-            'events': 0.0,
-            'height': 0.0,
-            'flipper_penalty': 0.0,
-            'holding_penalty': 0.0,
-            'ball_lost': 0.0
-        }
+        if score_diff > 0:
+            b[rewards.SCORE] = math.log1p(score_diff) * pipeline.score_log_scale
+        # Per-frame terms are summed over the repeated frames
+        b[rewards.SURVIVAL] = pipeline.survival_reward * frames_run # Survival reward (scaled by difficulty)
 
         # Combo Bonus Reward - encourage maintaining combos
         # CHANGE: Only award bonus on INCREASE to prevent per-frame explosion
-        if hasattr(self.vision, 'capture') and hasattr(self.vision.capture, 'physics_engine'):
-            combo_status = self.vision.capture.physics_engine.get_combo_status()
-            multiplier = self.vision.capture.physics_engine.get_multiplier()
+        if backend.physics_engine is not None:
+            physics_engine = backend.physics_engine()
+            combo_status = physics_engine.get_combo_status()
+            multiplier = physics_engine.get_multiplier()
             
             current_combo = combo_status['combo_count']
             
             # Award bonus only when combo count INCREASES
             if combo_status['combo_active'] and current_combo > self.last_combo_count and current_combo > 1:
                 # One-time bonus for hitting a new combo tier
-                combo_increase_bonus = self.rewards_config['combo_increase_factor'] * current_combo
-                reward += combo_increase_bonus
-                reward_components['combo'] += combo_increase_bonus
-                logger.debug(f"Combo increase bonus: +{combo_increase_bonus:.2f} ({self.last_combo_count} -> {current_combo})")
+                b[rewards.COMBO] = pipeline.combo_increase_factor * current_combo
             
             self.last_combo_count = current_combo if combo_status['combo_active'] else 0
 
             # Extra reward for multiplier INCREASE
             if multiplier > self.last_multiplier:
-                multiplier_increase_bonus = (multiplier - self.last_multiplier) * self.rewards_config['multiplier_increase_factor']
-                reward += multiplier_increase_bonus
-                reward_components['multiplier'] += multiplier_increase_bonus
-                logger.debug(f"Multiplier increase bonus: +{multiplier_increase_bonus:.2f} ({self.last_multiplier:.1f}x -> {multiplier:.1f}x)")
+                b[rewards.MULTIPLIER] = (multiplier - self.last_multiplier) * pipeline.multiplier_increase_factor
             
             self.last_multiplier = multiplier
 
         # Flipper Penalty (Discourage spamming)
         # 0: No-op, 1: Left, 2: Right, 3: Both
-        if action in [constants.ACTION_FLIP_LEFT, constants.ACTION_FLIP_RIGHT, constants.ACTION_FLIP_BOTH]:
-             penalty = self.rewards_config['flipper_penalty']
-             reward -= penalty
-             reward_components['flipper_penalty'] -= penalty
-             # logger.debug("Penalty: Flipper Usage (-0.0001)")
+        if action in FLIP_ACTIONS:
+             b[rewards.FLIPPER_PENALTY] = -pipeline.flipper_penalty
 
         # Event-based Reward (Explicit feedback for hitting targets)
-        events = []
-        if hasattr(self.vision, 'get_events'):
-            events = self.vision.get_events()
-        elif hasattr(self.vision, 'capture') and hasattr(self.vision.capture, 'get_events'):
-            events = self.vision.capture.get_events()
-            
-        for event in events:
-            if event['type'] == 'collision':
-                # Base rewards for hitting features (independent of score/combo)
-                if 'bumper' in event['label']:
-                    reward += self.rewards_config['bumper_hit'] # Significant reward for action (was 0.01)
-                    reward_components['events'] += self.rewards_config['bumper_hit']
-                    logger.debug("Reward: Bumper Hit (+0.5)")
-                elif 'drop_target' in event['label']:
-                    reward += self.rewards_config['drop_target_hit'] # Significant reward for targets (was 0.05)
-                    reward_components['events'] += self.rewards_config['drop_target_hit']
-                    logger.debug("Reward: Drop Target Hit (+1.0)")
-                elif 'rail' in event['label']:
-                    reward += self.rewards_config['rail_hit'] # Encouragement for loop shots (was 0.01)
-                    reward_components['events'] += self.rewards_config['rail_hit']
-                    logger.debug("Reward: Rail Hit (+0.5)")
-
-        # Debug logging for start of episode
+        # Bumper / drop target / rail hits, weighted by integer event code
+        events = backend.events() if backend.events is not None else []
+        b[rewards.EVENTS] = pipeline.event_reward(events)
+
         # Debug logging for start of episode (only first step)
         if self.steps_without_ball == 0 and self.last_ball_pos is None and ball_pos is not None:
              logger.info(f"Ball Detected at {ball_pos}")
         
         # Height Reward: Encourage keeping ball up (y is 0 at top, 1 at bottom)
         if ball_pos is not None:
-             height_term = (1.0 - (ball_pos[1] / height)) * 0.005
-             reward += height_term
-             reward_components['height'] += height_term
+             b[rewards.HEIGHT] = (1.0 - (ball_pos[1] / height)) * 0.005 * frames_run
 
              # Flipper Hit Reward: Detect if we imparted upward velocity
              # If we are in lower area (y > 0.8) and have strong upward velocity (vy < -50)
              if ball_pos[1] / height > 0.8 and vy < -100: # Moving UP fast
-                 reward += 0.01 # Reduced from 0.02
-                 logger.debug("Reward: Strong Upward Shot (+0.01)")
+                 b[rewards.SHOT] = 0.01 # Reduced from 0.02
              
              # Holding Penalty (scaled by difficulty)
              # Calculate velocity magnitude
-             velocity_mag = np.sqrt(vx**2 + vy**2)
+             velocity_mag = math.sqrt(vx * vx + vy * vy)
              if velocity_mag < 20.0: # Threshold for "holding" (pixels/sec approx)
                  # Ignore if in plunger lane (Right 20% of screen)
                  if ball_pos[0] < width * 0.8:
-                    self.holding_steps += 1
+                    self.holding_steps += frames_run
                  else:
                     self.holding_steps = 0
              else:
                  self.holding_steps = 0
                  
-             holding_threshold = difficulty_params['holding_threshold']
+             holding_threshold = pipeline.holding_threshold
              if self.holding_steps > holding_threshold: # Threshold varies by difficulty
-                 reward -= difficulty_params['holding_penalty'] # Penalty scaled by difficulty
-                 reward_components['holding_penalty'] -= difficulty_params['holding_penalty']
+                 b[rewards.HOLDING_PENALTY] = -pipeline.holding_penalty # Penalty scaled by difficulty
 
                  # STUCK BALL HEURISTIC: Force Nudge if stuck for too long
                  if self.holding_steps > holding_threshold + 20:
@@ -283,7 +350,6 @@ class PinballEnv(gym.Env):
 
         terminated = False
         truncated = False
-        info = {}
 
         # DEBUG: Trace termination cause
         if self.steps_without_ball > 0 or ball_pos is None or (ball_pos and ball_pos[1] > height * 0.9):
@@ -292,7 +358,7 @@ class PinballEnv(gym.Env):
 
         # Episode termination conditions
         if ball_pos is None:
-            self.steps_without_ball += 1
+            self.steps_without_ball += frames_run
             logger.info("Ball not detected! Incrementing steps_without_ball.")
 
             if self.steps_without_ball >= self.max_steps_without_ball:
@@ -310,42 +376,81 @@ class PinballEnv(gym.Env):
              terminated = True
              logger.warning("Ball failed to spawn/detect after 20 steps.")
 
-        ball_lost = False
-        if hasattr(self.vision, 'ball_lost'):
-            ball_lost = self.vision.ball_lost
-        elif hasattr(self.vision, 'capture') and hasattr(self.vision.capture, 'ball_lost'):
-            ball_lost = self.vision.capture.ball_lost
-        
-        # Override ball_lost during grace period AND if ball is high up (likely spawning)
-        is_spawning = False
-        if ball_pos is not None and ball_pos[1] < 0.2: # Top 20%
-             is_spawning = True
-             
-        if ball_pos is not None and ball_pos[1] > height * 0.98:
-             logger.debug(f"Ball Lost Check: y={ball_pos[1]} > {height * 0.98} (Limit)")
-             ball_lost = True
-
-        if ball_lost and not is_spawning:
-            if ball_lost:
-                reward -= 1.0 # Reduced penalty (was -5.0) to allow positive runs
-                reward_components['ball_lost'] -= 1.0
-                logger.warning(f"TERMINATION: ball_lost flag was True. Spawning={is_spawning}. Pos={ball_pos}. Reward Penalty: -1.0")
+        if self._ball_lost(ball_pos, height):
+            b[rewards.BALL_LOST] = -1.0 # Reduced penalty (was -5.0) to allow positive runs
+            logger.warning(f"TERMINATION: ball_lost flag was True. Pos={ball_pos}. Reward Penalty: -1.0")
             terminated = True
         
         if self.steps_without_ball > self.max_steps_without_ball:
             truncated = True
         
-        # Increment step counter and check max episode length
-        self.step_count += 1
+        # Increment step counter and check max episode length (counted in frames)
+        self.step_count += frames_run
         if self.step_count >= self.max_episode_steps:
             truncated = True
             logger.info(f"Episode truncated: reached max steps ({self.max_episode_steps})")
 
+        # Single reduction over the breakdown buffer
+        reward = pipeline.total()
+        stats = self.reward_stats
+        stats.add(b)
+        info = {}
+        if terminated or truncated:
+            info['reward_episode'] = stats.pop_episode()
+        if stats.window_full():
+            info['reward_window'] = stats.pop_window()
 
-        info = {'reward_breakdown': reward_components}
+        if self.recorder is not None:
+            if self._recorder_obs is not None:
+                self.recorder.add(self._recorder_obs, action, reward, terminated, truncated, events)
+            self._recorder_obs = obs
 
         return obs, reward, terminated, truncated, info
 
+    def _advance_frame(self):
+        """Advance the table by one physics frame (or wait one control tick on hardware)."""
+        if not self.headless:
+            if self.clock is not None:
+                self.clock.wait() # Sleep out the rest of the control period
+            else:
+                time.sleep(0.033) # ~30Hz control loop
+        elif self.backend.step is not None:
+            # In headless mode, manually step the physics simulation
+            self.backend.step(0.016)  # Step physics at ~60Hz (No render)
+
+    def _ball_lost(self, ball_pos, height):
+        """The step's ball-lost termination: the backend's flag or the ball past the drain line."""
+        backend = self.backend
+        ball_lost = backend.ball_lost() if backend.ball_lost is not None else False
+
+        # Override ball_lost during grace period AND if ball is high up (likely spawning)
+        is_spawning = False
+        if ball_pos is not None and ball_pos[1] < 0.2: # Top 20%
+             is_spawning = True
+
+        if ball_pos is not None and ball_pos[1] > height * 0.98:
+             logger.debug(f"Ball Lost Check: y={ball_pos[1]} > {height * 0.98} (Limit)")
+             ball_lost = True
+
+        return ball_lost and not is_spawning
+
+    def _ball_out(self):
+        """
+        Per-frame check used to cut an action repeat short: the step's
+        ball-lost termination, no ball on the table, or game over.
+        """
+        backend = self.backend
+        if backend.game_over is not None and backend.game_over():
+            return True
+        ball_pos = None
+        if backend.ball_status is not None:
+            status = backend.ball_status()
+            if not status:
+                return True
+            ball_pos = status[0]
+        height = backend.dimensions()[1] if backend.dimensions is not None else constants.DEFAULT_HEIGHT
+        return self._ball_lost(ball_pos, height)
+
     def reset(self, *, seed=None, options=None):
         super().reset(seed=seed)
         
@@ -361,42 +466,34 @@ class PinballEnv(gym.Env):
         self.last_combo_count = 0
         self.last_multiplier = 1.0
         self.step_count = 0  # Reset episode step counter
+        self.reward_stats.reset_episode()
         
+        # Switch tables between episodes (pinned or random layout). Engines of
+        # layouts used before stay warm in the capture, so this is usually a swap
+        capture = self.backend.capture
+        next_layout = self._next_layout()
+        if next_layout is not None and capture is not None and hasattr(capture, 'switch_layout'):
+            capture.switch_layout(next_layout)
+
         # Call reset_game on vision system to reset physics engine
-        if hasattr(self.vision, 'capture') and hasattr(self.vision.capture, 'reset_game_state'):
-            self.vision.capture.reset_game_state()
-            logger.debug("Reset game state via vision.capture.reset_game_state()")
-        elif hasattr(self.vision, 'reset_game_state'):
-             self.vision.reset_game_state()
-        elif hasattr(self.vision, 'capture') and hasattr(self.vision.capture, 'physics_engine'):
-            # Manually reset physics engine if reset_game_state doesn't exist
-            if hasattr(self.vision.capture.physics_engine, 'balls'):
-                self.vision.capture.physics_engine.balls = [] # Force clear
-                # self.vision.capture.physics_engine.reset() # Prefer full reset if available
-                logger.info("Cleared balls from physics engine (manual)")
+        ball_placed = False
+        if self.backend.reset is not None:
+            # Fast resets put the first ball on the table directly.
+            # An explicit seed also seeds the physics game (fixed-seed evaluation)
+            result = self.backend.reset(seed=seed) if seed is not None else self.backend.reset()
+            ball_placed = result is True
+            logger.debug("Reset game state via backend")
         
         if not self.headless:
              time.sleep(0.1) # Wait for reset to propogate
-        else:
+        elif self.backend.step is not None and not ball_placed:
              # In headless mode, we must ensure the "add_ball" callback (queued in reset) 
              # is actually processed before we look for the ball.
              # This requires stepping the physics engine at least once.
-             if hasattr(self.vision, 'manual_step'):
-                 self.vision.manual_step(0.016)
-                 self.vision.manual_step(0.016) # Do two steps to be safe (add + settle)
-                 logger.debug("Forced manual_step in reset (headless)")
-             elif hasattr(self.vision, 'capture') and hasattr(self.vision.capture, 'manual_step'):
-                 self.vision.capture.manual_step(0.016)
-                 self.vision.capture.manual_step(0.016)
-                 logger.debug("Forced capture.manual_step in reset (headless)")
+             self.backend.step(0.016)
+             self.backend.step(0.016) # Do two steps to be safe (add + settle)
+             logger.debug("Forced manual_step in reset (headless)")
         
-        # Random layouts if enabled
-        if self.random_layouts and hasattr(self.vision, 'capture') and hasattr(self.vision.capture, 'layout'):
-            if hasattr(self.vision.capture.layout, 'randomize'):
-                self.vision.capture.layout.randomize()
-                self.vision.capture.load_layout(self.vision.capture.layout.to_dict())
-                logger.info("Randomized layout for new episode")
-
         # Add a ball to start the episode
         # REMOVED: physics.reset() now handles initial ball spawning
         # if hasattr(self.vision, 'capture') and hasattr(self.vision.capture, 'add_ball'):
@@ -406,16 +503,33 @@ class PinballEnv(gym.Env):
         #     self.vision.add_ball()
         #     logger.debug("Ball added during environment reset")
 
+        if self.clock is not None:
+            # The reset pause is not a missed deadline; start a new schedule
+            self.clock.restart()
+            self._last_frame_seq = None
+        self._last_velocity = (0.0, 0.0)
+
         # Initial observation
-        observation = np.zeros(self.observation_space.shape, dtype=np.float32)
+        observation = np.zeros(self.observation_space.shape, dtype=self.observation_space.dtype)
+        self._recorder_obs = observation
         info = {}
         return observation, info
 
     def render(self):
+        # Only the pixel observation mode has an image to show (gray -> RGB)
+        if self.rasterizer is not None and self.backend.physics_engine is not None:
+            gray = self.rasterizer.render(self.backend.physics_engine())
+            return np.repeat(gray[:, :, None], 3, axis=2)
         return None
 
+    def pacing_stats(self):
+        """Control loop timing (ticks, deadline misses, stale frames), or None without realtime pacing."""
+        return self.clock.stats() if self.clock is not None else None
+
     def close(self):
-        pass
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
 
     def _execute_action(self, action: int):
         # Map discrete actions to hardware controller methods
@@ -429,24 +543,18 @@ class PinballEnv(gym.Env):
             self.hw.hold_left()
             self.hw.hold_right()
         elif action == constants.ACTION_NUDGE_LEFT:
-            if hasattr(self.vision, 'nudge_left'):
-                self.vision.nudge_left()
-            elif hasattr(self.vision, 'capture') and hasattr(self.vision.capture, 'nudge_left'):
-                self.vision.capture.nudge_left()
+            if self.backend.nudge_left is not None:
+                self.backend.nudge_left()
         elif action == constants.ACTION_NUDGE_RIGHT:
-            if hasattr(self.vision, 'nudge_right'):
-                self.vision.nudge_right()
-            elif hasattr(self.vision, 'capture') and hasattr(self.vision.capture, 'nudge_right'):
-                self.vision.capture.nudge_right()
+            if self.backend.nudge_right is not None:
+                self.backend.nudge_right()
         else:
             self.hw.release_left()
             self.hw.release_right()
 
     def _get_current_frame(self):
-        if hasattr(self.vision, 'get_frame'):
-            return self.vision.get_frame()
-        if hasattr(self.vision, 'capture') and hasattr(self.vision.capture, 'get_frame'):
-            return self.vision.capture.get_frame()
+        if self.backend.frame is not None:
+            return self.backend.frame()
         return None
 
     def _create_observation(self, ball_pos, vx, vy, width, height):
@@ -458,46 +566,19 @@ class PinballEnv(gym.Env):
         obs[3] = np.clip(vy / height, -1.0, 1.0)
         
         # Add Drop Targets
-        target_states = []
-        if hasattr(self.vision, 'drop_target_states'):
-             target_states = self.vision.drop_target_states
-        elif hasattr(self.vision, 'capture') and hasattr(self.vision.capture, 'drop_target_states'):
-             target_states = self.vision.capture.drop_target_states
-             
+        target_states = self.backend.drop_targets() if self.backend.drop_targets is not None else []
+
         for i in range(4):
             if i < len(target_states):
                 obs[4 + i] = 1.0 if target_states[i] else 0.0
         return obs
 
     def _update_score(self, frame):
-        # Prefer vision capture score if available
-        if hasattr(self.vision, 'get_score'):
-            self.current_score = self.vision.get_score()
-        elif hasattr(self.vision, 'capture') and hasattr(self.vision.capture, 'get_score'):
-            self.current_score = self.vision.capture.get_score()
-        elif hasattr(self.score_reader, 'read_score') and frame is not None:
-            self.current_score = self.score_reader.read_score(frame)
-
-    def _get_difficulty_params(self):
-        # Tuned difficulty parameters
-        presets = {
-            'easy': {
-                'survival_reward': 0.0001,  # Reduced from 0.01
-                'holding_threshold': 120,  # 4 seconds - more lenient
-                'holding_penalty': 0.001  # Lower penalty
-            },
-            'medium': {
-                'survival_reward': 0.005,  # Increased from 0.001 to value life more
-                'holding_threshold': 90,  # 3 seconds
-                'holding_penalty': 0.002
-            },
-            'hard': {
-                'survival_reward': 0.0005,  # Moderate survival pressure
-                'holding_threshold': 60,  # 2 seconds - aggressive
-                'holding_penalty': 0.008
-            }
-        }
-        return presets.get(self.difficulty, presets['medium'])
+        # Prefer vision capture score if available, else OCR the frame
+        if self.backend.score is not None:
+            score = self.backend.score(frame)
+            if score is not None:
+                self.current_score = score
 
     def get_game_state(self):
         return {
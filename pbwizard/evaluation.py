@@ -0,0 +1,173 @@
+import queue
+import logging
+import multiprocessing as mp
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_EVAL_EPISODES = 5
+DEFAULT_EVAL_INTERVAL = 50000
+
+
+def policy_snapshot(model, timesteps=None):
+    """CPU copy of the policy weights plus observation normalization, cheap enough for the training thread."""
+    from pbwizard.checkpoint import _cpu_state_dict
+
+    return {
+        'timesteps': model.num_timesteps if timesteps is None else timesteps,
+        'policy': _cpu_state_dict(model.policy.state_dict()),
+        'obs_rms': normalization_stats(model.get_env())
+    }
+
+
+def normalization_stats(venv):
+    """(mean, var, clip_obs, epsilon) copied from a VecEnv's VecNormalize, or None."""
+    from pbwizard.checkpoint import _find_vec_normalize
+
+    norm = _find_vec_normalize(venv)
+    if norm is None or not norm.norm_obs:
+        return None
+    return (norm.obs_rms.mean.copy(), norm.obs_rms.var.copy(), norm.clip_obs, norm.epsilon)
+
+
+def play_episodes(model, env, seeds, obs_rms=None, max_steps=None):
+    """
+    Play one deterministic episode per seed. Returns per-episode dicts with
+    score, total reward, length (env steps) and whether the episode ended in
+    a drain.
+    """
+    from pbwizard.agent import normalize_obs
+
+    results = []
+    for seed in seeds:
+        obs, _ = env.reset(seed=int(seed))
+        steps = 0
+        total_reward = 0.0
+        terminated = truncated = False
+        while not (terminated or truncated):
+            if obs_rms is not None:
+                obs = normalize_obs(obs, *obs_rms)
+            action, _ = model.predict(obs, deterministic=True)
+            obs, reward, terminated, truncated, _ = env.step(int(action))
+            total_reward += reward
+            steps += 1
+            if max_steps and steps >= max_steps:
+                truncated = True
+        results.append({'seed': int(seed), 'score': env.unwrapped.current_score, 'reward': total_reward,
+                        'length': steps, 'drained': bool(terminated)})
+    return results
+
+
+def summarize(episodes):
+    scores = [e['score'] for e in episodes]
+    return {
+        'mean_score': float(np.mean(scores)) if scores else 0.0,
+        'max_score': float(np.max(scores)) if scores else 0.0,
+        'mean_reward': float(np.mean([e.get('reward', 0.0) for e in episodes])) if episodes else 0.0,
+        'drain_rate': float(np.mean([e['drained'] for e in episodes])) if episodes else 0.0,
+        'mean_length': float(np.mean([e['length'] for e in episodes])) if episodes else 0.0,
+        'episodes': len(episodes)
+    }
+
+
+def _eval_worker(config, requests, results):
+    """Evaluation process: rebuilds the policy once, then scores each snapshot it is sent."""
+    import torch
+    from stable_baselines3 import PPO
+    from pbwizard import agent, env_factory, threads
+
+    # Never compete with the trainer for cores
+    threads.apply(config.get('eval_thread_budget') or {'threads': 1}, pin=config.get('pin_cpus', False),
+                  name="evaluator")
+
+    layouts = config.get('eval_layouts') or [config.get('layout') or 'default']
+    seeds = config.get('eval_seeds') or list(range(config.get('eval_episodes', DEFAULT_EVAL_EPISODES)))
+    max_steps = config.get('eval_max_steps')
+    env_config = dict(config, record_replays=False, record_transitions=None)
+
+    envs, caps = {}, []
+    model = None
+    try:
+        for layout in layouts:
+            env, cap = env_factory.make_training_env(dict(env_config, layout=layout), monitor=False)
+            envs[layout] = env
+            caps.append(cap)
+        first = envs[layouts[0]]
+        model = PPO(agent.policy_for(config), first, device='cpu', verbose=0)
+
+        while True:
+            snap = requests.get()
+            if snap is None:
+                break
+            try:
+                model.policy.load_state_dict(snap['policy'])
+                per_layout = {}
+                episodes = []
+                for layout, env in envs.items():
+                    layout_episodes = play_episodes(model, env, seeds, snap['obs_rms'], max_steps)
+                    per_layout[layout] = summarize(layout_episodes)
+                    episodes.extend(layout_episodes)
+                report = summarize(episodes)
+                report['timesteps'] = snap['timesteps']
+                report['layouts'] = per_layout
+                results.put(report)
+            except Exception as e:
+                logger.error(f"Evaluation failed: {e}")
+                results.put({'timesteps': snap.get('timesteps'), 'error': str(e)})
+    finally:
+        for cap in caps:
+            cap.stop()
+
+
+class PolicyEvaluator:
+    """
+    Scores policy snapshots in a separate process on fixed-seed games.
+
+    submit() hands over a snapshot without waiting (the queue's feeder thread
+    pickles it); while an evaluation is still running new submissions are
+    skipped rather than queued, so results never lag behind training.
+    poll() returns finished reports without blocking.
+    """
+
+    def __init__(self, config, start_method=None):
+        if start_method is None:
+            start_method = 'forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn'
+        ctx = mp.get_context(start_method)
+        self.requests = ctx.Queue()
+        self.results = ctx.Queue()
+        self.busy = False
+        self.process = ctx.Process(target=_eval_worker, args=(dict(config), self.requests, self.results),
+                                   daemon=True, name="policy-eval")
+        self.process.start()
+        logger.info(f"Policy evaluator started (pid {self.process.pid})")
+
+    def submit(self, snapshot):
+        """Queue a snapshot for evaluation. Returns False if the previous one is still running."""
+        if self.busy:
+            return False
+        self.busy = True
+        self.requests.put(snapshot)
+        return True
+
+    def poll(self):
+        """Finished reports since the last poll (possibly empty)."""
+        reports = []
+        while True:
+            try:
+                reports.append(self.results.get_nowait())
+            except queue.Empty:
+                break
+        if reports:
+            self.busy = False
+        return reports
+
+    def close(self, timeout=5.0):
+        try:
+            self.requests.put(None)
+            self.process.join(timeout)
+        finally:
+            if self.process.is_alive():
+                self.process.terminate()
@@ -0,0 +1,148 @@
+import logging
+import math
+
+
+logger = logging.getLogger(__name__)
+
+
+# Endpoints closer than this (pixels) are treated as the same point
+POINT_EPSILON = 1e-3
+
+
+def _point_segment_distance(p, a, b):
+    """Distance from point p to segment a-b."""
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return math.hypot(p[0] - a[0], p[1] - a[1])
+    t = ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / length_sq
+    t = max(0.0, min(1.0, t))
+    return math.hypot(p[0] - (a[0] + t * dx), p[1] - (a[1] + t * dy))
+
+
+def _same_point(a, b, eps=POINT_EPSILON):
+    return abs(a[0] - b[0]) <= eps and abs(a[1] - b[1]) <= eps
+
+
+def drop_degenerate_points(points, eps=POINT_EPSILON):
+    """Remove consecutive duplicate points (zero-length segments)."""
+    result = []
+    for p in points:
+        if result and _same_point(result[-1], p, eps):
+            continue
+        result.append(p)
+    return result
+
+
+def simplify_polyline(points, tolerance):
+    """
+    Douglas-Peucker simplification of a polyline.
+
+    Returns (simplified_points, max_error) where max_error is the largest
+    distance of any dropped point from the simplified polyline. It is always
+    <= tolerance.
+    """
+    if len(points) < 3:
+        return list(points), 0.0
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    max_error = 0.0
+
+    # Iterative to avoid recursion limits on long rails
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        best_dist = -1.0
+        best_idx = None
+        for i in range(start + 1, end):
+            d = _point_segment_distance(points[i], points[start], points[end])
+            if d > best_dist:
+                best_dist = d
+                best_idx = i
+
+        if best_idx is None:
+            continue
+        if best_dist > tolerance:
+            keep[best_idx] = True
+            stack.append((start, best_idx))
+            stack.append((best_idx, end))
+        else:
+            max_error = max(max_error, best_dist)
+
+    return [p for p, k in zip(points, keep) if k], max_error
+
+
+def join_touching_polylines(polylines, eps=POINT_EPSILON):
+    """Chain polylines whose endpoints touch into longer polylines."""
+    chains = [list(p) for p in polylines if len(p) >= 2]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(chains)):
+            for j in range(len(chains)):
+                if i == j:
+                    continue
+                a, b = chains[i], chains[j]
+                if _same_point(a[-1], b[0], eps):
+                    joined = a + b[1:]
+                elif _same_point(a[-1], b[-1], eps):
+                    joined = a + b[-2::-1]
+                else:
+                    continue
+                # Rebuild list without i, j
+                chains = [c for k, c in enumerate(chains) if k not in (i, j)] + [joined]
+                merged = True
+                break
+            if merged:
+                break
+    return chains
+
+
+def simplify_rails(polylines, tolerance):
+    """
+    Simplify rail polylines (world coordinates) before they become static shapes.
+
+    - drops zero-length segments
+    - joins rails whose endpoints touch
+    - merges collinear / nearly collinear segments (Douglas-Peucker, bounded by tolerance)
+    - removes duplicate segments (same endpoints in either direction)
+
+    Returns (segments, report) where segments is a list of (p1, p2) tuples.
+    """
+    segments_before = sum(max(len(p) - 1, 0) for p in polylines)
+
+    cleaned = []
+    degenerate = 0
+    for points in polylines:
+        deduped = drop_degenerate_points(points)
+        degenerate += max(len(points) - 1, 0) - max(len(deduped) - 1, 0)
+        if len(deduped) >= 2:
+            cleaned.append(deduped)
+
+    chains = join_touching_polylines(cleaned)
+
+    segments = []
+    seen = []
+    duplicates = 0
+    max_error = 0.0
+    for chain in chains:
+        simplified, error = simplify_polyline(chain, tolerance)
+        max_error = max(max_error, error)
+        for p1, p2 in zip(simplified, simplified[1:]):
+            if any((_same_point(p1, a) and _same_point(p2, b)) or (_same_point(p1, b) and _same_point(p2, a))
+                   for a, b in seen):
+                duplicates += 1
+                continue
+            seen.append((p1, p2))
+            segments.append((p1, p2))
+
+    report = {
+        'segments_before': segments_before,
+        'segments_after': len(segments),
+        'removed_degenerate': degenerate,
+        'removed_duplicate': duplicates,
+        'max_error': max_error,
+        'tolerance': tolerance
+    }
+    return segments, report
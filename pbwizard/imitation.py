@@ -0,0 +1,263 @@
+import os
+import glob
+import json
+import logging
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pbwizard import constants
+
+
+logger = logging.getLogger(__name__)
+
+
+# Frames simulated after a replay's last input before giving up on game over
+DEFAULT_TAIL_FRAMES = 600
+DEFAULT_BC_EPOCHS = 3
+DEFAULT_BC_BATCH_SIZE = 256
+DEFAULT_BC_LEARNING_RATE = 1e-3
+
+
+def flipper_action(left, right):
+    """Discrete env action for a flipper hold state."""
+    if left and right:
+        return constants.ACTION_FLIP_BOTH
+    if left:
+        return constants.ACTION_FLIP_LEFT
+    if right:
+        return constants.ACTION_FLIP_RIGHT
+    return constants.ACTION_NOOP
+
+
+class FlipperTimeline:
+    """
+    Walks a replay's input events in frame order and answers "which flippers
+    were held at frame f" (frames must be asked for in increasing order).
+    Nudges and plunger inputs have no PinballEnv action and are skipped.
+    """
+
+    def __init__(self, events):
+        self.events = [e for e in events if e.get('type') == 'flipper']
+        self.cursor = 0
+        self.held = {'left': False, 'right': False}
+
+    def action_at(self, frame):
+        events = self.events
+        while self.cursor < len(events) and events[self.cursor]['frame'] <= frame:
+            value = events[self.cursor]['value']
+            if value.get('side') in self.held:
+                self.held[value['side']] = value.get('action') == 'hold'
+            self.cursor += 1
+        return flipper_action(self.held['left'], self.held['right'])
+
+
+def replay_layout_id(replay, config=None, layouts_dir='layouts'):
+    """
+    Layout file id a replay was recorded on. Replays only store the table's
+    display name (shared by most layouts), so the recorded 'layout_id' is
+    tried first and then every layouts/*.json, each with the training physics
+    overrides applied, until one hashes to the replay's layout_hash. Raises
+    ValueError when no table matches.
+    """
+    from pbwizard import env_factory
+    from pbwizard.vision import PinballLayout
+
+    target = replay.get('layout_hash')
+    if not target:
+        raise ValueError("Replay has no layout hash")
+    candidates = sorted(f[:-5] for f in os.listdir(layouts_dir) if f.endswith('.json'))
+    recorded = replay.get('layout_id')
+    if recorded in candidates:
+        candidates.remove(recorded)
+        candidates.insert(0, recorded)
+    overrides = env_factory.training_physics_config(config or {})
+    for layout_id in candidates:
+        try:
+            layout = PinballLayout(filepath=os.path.join(layouts_dir, f"{layout_id}.json"))
+        except Exception:
+            continue
+        layout.physics_params.update(overrides)
+        if layout.get_hash() == target:
+            return layout_id
+    raise ValueError(f"No layout in {layouts_dir} matches layout hash {target}")
+
+
+def convert_replay(replay, env, writer, tail_frames=DEFAULT_TAIL_FRAMES):
+    """
+    Re-simulate one replay through a headless PinballEnv and write
+    (observation, action) pairs to a dataset.TransitionWriter.
+
+    The capture plays the replay's inputs back (the env's own actions are
+    ignored during playback), so the observations are exactly what the env
+    would have shown an agent pressing the same flippers. Steps without a
+    ball on the table (respawn pauses) are not recorded. Raises ValueError
+    if the env's table is not the one the replay was recorded on. Returns
+    the number of pairs written.
+    """
+    base = env.unwrapped
+    cap = base.backend.capture
+    if cap.layout.get_hash() != replay.get('layout_hash'):
+        raise ValueError(f"Replay {replay.get('seed')} was recorded on another table")
+    obs, _ = env.reset()
+    if not cap.handle_load_replay(replay):
+        raise ValueError(f"Could not start replay {replay.get('seed')}")
+
+    timeline = FlipperTimeline(replay.get('events', []))
+    # Replays that know their length stop there; older ones run on past the last input
+    max_frames = replay.get('frames')
+    if max_frames is None:
+        max_frames = max((e['frame'] for e in replay.get('events', [])), default=0) + tail_frames + 1
+    manager = cap.replay_manager
+    written = 0
+    try:
+        while manager.current_frame < max_frames and not cap.game_over:
+            action = timeline.action_at(manager.current_frame)
+            had_ball = bool(cap.physics_engine.balls)
+            next_obs, reward, terminated, truncated, _ = env.step(action)
+            if had_ball:
+                writer.add(obs, action, reward, terminated, truncated)
+                written += 1
+            obs = next_obs
+    finally:
+        manager.stop_playback()
+    return written
+
+
+def _convert_worker(paths, out_dir, config):
+    """Pool worker: convert a share of the replays into its own dataset directory."""
+    from pbwizard import env_factory
+    from pbwizard.dataset import TransitionWriter, DEFAULT_SHARD_SIZE
+
+    config = dict(config or {}, record_replays=False, record_transitions=None, frame_stack=1)
+    # Every drained step logs a warning; nobody is watching these workers
+    logging.getLogger('pbwizard.environment').setLevel(logging.ERROR)
+    envs = {}
+    writer = None
+    written = 0
+    failed = []
+    try:
+        for path in paths:
+            try:
+                with open(path, 'r') as f:
+                    replay = json.load(f)
+                layout = replay_layout_id(replay, config)
+                if layout not in envs:
+                    envs[layout] = env_factory.make_training_env(dict(config, layout=layout), monitor=False)
+                env, _ = envs[layout]
+                if writer is None:
+                    writer = TransitionWriter(os.path.join(out_dir, f"worker_{os.getpid()}"), env.observation_space,
+                                              shard_size=config.get('transition_shard_size', DEFAULT_SHARD_SIZE))
+                written += convert_replay(replay, env, writer, config.get('tail_frames', DEFAULT_TAIL_FRAMES))
+            except Exception as e:
+                logger.error(f"Failed to convert replay {path}: {e}")
+                failed.append(path)
+    finally:
+        if writer is not None:
+            writer.close()
+        for env, cap in envs.values():
+            cap.stop()
+    return written, failed
+
+
+def convert_replays(replay_dir, out_dir, config=None, workers=None):
+    """
+    Convert every replays/*.json under replay_dir into a transition dataset
+    under out_dir, spread over a process pool (one dataset per worker).
+    Returns {'replays', 'pairs', 'failed'}.
+    """
+    paths = sorted(glob.glob(os.path.join(replay_dir, '*.json')))
+    if not paths:
+        raise FileNotFoundError(f"No replays found in {replay_dir}")
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths)))
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Round-robin so long and short games spread evenly
+    chunks = [paths[i::workers] for i in range(workers)]
+    start_method = 'forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn'
+    pairs = 0
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context(start_method)) as pool:
+        for written, bad in pool.map(_convert_worker, chunks, [out_dir] * workers, [config] * workers):
+            pairs += written
+            failed.extend(bad)
+
+    logger.info(f"Converted {len(paths) - len(failed)}/{len(paths)} replays into {pairs} pairs ({out_dir})")
+    return {'replays': len(paths), 'pairs': pairs, 'failed': failed}
+
+
+def observation_stats(data, batch_size=4096):
+    """Mean, variance and count of a TransitionDataset's observations (one streaming pass)."""
+    from stable_baselines3.common.running_mean_std import RunningMeanStd
+
+    rms = RunningMeanStd(shape=data.obs_shape)
+    for batch in data.iter_batches(batch_size, fields=['obs']):
+        rms.update(batch['obs'].astype(np.float64))
+    return rms
+
+
+def behavior_clone(model, dataset_path, epochs=DEFAULT_BC_EPOCHS, batch_size=DEFAULT_BC_BATCH_SIZE,
+                   learning_rate=DEFAULT_BC_LEARNING_RATE, seed=None):
+    """
+    Supervised pretraining of a PPO policy on (observation, action) pairs.
+
+    Maximizes the log-likelihood of the recorded actions under the policy's
+    action distribution. If the model's env is normalized, its observation
+    stats are seeded from the dataset first and the pairs are normalized the
+    same way, so RL starts with the statistics the policy was fitted on.
+    A separate optimizer is used, leaving PPO's own optimizer state untouched.
+    Returns {'samples', 'loss', 'accuracy'} for the last epoch.
+    """
+    import torch
+    from pbwizard.agent import normalize_obs
+    from pbwizard.checkpoint import _find_vec_normalize
+    from pbwizard.dataset import TransitionDataset
+
+    data = TransitionDataset(dataset_path)
+    expected = tuple(model.observation_space.shape)
+    if tuple(data.obs_shape) != expected:
+        raise ValueError(f"Dataset observations {data.obs_shape} do not match the policy's {expected}")
+
+    norm = _find_vec_normalize(model.get_env())
+    obs_rms = None
+    if norm is not None and norm.norm_obs:
+        norm.obs_rms = observation_stats(data)
+        obs_rms = (norm.obs_rms.mean, norm.obs_rms.var, norm.clip_obs, norm.epsilon)
+
+    policy = model.policy
+    policy.set_training_mode(True)
+    optimizer = torch.optim.Adam(policy.parameters(), lr=learning_rate)
+    summary = {'samples': len(data), 'loss': 0.0, 'accuracy': 0.0}
+
+    for epoch in range(epochs):
+        total_loss = 0.0
+        correct = 0
+        seen = 0
+        for batch in data.iter_batches(batch_size, fields=['obs', 'action'], shuffle=True,
+                                       seed=None if seed is None else seed + epoch):
+            obs = batch['obs']
+            if obs_rms is not None:
+                obs = normalize_obs(obs, *obs_rms)
+            obs_t = torch.as_tensor(obs, dtype=torch.float32, device=policy.device)
+            actions = torch.as_tensor(batch['action'], dtype=torch.long, device=policy.device)
+
+            dist = policy.get_distribution(obs_t)
+            loss = -dist.log_prob(actions).mean()
+            optimizer.zero_grad()
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(policy.parameters(), model.max_grad_norm)
+            optimizer.step()
+
+            n = len(actions)
+            total_loss += loss.item() * n
+            with torch.no_grad():
+                correct += (dist.distribution.probs.argmax(dim=1) == actions).sum().item()
+            seen += n
+
+        summary['loss'] = total_loss / max(1, seen)
+        summary['accuracy'] = correct / max(1, seen)
+        logger.info(f"BC epoch {epoch + 1}/{epochs}: loss {summary['loss']:.4f}, accuracy {summary['accuracy']:.3f}")
+
+    policy.set_training_mode(False)
+    return summary
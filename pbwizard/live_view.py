@@ -0,0 +1,204 @@
+import logging
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import gymnasium as gym
+
+
+logger = logging.getLogger(__name__)
+
+
+# UI refresh rate; the training side never publishes faster than this
+DEFAULT_PUBLISH_HZ = 30.0
+DEFAULT_SLOTS = 4
+MAX_BALLS = 32
+MAX_TARGETS = 16
+
+# Record fields (float64). SEQ is the per-slot sequence counter (odd while writing)
+(SEQ, TIME, SCORE, N_BALLS, LEFT_ANGLE, RIGHT_ANGLE, TILTED, TILT_VALUE,
+ COMBO, MULTIPLIER, N_TARGETS) = range(11)
+TARGETS_OFFSET = 11
+BALLS_OFFSET = TARGETS_OFFSET + MAX_TARGETS
+# Per ball: [x, y, vx, vy] in table pixels
+BALL_FIELDS = 4
+RECORD_SIZE = BALLS_OFFSET + MAX_BALLS * BALL_FIELDS
+
+# Ring header (int64): [latest slot, records written]
+LATEST, WRITTEN = 0, 1
+HEADER_SIZE = 2
+
+
+class LiveStateRing:
+    """
+    Compact table state (balls, flippers, drop targets, score) passed from the
+    training process to the UI through a small shared memory ring.
+
+    One writer, any number of readers, no locks and no IPC round trips. The
+    writer fills the slot after the latest one and bumps its sequence number
+    to odd before and even after writing; a reader copies the latest slot and
+    only accepts it if the sequence was even and unchanged across the copy.
+    With several slots the writer has to lap the ring before it touches the
+    slot a reader is copying, so torn reads are rare and simply skipped.
+
+    The main process creates the ring (create()) and owns / unlinks it; the
+    training worker attaches by name.
+    """
+
+    def __init__(self, name=None, slots=DEFAULT_SLOTS):
+        size = 8 * (HEADER_SIZE + slots * RECORD_SIZE)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            # Like SharedBuffers: attaching workers share the parent's resource tracker
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+            slots = (self.shm.size // 8 - HEADER_SIZE) // RECORD_SIZE
+
+        self.slots = slots
+        self.header = np.ndarray((HEADER_SIZE,), dtype=np.int64, buffer=self.shm.buf)
+        self.records = np.ndarray((slots, RECORD_SIZE), dtype=np.float64, buffer=self.shm.buf, offset=8 * HEADER_SIZE)
+        if self.owner:
+            self.header[:] = 0
+            self.records[:] = 0.0
+            self.header[LATEST] = -1
+
+        self._last_read = 0
+        # Reader scratch, reused between reads
+        self._scratch = np.zeros(RECORD_SIZE, dtype=np.float64)
+
+    @classmethod
+    def create(cls, slots=DEFAULT_SLOTS):
+        return cls(slots=slots)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(name=name)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    # --- Writer -------------------------------------------------------------
+
+    def publish(self, engine, score=None):
+        """Write the engine's current state into the next slot."""
+        slot = (int(self.header[LATEST]) + 1) % self.slots
+        rec = self.records[slot]
+        rec[SEQ] += 1 # odd: write in progress
+
+        rec[TIME] = time.time()
+        rec[SCORE] = engine.score if score is None else score
+
+        flippers = engine.flippers
+        rec[LEFT_ANGLE] = np.degrees(flippers['left']['body'].angle) if flippers.get('left') else 0.0
+        rec[RIGHT_ANGLE] = np.degrees(flippers['right']['body'].angle) if flippers.get('right') else 0.0
+        rec[TILTED] = 1.0 if engine.is_tilted else 0.0
+        rec[TILT_VALUE] = engine.tilt_value
+        rec[COMBO] = engine.combo_count
+        rec[MULTIPLIER] = engine.score_multiplier
+
+        targets = engine.drop_target_states
+        n = min(len(targets), MAX_TARGETS)
+        rec[N_TARGETS] = n
+        rec[TARGETS_OFFSET:TARGETS_OFFSET + n] = targets[:n]
+
+        balls = engine.balls
+        n = min(len(balls), MAX_BALLS)
+        rec[N_BALLS] = n
+        view = rec[BALLS_OFFSET:BALLS_OFFSET + n * BALL_FIELDS].reshape(n, BALL_FIELDS)
+        for i in range(n):
+            b = balls[i]
+            view[i, 0], view[i, 1] = b.position
+            view[i, 2], view[i, 3] = b.velocity
+
+        rec[SEQ] += 1 # even: complete
+        self.header[LATEST] = slot
+        self.header[WRITTEN] += 1
+
+    # --- Reader -------------------------------------------------------------
+
+    def read(self):
+        """
+        Latest complete state as a dict, or None if nothing new was published
+        since the last read (or the slot was being overwritten). Never blocks.
+        """
+        written = int(self.header[WRITTEN])
+        if written == self._last_read:
+            return None
+        slot = int(self.header[LATEST])
+        if slot < 0:
+            return None
+
+        rec = self.records[slot]
+        seq = rec[SEQ]
+        if int(seq) % 2:
+            return None
+        np.copyto(self._scratch, rec)
+        if rec[SEQ] != seq:
+            return None
+        self._last_read = written
+        return self._to_state(self._scratch)
+
+    @staticmethod
+    def _to_state(rec):
+        n_targets = int(rec[N_TARGETS])
+        n_balls = int(rec[N_BALLS])
+        balls = rec[BALLS_OFFSET:BALLS_OFFSET + n_balls * BALL_FIELDS].reshape(n_balls, BALL_FIELDS)
+        return {
+            'time': float(rec[TIME]),
+            'score': int(rec[SCORE]),
+            'balls': balls.tolist(),
+            'left_angle': float(rec[LEFT_ANGLE]),
+            'right_angle': float(rec[RIGHT_ANGLE]),
+            'drop_targets': [bool(v) for v in rec[TARGETS_OFFSET:TARGETS_OFFSET + n_targets]],
+            'is_tilted': bool(rec[TILTED]),
+            'tilt_value': float(rec[TILT_VALUE]),
+            'combo_count': int(rec[COMBO]),
+            'multiplier': float(rec[MULTIPLIER])
+        }
+
+    def close(self):
+        self.header = self.records = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class LiveViewPublisher(gym.Wrapper):
+    """
+    Publishes an env's table to a LiveStateRing from the process the env runs
+    in. With several training envs they live in vec env worker processes, out
+    of reach of the trainer's StateSyncCallback; worker 0 gets this wrapper.
+    Rate limited the same way.
+    """
+
+    def __init__(self, env, capture, ring_name, max_hz=DEFAULT_PUBLISH_HZ):
+        super().__init__(env)
+        self.capture = capture
+        self.live_view = LiveStateRing.attach(ring_name)
+        self.period = 1.0 / max_hz
+        self.last_sync = 0.0
+
+    def step(self, action):
+        result = self.env.step(action)
+        now = time.perf_counter()
+        if now - self.last_sync >= self.period:
+            self.last_sync = now
+            engine = self.capture.physics_engine
+            if engine is not None:
+                try:
+                    self.live_view.publish(engine)
+                except Exception as e:
+                    logger.debug(f"Live view publish failed: {e}")
+        return result
+
+    def close(self):
+        if self.live_view is not None:
+            self.live_view.close()
+            self.live_view = None
+        super().close()
@@ -0,0 +1,130 @@
+import logging
+
+import numpy as np
+from gymnasium import spaces
+
+
+logger = logging.getLogger(__name__)
+
+
+# Per ball slot: [present, x, y, vx, vy]
+BALL_FEATURES = 5
+DEFAULT_BALL_SLOTS = 4
+MAX_DROP_TARGETS = 4
+MAX_BUMPERS = 8
+# [active, health]
+MOTHERSHIP_FEATURES = 2
+# [combo timer]
+COMBO_FEATURES = 1
+# [tilted, tilt meter]
+TILT_FEATURES = 2
+
+FIXED_FEATURES = MAX_DROP_TARGETS + MAX_BUMPERS + MOTHERSHIP_FEATURES + COMBO_FEATURES + TILT_FEATURES
+
+# Seconds of downward travel counted when ranking balls by threat
+THREAT_HORIZON = 0.25
+
+
+class MultiballObservation:
+    """
+    Fixed-slot observation for any number of balls, filled in place from the
+    physics engine.
+
+    Layout (float32, all in [-1, 1]):
+        ball_slots x [present, x, y, vx, vy]   most threatening ball first
+        drop targets (up = 1)
+        bumper health (0..1)
+        mothership [active, health]
+        combo timer (fraction of combo window left)
+        tilt [tilted, tilt meter]
+
+    Threat is how close a ball is to the drain, plus where it will be after
+    THREAT_HORIZON seconds of downward travel. Balls beyond the slot count
+    are dropped, least threatening first. Empty slots are all zero.
+    """
+
+    def __init__(self, ball_slots=DEFAULT_BALL_SLOTS):
+        self.ball_slots = ball_slots
+        self.size = ball_slots * BALL_FEATURES + FIXED_FEATURES
+        self.buffer = np.zeros(self.size, dtype=np.float32)
+
+        # Views into the buffer, one per section
+        offset = ball_slots * BALL_FEATURES
+        self.balls = self.buffer[:offset].reshape(ball_slots, BALL_FEATURES)
+        self.drop_targets = self.buffer[offset:offset + MAX_DROP_TARGETS]
+        offset += MAX_DROP_TARGETS
+        self.bumpers = self.buffer[offset:offset + MAX_BUMPERS]
+        offset += MAX_BUMPERS
+        self.mothership = self.buffer[offset:offset + MOTHERSHIP_FEATURES]
+        offset += MOTHERSHIP_FEATURES
+        self.combo = self.buffer[offset:offset + COMBO_FEATURES]
+        offset += COMBO_FEATURES
+        self.tilt = self.buffer[offset:offset + TILT_FEATURES]
+
+        # Scratch arrays for ball state, grown on demand
+        self._positions = np.zeros((ball_slots, 2))
+        self._velocities = np.zeros((ball_slots, 2))
+
+    @classmethod
+    def from_size(cls, size):
+        """Builder matching a flat observation size, or None if it is not a multiball layout."""
+        slots, rem = divmod(size - FIXED_FEATURES, BALL_FEATURES)
+        if rem or slots < 1:
+            return None
+        return cls(ball_slots=slots)
+
+    @property
+    def observation_space(self):
+        return spaces.Box(low=-1.0, high=1.0, shape=(self.size,), dtype=np.float32)
+
+    def build(self, engine, width, height, drop_targets=None):
+        """Fill and return the internal buffer (overwritten by the next call)."""
+        self.buffer.fill(0.0)
+
+        # Balls, sorted by threat
+        n = len(engine.balls)
+        if n > len(self._positions):
+            self._positions = np.zeros((n, 2))
+            self._velocities = np.zeros((n, 2))
+        positions = self._positions[:n]
+        velocities = self._velocities[:n]
+        engine.fill_ball_arrays(positions, velocities)
+
+        if n:
+            threat = positions[:, 1] + np.maximum(velocities[:, 1], 0.0) * THREAT_HORIZON
+            order = np.argsort(-threat, kind='stable')[:self.ball_slots]
+            k = len(order)
+            slots = self.balls[:k]
+            slots[:, 0] = 1.0
+            slots[:, 1] = positions[order, 0] / width
+            slots[:, 2] = positions[order, 1] / height
+            slots[:, 3] = velocities[order, 0] / width
+            slots[:, 4] = velocities[order, 1] / height
+            np.clip(slots, -1.0, 1.0, out=slots)
+
+        # Drop targets (capture state if given, else the engine's)
+        if drop_targets is None:
+            drop_targets = engine.drop_target_states
+        k = min(len(drop_targets), MAX_DROP_TARGETS)
+        if k:
+            self.drop_targets[:k] = drop_targets[:k]
+
+        k = min(len(engine.bumper_health), MAX_BUMPERS)
+        if k:
+            self.bumpers[:k] = engine.bumper_health[:k]
+            self.bumpers[:k] *= 0.01
+
+        if engine.mothership_active:
+            self.mothership[0] = 1.0
+            self.mothership[1] = engine.mothership_health / max(engine.mothership_max_health, 1)
+
+        combo_window = engine.config.combo_window
+        if combo_window > 0:
+            self.combo[0] = min(max(engine.combo_timer / combo_window, 0.0), 1.0)
+
+        self.tilt[0] = 1.0 if engine.is_tilted else 0.0
+        tilt_threshold = getattr(engine.config, 'tilt_threshold', 10.0)
+        if tilt_threshold > 0:
+            self.tilt[1] = min(max(engine.tilt_value / tilt_threshold, 0.0), 1.0)
+
+        return self.buffer
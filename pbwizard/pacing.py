@@ -0,0 +1,76 @@
+import logging
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+# Physical table control loop (~30Hz)
+DEFAULT_CONTROL_PERIOD = 0.033
+
+
+class ControlClock:
+    """
+    Fixed-period control loop pacing for the real-time (non-headless) env.
+
+    wait() sleeps until the next deadline, so the time spent on vision,
+    reward and the agent between calls is subtracted from the sleep rather
+    than added to it. When processing overruns a deadline the tick is
+    counted as a miss and the schedule re-anchors to now instead of trying
+    to catch up with back-to-back ticks.
+    """
+
+    def __init__(self, period=DEFAULT_CONTROL_PERIOD, clock=time.perf_counter, sleep=time.sleep):
+        self.period = period
+        self._clock = clock
+        self._sleep = sleep
+        self.reset_stats()
+        self.restart()
+
+    def restart(self):
+        """Start a new schedule from now (after a reset or any long pause)."""
+        self._last_tick = None
+        self._deadline = None
+
+    def reset_stats(self):
+        self.ticks = 0
+        self.deadline_misses = 0
+        self.stale_frames = 0
+        self.max_overrun = 0.0
+        self.busy_total = 0.0
+
+    def wait(self):
+        """Block until the next tick. Returns the slack slept (seconds, 0 on a miss)."""
+        now = self._clock()
+        if self._deadline is None:
+            # First tick of a schedule: hold the action for one full period
+            self._deadline = now + self.period
+        elif self._last_tick is not None:
+            self.busy_total += now - self._last_tick
+
+        slack = self._deadline - now
+        if slack > 0:
+            self._sleep(slack)
+            tick = self._deadline
+        else:
+            self.deadline_misses += 1
+            self.max_overrun = max(self.max_overrun, -slack)
+            logger.debug(f"Control deadline missed by {-slack * 1000.0:.1f}ms")
+            tick = now
+            slack = 0.0
+
+        self.ticks += 1
+        self._last_tick = tick
+        self._deadline = tick + self.period
+        return slack
+
+    def stats(self):
+        return {
+            'period_ms': self.period * 1000.0,
+            'ticks': self.ticks,
+            'deadline_misses': self.deadline_misses,
+            'miss_rate': self.deadline_misses / self.ticks if self.ticks else 0.0,
+            'max_overrun_ms': self.max_overrun * 1000.0,
+            'mean_busy_ms': self.busy_total * 1000.0 / max(self.ticks - 1, 1),
+            'stale_frames': self.stale_frames
+        }
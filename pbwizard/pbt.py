@@ -0,0 +1,337 @@
+import os
+import json
+import time
+import random
+import logging
+import multiprocessing as mp
+
+import numpy as np
+
+from pbwizard import rewards
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MEMBERS = 4
+DEFAULT_INTERVAL = 20000
+# Bottom fraction of the population replaced by copies of the top fraction each round
+DEFAULT_EXPLOIT_FRACTION = 0.25
+DEFAULT_EVAL_EPISODES = 3
+PERTURB_FACTORS = (0.8, 1.25)
+# Initial population spread around the configured values (log-uniform factor)
+INITIAL_SPREAD = 2.0
+
+DEFAULT_HYPERPARAMS = ('learning_rate', 'ent_coef')
+# Every key pbt_hyperparams may name: _apply_hyperparams sets each on a live model
+HYPERPARAM_BOUNDS = {
+    'learning_rate': (1e-6, 1e-2),
+    'ent_coef': (0.0, 0.5),
+    'gamma': (0.8, 0.9999),
+    'gae_lambda': (0.8, 1.0),
+    'clip_range': (0.05, 0.4),
+}
+HYPERPARAM_DEFAULTS = {
+    'learning_rate': 3e-4,
+    'ent_coef': 0.01,
+    'gamma': 0.99,
+    'gae_lambda': 0.95,
+    'clip_range': 0.2,
+}
+
+
+def load_reward_weights(path='config.json'):
+    """Reward weights the env would start with: defaults plus config.json 'rewards'."""
+    weights = dict(rewards.DEFAULT_REWARDS)
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                weights.update(json.load(f).get('rewards', {}))
+    except Exception as e:
+        logger.error(f"Error loading reward weights from {path}: {e}")
+    return {k: v for k, v in weights.items() if isinstance(v, (int, float))}
+
+
+def _scale(hyperparams, key, factor):
+    low, high = HYPERPARAM_BOUNDS.get(key, (None, None))
+    value = hyperparams[key] * factor
+    if low is not None:
+        value = min(max(value, low), high)
+    hyperparams[key] = value
+
+
+def perturb(hyperparams, rng, factors=PERTURB_FACTORS):
+    """Copy of hyperparams with every tuned value (and reward weight) scaled by a random factor."""
+    out = dict(hyperparams, rewards=dict(hyperparams.get('rewards', {})))
+    for key in out:
+        if key != 'rewards':
+            _scale(out, key, rng.choice(factors))
+    for key in out['rewards']:
+        _scale(out['rewards'], key, rng.choice(factors))
+    return out
+
+
+def initial_population(config, members, rng):
+    """One hyperparameter set per member: member 0 keeps the configured values, the rest are spread around them."""
+    keys = config.get('pbt_hyperparams') or list(DEFAULT_HYPERPARAMS)
+    unsupported = [key for key in keys if key not in HYPERPARAM_BOUNDS]
+    if unsupported:
+        raise ValueError(f"PBT can't tune {unsupported}; supported hyperparameters: {sorted(HYPERPARAM_BOUNDS)}")
+    base = {}
+    for key in keys:
+        base[key] = float(config.get(key, HYPERPARAM_DEFAULTS[key]))
+        _scale(base, key, 1.0)
+    reward_keys = config.get('pbt_reward_keys')
+    weights = load_reward_weights()
+    if reward_keys is not None:
+        weights = {k: v for k, v in weights.items() if k in reward_keys}
+    base['rewards'] = weights
+
+    population = [base]
+    for _ in range(1, members):
+        spread = lambda: float(np.exp(rng.uniform(-np.log(INITIAL_SPREAD), np.log(INITIAL_SPREAD))))
+        member = dict(base, rewards=dict(base['rewards']))
+        for key in keys:
+            _scale(member, key, spread())
+        for key in member['rewards']:
+            _scale(member['rewards'], key, spread())
+        population.append(member)
+    return population
+
+
+def exploit_plan(scores, fraction, rng):
+    """
+    Truncation selection: {loser: winner} for the bottom `fraction` of members
+    (at least one), each copying a random member of the top `fraction`.
+    """
+    n = len(scores)
+    if n < 2:
+        return {}
+    count = max(1, int(round(n * fraction)))
+    count = min(count, n // 2)
+    ranked = sorted(range(n), key=lambda i: scores[i])
+    losers, winners = ranked[:count], ranked[-count:]
+    return {loser: rng.choice(winners) for loser in losers}
+
+
+def _apply_hyperparams(model, hyperparams):
+    from stable_baselines3.common.utils import FloatSchedule
+    from pbwizard.checkpoint import _find_vec_normalize
+
+    if 'learning_rate' in hyperparams:
+        model.learning_rate = hyperparams['learning_rate']
+        model._setup_lr_schedule()
+    if 'ent_coef' in hyperparams:
+        model.ent_coef = hyperparams['ent_coef']
+    if 'gamma' in hyperparams:
+        # The rollout buffer discounts returns, VecNormalize the reward scale
+        model.gamma = model.rollout_buffer.gamma = hyperparams['gamma']
+        norm = _find_vec_normalize(model.get_env())
+        if norm is not None:
+            norm.gamma = hyperparams['gamma']
+    if 'gae_lambda' in hyperparams:
+        model.gae_lambda = model.rollout_buffer.gae_lambda = hyperparams['gae_lambda']
+    if 'clip_range' in hyperparams:
+        model.clip_range = FloatSchedule(hyperparams['clip_range'])
+    if hyperparams.get('rewards'):
+        model.get_env().env_method('update_rewards', hyperparams['rewards'])
+
+
+def _member_worker(index, config, hyperparams, directory, conn):
+    """
+    One population member: its own vec env, eval env and PPO model. Trains
+    one interval per 'round' command and reports its evaluation score; an
+    'exploit' in the command first loads another member's checkpoint.
+    """
+    import torch
+    from stable_baselines3.common.utils import set_random_seed
+    from pbwizard import agent, checkpoint, env_factory, evaluation, threads
+
+    pin = config.get('pin_cpus', False)
+    budget = dict(config.get('thread_budget') or {'threads': 1, 'cpus': None})
+    if config.get('torch_threads'):
+        budget['threads'] = int(config['torch_threads'])
+    threads.apply(budget, pin=pin, name=f"PBT member {index}")
+    seed = int(config.get('seed', 0)) + 1000 * index
+    set_random_seed(seed)
+    # Drains log a warning per step
+    logging.getLogger('pbwizard.environment').setLevel(logging.ERROR)
+
+    width = int(os.getenv('SIM_WIDTH', 450))
+    height = int(os.getenv('SIM_HEIGHT', 800))
+    n_envs = max(1, int(config.get('n_envs', 1)))
+    env_config = dict(config, record_transitions=None)
+    if n_envs > 1 and budget.get('cpus'):
+        # The member's env workers share its CPU block, one thread each
+        cpus = budget['cpus']
+        env_config['env_thread_budgets'] = [{'threads': 1, 'cpus': [cpus[i % len(cpus)]]} for i in range(n_envs)]
+    venv = cap = eval_env = eval_cap = writer = None
+    try:
+        venv, cap = env_factory.make_training_vec_env(env_config, n_envs, width=width, height=height)
+        venv = agent.make_vec_normalize(venv, config)
+        eval_env, eval_cap = env_factory.make_training_env(dict(env_config, record_replays=False), monitor=False)
+        model = agent.make_ppo(venv, dict(config, **{k: v for k, v in hyperparams.items() if k != 'rewards'}), verbose=0)
+        _apply_hyperparams(model, hyperparams)
+        writer = checkpoint.CheckpointWriter(directory, keep=2)
+        episodes = int(config.get('pbt_eval_episodes', DEFAULT_EVAL_EPISODES))
+
+        while True:
+            cmd, data = conn.recv()
+            if cmd == 'round':
+                exploit = data.get('exploit')
+                if exploit:
+                    checkpoint.restore(model, exploit['path'])
+                    # The checkpoint carries the source member's RNG streams
+                    set_random_seed(seed + data['round'])
+                    hyperparams = exploit['hyperparams']
+                    _apply_hyperparams(model, hyperparams)
+
+                model.learn(total_timesteps=data['steps'], reset_num_timesteps=False)
+
+                # Same seeds for every member in a round, fresh ones every round
+                seeds = [data['round'] * 1000 + i for i in range(episodes)]
+                games = evaluation.play_episodes(model, eval_env, seeds, evaluation.normalization_stats(venv),
+                                                 config.get('pbt_eval_max_steps'))
+                summary = evaluation.summarize(games)
+                path = writer.submit(checkpoint.snapshot(model))
+                writer.flush()
+                conn.send(('round', dict(summary, member=index, round=data['round'], checkpoint=path,
+                                         timesteps=model.num_timesteps, hyperparams=hyperparams)))
+            elif cmd == 'save':
+                if data:
+                    model.save(data)
+                    checkpoint.save_vec_normalize(model, agent.vec_normalize_path(data))
+                    agent.save_obs_meta(data, config)
+                conn.send(('saved', data))
+                break
+            else:
+                break
+    except Exception as e:
+        logger.error(f"PBT member {index} failed: {e}")
+        conn.send(('error', f"member {index}: {e}"))
+    finally:
+        if writer is not None:
+            writer.close()
+        for c in (cap, eval_cap):
+            if c is not None:
+                c.stop()
+        if venv is not None:
+            venv.close()
+        conn.close()
+
+
+class Population:
+    """
+    K member processes, driven round by round over pipes; checkpoints go
+    through the filesystem. Each member gets its own block of CPUs
+    (threads.split), minus 'reserve_cpus' for the coordinating process.
+    """
+
+    def __init__(self, config, hyperparams, directory, start_method=None):
+        from pbwizard import threads
+
+        if start_method is None:
+            start_method = 'forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn'
+        ctx = mp.get_context(start_method)
+        budgets = threads.split(len(hyperparams), reserve=config.get('reserve_cpus', threads.DEFAULT_RESERVE))
+        logger.info("PBT thread layout: " + "; ".join(
+            f"member {i} {threads.describe(b, config.get('pin_cpus', False))}" for i, b in enumerate(budgets)))
+        self.conns = []
+        self.processes = []
+        for index, hp in enumerate(hyperparams):
+            parent, child = ctx.Pipe()
+            member_dir = os.path.join(directory, f"member_{index}")
+            member_config = dict(config, thread_budget=budgets[index])
+            process = ctx.Process(target=_member_worker, args=(index, member_config, hp, member_dir, child),
+                                  daemon=True, name=f"pbt-member-{index}")
+            process.start()
+            child.close()
+            self.conns.append(parent)
+            self.processes.append(process)
+
+    def __len__(self):
+        return len(self.conns)
+
+    def _recv(self, index):
+        msg, data = self.conns[index].recv()
+        if msg == 'error':
+            raise RuntimeError(f"PBT {data}")
+        return data
+
+    def run_round(self, round_index, steps, exploits=None):
+        """Train every member for `steps` timesteps (in parallel); returns their results by member index."""
+        exploits = exploits or {}
+        for index, conn in enumerate(self.conns):
+            conn.send(('round', {'round': round_index, 'steps': steps, 'exploit': exploits.get(index)}))
+        return [self._recv(index) for index in range(len(self))]
+
+    def save(self, index, path):
+        """Save member `index` as a model zip (plus normalization stats) and shut all members down."""
+        for i, conn in enumerate(self.conns):
+            conn.send(('save', path if i == index else None))
+        for i in range(len(self)):
+            self._recv(i)
+
+    def close(self, timeout=10.0):
+        for conn in self.conns:
+            conn.close()
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+
+
+def run(config, save_path, status_queue=None, control=None):
+    """
+    Population based training. Runs pbt_members PPO members for
+    total_timesteps each, in rounds of pbt_interval timesteps. After every
+    round the bottom members load a top member's checkpoint (weights,
+    optimizer, VecNormalize stats) and continue with perturbed
+    hyperparameters / reward weights. The best member of the final round is
+    saved to save_path; the whole schedule to <save_path>_pbt.json.
+    Returns the history.
+    """
+    members = int(config.get('pbt_members', DEFAULT_MEMBERS))
+    interval = int(config.get('pbt_interval', DEFAULT_INTERVAL))
+    rounds = max(1, int(config.get('total_timesteps', 100000)) // interval)
+    fraction = float(config.get('pbt_fraction', DEFAULT_EXPLOIT_FRACTION))
+    rng = random.Random(config.get('seed'))
+    directory = os.path.join(config.get('pbt_dir', 'pbt'), config.get('model_name', 'ppo_pinball'))
+
+    population = Population(config, initial_population(config, members, np.random.default_rng(config.get('seed'))),
+                            directory)
+    history = []
+    exploits = {}
+    try:
+        for round_index in range(rounds):
+            start = time.time()
+            results = population.run_round(round_index, interval, exploits)
+            scores = [r['mean_score'] for r in results]
+            plan = exploit_plan(scores, fraction, rng)
+            exploits = {loser: {'path': results[winner]['checkpoint'],
+                                'hyperparams': perturb(results[winner]['hyperparams'], rng),
+                                'source': winner}
+                        for loser, winner in plan.items()}
+            history.append({'round': round_index, 'results': results,
+                            'exploits': {loser: e['source'] for loser, e in exploits.items()}})
+
+            best = int(np.argmax(scores))
+            logger.info(f"PBT round {round_index + 1}/{rounds} ({time.time() - start:.0f}s): scores "
+                        f"{[round(s) for s in scores]}, best member {best}, replaced {sorted(plan)}")
+            if status_queue is not None:
+                status_queue.put(('pbt', {'round': round_index + 1, 'rounds': rounds, 'scores': scores,
+                                          'best_member': best, 'best_hyperparams': results[best]['hyperparams']}))
+            if control is not None:
+                cmd = control.poll()
+                if cmd is not None and cmd.stop:
+                    logger.info("Stop requested: ending PBT after this round")
+                    break
+
+        population.save(best, save_path)
+    finally:
+        population.close()
+
+    with open(f"{save_path}_pbt.json", 'w') as f:
+        json.dump({'best_member': best, 'history': history}, f, indent=2)
+    logger.info(f"PBT finished: member {best} saved to {save_path}")
+    return history
@@ -8,6 +8,7 @@ import pymunk
 import numpy as np
 
 from pbwizard.config import PhysicsConfig
+from pbwizard.geometry import simplify_rails
 
 
 logger = logging.getLogger(__name__)
@@ -37,6 +38,14 @@ COLLISION_LABELS = {
     COLLISION_TYPE_MOTHERSHIP: "mothership",
 }
 
+# Ball count limits. Normal play caps multiball at 5 and the table at 10;
+# stress mode (chaos multiball / benchmarks) raises the table cap.
+MULTIBALL_MAX_BALLS = 5
+DEFAULT_MAX_BALLS = 10
+STRESS_MAX_BALLS = 64
+# Seconds chaos multiball keeps recycling drained balls before they drain for real
+CHAOS_DURATION = 30.0
+
 SCORE_VALUES = {
     COLLISION_TYPE_BUMPER: 10,
     COLLISION_TYPE_DROP_TARGET: 500,
@@ -77,9 +86,17 @@ class Physics:
         ]
 
 
+def _accept_contact(arbiter, space, data):
+    return True
+
+
 class PymunkEngine(Physics):
-    def __init__(self, layout, width, height, seed=None, config: PhysicsConfig = None):
+    def __init__(self, layout, width, height, seed=None, config: PhysicsConfig = None, simplify_tolerance=None):
         self.layout = layout
+
+        # Optional static geometry simplification (pixels of allowed rail deviation, None = off)
+        self.simplify_tolerance = simplify_tolerance
+        self.geometry_report = None
         
         # Initialize Config
         if config:
@@ -91,22 +108,7 @@ class PymunkEngine(Physics):
                 self.config.update(layout.physics_params)
 
         # Deterministic Seeding
-        if seed is None:
-            # Generate a random seed if none provided (simulating "luck")
-            seed = str(time.time_ns())
-        self.seed = str(seed)
-        
-        # Initialize RNGs with seed
-        # Use hashlib to create a robust integer seed from string
-        seed_int = int(hashlib.sha256(self.seed.encode('utf-8')).hexdigest(), 16) % (2**32)
-        self.rng = random.Random(seed_int)
-        np.random.seed(seed_int)
-        
-        # Generate Game Hash (Seed + Layout Name + Config Hash)
-        # This is what ensures the "Game" is unique
-        config_hash = self.config.get_hash()
-        layout_name = layout.name if hasattr(layout, 'name') else 'custom'
-        self.game_hash = hashlib.sha256((f"{self.seed}_{layout_name}_{config_hash}").encode('utf-8')).hexdigest()[:16]
+        config_hash = self._apply_seed(seed)
         logger.info(f"Physics Initialized. Seed: {self.seed}, Game Hash: {self.game_hash}, Config Hash: {config_hash}")
 
         self.width = width
@@ -158,12 +160,47 @@ class PymunkEngine(Physics):
         
         self.lock = threading.RLock()
         self._is_stepping = False
+
+        # Ball limits / stress mode (see enable_stress_mode)
+        self.max_balls = DEFAULT_MAX_BALLS
+        self.multiball_max_balls = MULTIBALL_MAX_BALLS
+        self.stress_mode = False
+        # Simulation time chaos multiball ends (None: stress mode has no end)
+        self.chaos_until = None
+        self._ball_ball_handler = None
         
         self._setup_static_geometry()
         self._setup_flippers()
         self._setup_collision_logging()
 
 
+    def _apply_seed(self, seed=None):
+        """Seed the RNGs and derive the game hash. Returns the config hash used."""
+        if seed is None:
+            # Generate a random seed if none provided (simulating "luck")
+            seed = str(time.time_ns())
+        self.seed = str(seed)
+        
+        # Initialize RNGs with seed
+        # Use hashlib to create a robust integer seed from string
+        seed_int = int(hashlib.sha256(self.seed.encode('utf-8')).hexdigest(), 16) % (2**32)
+        self.seed_int = seed_int
+        self.rng = random.Random(seed_int)
+        # Per-engine NumPy stream: engines are built off-thread (EnginePool),
+        # so the global np.random state must never be touched here
+        self.np_rng = np.random.default_rng(seed_int)
+        
+        # Generate Game Hash (Seed + Layout Name + Config Hash)
+        # This is what ensures the "Game" is unique
+        config_hash = self.config.get_hash()
+        layout_name = self.layout.name if hasattr(self.layout, 'name') else 'custom'
+        hash_input = f"{self.seed}_{layout_name}_{config_hash}"
+        if self.simplify_tolerance:
+            # Simplified geometry plays differently, keep its games distinct
+            hash_input += f"_simplify{self.simplify_tolerance}"
+        self.game_hash = hashlib.sha256(hash_input.encode('utf-8')).hexdigest()[:16]
+        return config_hash
+
     @property
     def auto_plunge_enabled(self):
         """Proxy to config value."""
@@ -393,7 +430,9 @@ class PymunkEngine(Physics):
                          self.mothership_health -= (10 * self.score_multiplier)
                          logger.info(f"👽 Mothership HIT! Health: {old_health} -> {self.mothership_health} (Max: {self.mothership_max_health})")
                          
-                         if self.mothership_health <= 0:
+                         # Only the hit that crosses zero destroys it; with many balls several
+                         # hits can land in the same step before the body is removed.
+                         if self.mothership_health <= 0 and old_health > 0:
                              logger.info("💥 MOTHERSHIP DESTROYED! 💥")
                              # Award massive bonus
                              bonus = 50000 * self.score_multiplier
@@ -466,15 +505,7 @@ class PymunkEngine(Physics):
                                     self.space.add_post_step_callback(self._reset_drop_targets_safe, None)
 
                                     # Award a new ball to plunger lane (multiball!), max 5 balls
-                                    if len(self.balls) < 5:
-                                        lane_x = self.width * 0.94
-                                        # Random spacing to prevent overlap/explosion
-                                        offset_y = self.rng.uniform(-40, 40)
-                                        lane_y = (self.height * 0.9) + offset_y
-                                        self.add_ball((lane_x, lane_y))
-                                        logger.info(f"🎱 Multiball: Added ball #{len(self.balls)} to plunger lane at Y={lane_y:.1f}")
-                                    else:
-                                        logger.info("🎱 Multiball: Max balls reached, no new ball added.")
+                                    self.award_multiball_ball()
 
                                     # Log the multiball event
                                     self.events.append({
@@ -495,6 +526,7 @@ class PymunkEngine(Physics):
                 self.events.append({
                     'type': 'collision',
                     'label': label,
+                    'code': other, # Integer event code for the reward pipeline
                     'score': final_score,
                     'total_score': self.score,
                     'combo_count': self.combo_count,
@@ -514,6 +546,8 @@ class PymunkEngine(Physics):
 
             return True
         handler.begin = begin_collision
+        # Restored for ball <-> ball contacts when stress mode is turned off
+        self._begin_collision = begin_collision
 
     def _setup_static_geometry(self):
 
@@ -736,6 +770,7 @@ class PymunkEngine(Physics):
         # Create Plunger Body
         self.plunger_body = pymunk.Body(body_type=pymunk.Body.KINEMATIC)
         self.plunger_body.position = (lane_x + (self.width - lane_x)/2, self.plunger_rest_y + self.plunger_height/2)
+        self.plunger_home = tuple(self.plunger_body.position)
         
         # Create Plunger Shape - "Divot" style
         # Instead of one box, use 3 shapes: Base, Left Lip, Right Lip
@@ -794,6 +829,7 @@ class PymunkEngine(Physics):
         
         self.left_plunger_body = pymunk.Body(body_type=pymunk.Body.KINEMATIC)
         self.left_plunger_body.position = (left_lane_x / 2, self.left_plunger_rest_y + self.left_plunger_height/2)
+        self.left_plunger_home = tuple(self.left_plunger_body.position)
         
         # Left Plunger Shape - Divot
         l_base_shape = pymunk.Poly.create_box(self.left_plunger_body, (self.left_plunger_width, self.left_plunger_height))
@@ -1250,36 +1286,97 @@ class PymunkEngine(Physics):
             'target_angle': 0.0
         }
 
-    def reset_game(self):
-        """Reset the physics engine state for a new game."""
-        # 1. Clear Balls
-        for b in self.balls[:]:
-            self.remove_ball(b)
-        self.balls = []
-        self.active_balls = []
-        
-        # 2. Reset Score and Rules
-        self.score = 0
-        self.combo_count = 0
-        self.combo_timer = 0.0
-        self.multiplier = 1.0
-        
-        # 3. Reset Feature States
-        self.bumper_states = [0.0] * len(self.layout.bumpers)
-        self.bumper_health = [100] * len(self.layout.bumpers) # Reset to full health
-        
-        # Reset drop targets (recreates physics bodies)
-        self.reset_drop_targets()
-        
-        # 4. Reset Kickbacks/Other
-        self.kickback_cooldowns = {}
-        
-        # Reset Mothership
-        if self.mothership_active:
-             self._remove_mothership_immediate()
+    def reset_game(self, seed=None, ball_pos=None):
+        """
+        Reset the physics engine state for a new game, reusing the static geometry.
+
+        Much cheaper than building a new engine (no geometry / collision handler
+        setup). If seed is given the RNGs and game hash are re-derived from it.
+        If ball_pos is given the first ball is placed immediately instead of via
+        a post-step callback. Must not be called from inside space.step().
+        """
+        with self.lock:
+            if seed is not None:
+                self._apply_seed(seed)
+
+            # Chaos multiball / stress settings never carry over into a new game
+            self.disable_stress_mode()
+
+            # 0. Drop deferred work from the previous game (e.g. a ball spawn
+            # still queued from the initial launch) so a seed fully determines the game
+            if hasattr(self.space, '_post_step_callbacks'):
+                self.space._post_step_callbacks.clear()
+
+            # 1. Clear Balls
+            for b in self.balls[:]:
+                self.remove_ball(b)
+            self.balls = []
+            self.active_balls = []
+            
+            # 2. Reset Score and Rules
+            self.score = 0
+            self.combo_count = 0
+            self.combo_timer = 0.0
+            self.last_hit_time = 0.0
+            self.score_multiplier = 1.0
+            self.is_tilted = False
+            self.tilt_value = 0.0
+            self.simulation_time = 0.0
+            self.events = []
+            
+            # 3. Reset Feature States
+            self.bumper_states = [0.0] * len(self.bumper_health)
+            self._reset_bumpers_safe(self.space, None) # Full health, shapes restored
+            
+            # Reset drop targets (recreates physics bodies)
+            self.reset_drop_targets()
+            
+            # 4. Reset Kickbacks/Other
+            self.kickback_cooldowns = {}
+            # Auto-launch timers are on the simulation clock, which restarts at 0
+            self.plunger_seat_time = 0.0
+            self.last_auto_plunger_time = -5.0
+            self.last_multiball_launch_time = 0
+            self.last_left_plunger_time = -1e6
+            
+            # Reset Mothership
+            if self.mothership_active:
+                 self._remove_mothership_safe(self.space, None)
+            self.mothership_health = 0
+
+            # 5. Flippers and plungers back to their build-time pose
+            for side in ('left', 'right'):
+                if side in self.flippers:
+                    self._reset_flipper_pose(self.flippers[side])
+            for flipper in self.flippers.get('upper', []):
+                self._reset_flipper_pose(flipper)
+            self._reset_plunger_pose()
+            
+            if ball_pos is not None:
+                self._add_ball_safe(self.space, ball_pos)
         
         logger.info("Physics Engine State Reset")
 
+    def _reset_flipper_pose(self, flipper):
+        body = flipper['body']
+        body.angle = 0.0
+        body.angular_velocity = 0.0
+        flipper['active'] = False
+
+    def _reset_plunger_pose(self):
+        if not hasattr(self, 'plunger_body'):
+            return
+        self.plunger_body.velocity = (0, 0)
+        self.plunger_body.position = self.plunger_home
+        self.plunger_target_y = self.plunger_rest_y
+        self.plunger_state = 'resting'
+        self.plunger_pull_strength = 0.0
+
+        self.left_plunger_body.velocity = (0, 0)
+        self.left_plunger_body.position = self.left_plunger_home
+        self.left_plunger_target_y = self.left_plunger_rest_y
+        self.left_plunger_state = 'resting'
+
     def add_ball(self, pos):
         with self.lock:
             # Always use callback to ensure thread/step safety (bypass locking check issues)
@@ -1303,12 +1400,12 @@ class PymunkEngine(Physics):
         pos = tuple(pos) # Ensure tuple
         
         # Check max balls limit
-        if len(self.balls) >= 5:
+        if len(self.balls) >= self.multiball_max_balls:
             # Check if any balls are "dead" / NaN
             self.balls = [b for b in self.balls if not np.isnan(b.position.x)]
             
-            if len(self.balls) >= 10:
-                logger.warning(f"Max balls (10) reached, ignoring add_ball request.")
+            if len(self.balls) >= self.max_balls:
+                logger.warning(f"Max balls ({self.max_balls}) reached, ignoring add_ball request.")
                 return None
             
         mass = self.config.ball_mass
@@ -1327,6 +1424,23 @@ class PymunkEngine(Physics):
         self.balls.append(body)
         return body
 
+    def award_multiball_ball(self):
+        """
+        Multiball award: one more ball in the plunger lane, auto-launched
+        while other balls are in play. No-op at multiball_max_balls.
+        Returns whether a ball was added.
+        """
+        if len(self.balls) >= self.multiball_max_balls:
+            logger.info("🎱 Multiball: Max balls reached, no new ball added.")
+            return False
+        lane_x = self.width * 0.94
+        # Random spacing to prevent overlap/explosion
+        offset_y = self.rng.uniform(-40, 40)
+        lane_y = (self.height * 0.9) + offset_y
+        self.add_ball((lane_x, lane_y))
+        logger.info(f"🎱 Multiball: Added ball #{len(self.balls)} to plunger lane at Y={lane_y:.1f}")
+        return True
+
     def remove_ball(self, ball):
         """Remove a ball from the physics space and tracking list."""
         if ball in self.balls:
@@ -1341,6 +1455,96 @@ class PymunkEngine(Physics):
             self.balls.remove(ball)
             logger.debug(f"Ball removed: {ball.position}")
 
+    def enable_stress_mode(self, max_balls=STRESS_MAX_BALLS, spatial_hash=False):
+        """
+        Allow many simultaneous balls (chaos multiball / benchmarks).
+
+        - raises the ball cap (drop target multiball still awards up to 5)
+        - ball <-> ball contacts skip the Python collision callback (no events/score)
+        - drained balls are recycled to the top of the table instead of removed
+        - optionally switches the broadphase to a spatial hash. On the bundled
+          layouts the default BB tree is faster up to 100+ balls (see
+          benchmark.py physics --spatial-hash), so it stays off by default.
+        """
+        with self.lock:
+            self.max_balls = max_balls
+            if self.stress_mode:
+                return
+            self.stress_mode = True
+
+            if spatial_hash:
+                # Cell ~ ball diameter, table sized for the static shapes + balls
+                radius = self.config.ball_radius if hasattr(self.config, 'ball_radius') else 12.0
+                self.space.use_spatial_hash(radius * 2.0, max(1000, (len(self.space.shapes) + max_balls) * 10))
+
+            # Specific Ball <-> Ball handler without callbacks bypasses begin_collision
+            handler = self.space.add_collision_handler(COLLISION_TYPE_BALL, COLLISION_TYPE_BALL)
+            if self._ball_ball_handler is not None:
+                # Enabled again: pymunk can't drop a Python callback, so accept without events
+                handler.begin = _accept_contact
+            self._ball_ball_handler = handler
+            logger.info(f"Stress mode enabled: max_balls={max_balls}")
+
+    def disable_stress_mode(self):
+        """
+        Back to normal play: default ball cap, ball <-> ball collision events
+        and drained balls leave the table again. A spatial hash broadphase
+        stays (pymunk can't switch back to the BB tree).
+        """
+        with self.lock:
+            self.chaos_until = None
+            if not self.stress_mode:
+                return
+            self.stress_mode = False
+            self.max_balls = DEFAULT_MAX_BALLS
+            if self._ball_ball_handler is not None:
+                self._ball_ball_handler.begin = self._begin_collision
+            logger.info("Stress mode disabled")
+
+    def chaos_multiball(self, count=50, duration=CHAOS_DURATION):
+        """
+        Spawn a burst of balls across the upper playfield. Drained balls are
+        recycled for `duration` simulated seconds; after that they drain
+        normally and stress mode switches itself off once at most one ball
+        is left. If stress mode was already on (benchmarks) it stays on.
+        The burst is trimmed to the current ball cap.
+        """
+        if not self.stress_mode:
+            self.enable_stress_mode(STRESS_MAX_BALLS)
+            self.chaos_until = self.simulation_time + duration
+        elif self.chaos_until is not None:
+            self.chaos_until = max(self.chaos_until, self.simulation_time + duration)
+        # Never past the ball cap: STRESS_MAX_BALLS unless a benchmark raised it explicitly
+        count = max(0, min(int(count), self.max_balls - len(self.balls)))
+
+        for _ in range(count):
+            x = self.width * self.rng.uniform(0.1, 0.8)
+            y = self.height * self.rng.uniform(0.05, 0.35)
+            self.add_ball((x, y))
+
+        self.events.append({
+            'type': 'chaos_multiball',
+            'ball_count': len(self.balls) + count,
+            'time': self.simulation_time
+        })
+        logger.info(f"🌪️ Chaos Multiball! Spawning {count} balls")
+
+    def get_ball_arrays(self):
+        """Snapshot ball positions / velocities as (N, 2) float arrays."""
+        n = len(self.balls)
+        positions = np.empty((n, 2))
+        velocities = np.empty((n, 2))
+        self.fill_ball_arrays(positions, velocities)
+        return positions, velocities
+
+    def fill_ball_arrays(self, positions, velocities):
+        """Write ball positions / velocities into preallocated (>= N, 2) arrays. Returns N."""
+        balls = self.balls
+        for i, b in enumerate(balls):
+            positions[i] = b.position
+            velocities[i] = b.velocity
+        return len(balls)
+
     def nudge(self, dx, dy, check_tilt=True):
         """Apply an impulse to all balls to simulate a table nudge."""
         with self.lock:
@@ -1643,23 +1847,21 @@ class PymunkEngine(Physics):
                 # Ball left lane, reset timer
                 self.plunger_seat_time = 0.0
 
+        # Multiball: one snapshot of ball state for the lane checks below
+        # (avoids per-ball Vec2d access, which dominates with many balls)
+        positions = speeds = None
+        if len(self.balls) > 1:
+            positions, velocities = self.get_ball_arrays()
+            speeds = np.hypot(velocities[:, 0], velocities[:, 1])
+
         # Multiball auto-launch: If there are balls already in play,
         # automatically launch any balls waiting in the plunger lane
         if len(self.balls) > 1:  # More than one ball exists
             lane_x = self.width * 0.75  # Plunger lane threshold
 
-            # Count balls in play (not in plunger lane)
-            balls_in_play = 0
-            balls_in_plunger = []
-
-            for b in self.balls:
-                if b.position.x > lane_x and b.position.y > self.height * 0.5:
-                    # Ball is in plunger lane
-                    if b.velocity.length < 100.0:  # Ball is relatively stationary (increased threshold)
-                        balls_in_plunger.append(b)
-                else:
-                    # Ball is in play area
-                    balls_in_play += 1
+            # Ball is in plunger lane and relatively stationary (increased threshold)
+            in_lane = (positions[:, 0] > lane_x) & (positions[:, 1] > self.height * 0.5)
+            balls_in_plunger = [self.balls[i] for i in np.flatnonzero(in_lane & (speeds < 100.0))]
 
             # Auto-launch any balls waiting in plunger lane during multiball
             # Changed: removed balls_in_play > 0 requirement to prevent all balls getting stuck in lane
@@ -1689,24 +1891,30 @@ class PymunkEngine(Physics):
         # Check if any ball is in the left plunger lane and stationary
         if hasattr(self, 'left_plunger_state') and self.left_plunger_state == 'resting':
             left_lane_x = self.width * 0.15 # Approx left lane boundary
-            
-            for b in self.balls:
-                # Check if in left lane (x < boundary) and NEAR BOTTOM (y > 0.9 height)
-                # Was 0.5, which caused false firing for balls stuck mid-lane (e.g. y=585)
-                if b.position.x < left_lane_x and b.position.y > self.height * 0.9:
-                     if b.velocity.length < 100.0: # Stationary (increased threshold)
-                         # Check cooldown
-                         current_time = self.simulation_time
-                         if not hasattr(self, 'last_left_plunger_time'):
-                             self.last_left_plunger_time = -1e6
-
-                         if current_time - self.last_left_plunger_time > 1.0:
-                             logger.info(f"Auto-firing LEFT plunger (Kickback): Ball detected at {b.position}")
-                             self.fire_left_plunger()
-                             self.last_left_plunger_time = current_time
-                             
-                             # Also wake up the ball to ensure it moves with the plunger
-                             b.activate()
+
+            # Check if in left lane (x < boundary) and NEAR BOTTOM (y > 0.9 height)
+            # Was 0.5, which caused false firing for balls stuck mid-lane (e.g. y=585)
+            # Stationary: speed < 100 (increased threshold)
+            if positions is None:
+                waiting = [b for b in self.balls
+                           if b.position.x < left_lane_x and b.position.y > self.height * 0.9
+                           and b.velocity.length < 100.0]
+            else:
+                in_left_lane = (positions[:, 0] < left_lane_x) & (positions[:, 1] > self.height * 0.9)
+                waiting = [self.balls[i] for i in np.flatnonzero(in_left_lane & (speeds < 100.0))]
+            for b in waiting:
+                # Check cooldown
+                current_time = self.simulation_time
+                if not hasattr(self, 'last_left_plunger_time'):
+                    self.last_left_plunger_time = -1e6
+
+                if current_time - self.last_left_plunger_time > 1.0:
+                    logger.info(f"Auto-firing LEFT plunger (Kickback): Ball detected at {b.position}")
+                    self.fire_left_plunger()
+                    self.last_left_plunger_time = current_time
+                    
+                    # Also wake up the ball to ensure it moves with the plunger
+                    b.activate()
 
         # Check for stuck balls
         self.check_stuck_ball(dt)
@@ -1756,7 +1964,7 @@ class PymunkEngine(Physics):
             self._is_stepping = False
             
         # Debug Log
-        if self.balls and np.random.random() < 0.02: # ~2% chance
+        if self.balls and self.np_rng.random() < 0.02: # ~2% chance
             b = self.balls[0]
             logger.debug(f"Ball Pos: {b.position}, Vel: {b.velocity}")
 
@@ -1772,7 +1980,7 @@ class PymunkEngine(Physics):
             target = r_up if flipper.get('active') else r_rest
 
         # Debug Log
-        if np.random.random() < 0.01:
+        if self.np_rng.random() < 0.01:
              logger.debug(f"Phys Flip: Side={side}, Active={flipper.get('active')}, Target={np.degrees(target):.1f}, Current={np.degrees(body.angle):.1f}")
 
         # Simple P-controller for angle
@@ -1895,6 +2103,9 @@ class PymunkEngine(Physics):
             
             logger.info(f"Rebuilding rails with: thickness={thickness}, length_scale={length_scale}, angle_offset={angle_offset}, offsets=({x_offset}, {y_offset})")
             
+            # Each rail becomes a polyline of world points first so the
+            # optional simplification pass can work on the whole set.
+            polylines = []
             if hasattr(self.layout, 'rails') and self.layout.rails:
                 for i, rail in enumerate(self.layout.rails):
                     try:
@@ -1953,95 +2164,72 @@ class PymunkEngine(Physics):
                             w_c1 = self._layout_to_world(c1_norm_x, c1_norm_y)
                             w_c2 = self._layout_to_world(c2_norm_x, c2_norm_y)
                             
-                            # Generate segments
-                            prev_pt = p1_final
-                            
+                            # Generate segment points
+                            points = [p1_final]
                             for s in range(1, steps + 1):
                                 t = s / steps
-                                curr_pt = bezier_point(t, p1_final, w_c1, w_c2, w_p2)
-                                
-                                vertices = self._create_thick_line_poly(prev_pt, curr_pt, thickness=thickness)
-                                if vertices:
-                                    shape = self._add_static_poly(vertices, elasticity=0.8, friction=0.01, collision_type=8)
-                                    self.rail_shapes.append(shape)
-                                
-                                prev_pt = curr_pt
+                                points.append(bezier_point(t, p1_final, w_c1, w_c2, w_p2))
+                            polylines.append(points)
                                 
                         else: 
                             # Straight Rail
-                            vertices = self._create_thick_line_poly(p1_final, w_p2, thickness=thickness)
-                            if vertices:
-                                shape = self._add_static_poly(vertices, elasticity=0.8, friction=0.01, collision_type=8)
-                                self.rail_shapes.append(shape)
+                            polylines.append([p1_final, w_p2])
                     except Exception as e:
                          logger.error(f"Error rebuilding rail {i}: {e}")
+
+            if self.simplify_tolerance:
+                segments, report = simplify_rails(polylines, self.simplify_tolerance)
+                self.geometry_report = report
+                logger.info(f"Geometry simplified: {report['segments_before']} -> {report['segments_after']} rail shapes "
+                            f"(degenerate {report['removed_degenerate']}, duplicate {report['removed_duplicate']}, "
+                            f"max error {report['max_error']:.2f}px <= {report['tolerance']}px)")
+            else:
+                segments = [pair for points in polylines for pair in zip(points, points[1:])]
+
+            for p1, p2 in segments:
+                vertices = self._create_thick_line_poly(p1, p2, thickness=thickness)
+                if vertices:
+                    shape = self._add_static_poly(vertices, elasticity=0.8, friction=0.01, collision_type=8)
+                    self.rail_shapes.append(shape)
+
             logger.info(f"Rails rebuilt: {len(self.rail_shapes)} rails created")
         except Exception as e:
             logger.error(f"Error in _rebuild_rails: {e}")
 
     def check_stuck_ball(self, dt):
         """Check if any ball is stuck, out of bounds, or drained."""
+        if self.chaos_until is not None and self.simulation_time >= self.chaos_until and len(self.balls) <= 1:
+            # Chaos multiball is over and its balls have drained
+            self.disable_stress_mode()
         balls_to_remove = []
-        
-        for b in self.balls:
-            # 1. Out of Bounds (Bottom) - DRAIN
-            if b.position.y > self.height + 100:
-                 if getattr(self, 'god_mode', False):
-                     # Teleport to plunger lane
-                     lane_x = self.width * 0.94 # Center of lane
-                     lane_y = self.height * 0.9
-                     b.position = (lane_x, lane_y)
-                     b.velocity = (0, 0)
-                     logger.info("God Mode: Ball rescued and teleported to plunger.")
-                     continue # Skip removal
-                 
-                 logger.info(f"Ball drained (Y > bound): {b.position} (Vel: {b.velocity})")
-                 balls_to_remove.append(b)
-                 continue
-            
-            # 2. Out of Bounds (Top) - REMOVE
-            if b.position.y < -300: # Way above top
-                 logger.warning(f"Ball removed (Y < -300): {b.position} (Velocity: {b.velocity})")
-                 balls_to_remove.append(b)
-                 continue
-                 
-            # 3. Stuck Check (Position-based for robustness against jitter)
-            # Threshold: Ball must stay within small radius for 10 seconds
-            if not hasattr(b, 'last_stuck_pos'):
-                b.last_stuck_pos = b.position
-                b.stuck_timer = 0.0
-                b.stuck_event_sent = False
-            
-            # Check deviation
-            dist = (b.position - b.last_stuck_pos).length
-            
-            # Reset if moved significantly (20 pixels)
-            if dist > 20.0:
-                b.last_stuck_pos = b.position
-                b.stuck_timer = 0.0
-                b.stuck_event_sent = False
-            else:
-                # Ball is effectively stationary (or trapped)
-                # Ignore if in plunger lane (Adjusted to 0.85 for tighter lane bound)
-                if b.position.x > self.width * 0.85:
+        balls = list(self.balls)
+
+        if len(balls) <= 1:
+            # Regular play: plain per-ball checks, no array setup every step
+            for b in balls:
+                x, y = b.position
+                if y > self.height + 100 or y < -300:
+                    if self._ball_out_of_bounds(b, drained=y > self.height + 100):
+                        balls_to_remove.append(b)
+                    continue
+
+                # 3. Stuck Check (Position-based for robustness against jitter)
+                if not hasattr(b, 'last_stuck_pos'):
+                    b.last_stuck_pos = (x, y)
                     b.stuck_timer = 0.0
                     b.stuck_event_sent = False
-                    continue
-                
-                b.stuck_timer += dt
-                
-                # Update reference position slowly to handle very slow drifts? 
-                # Actually, keeping it fixed at 'entry' of stuck zone is better.
-                # If it slowly drifts across table, it will eventually trip > 20.0.
-                
-                if b.stuck_timer > 10.0:
-                    if not getattr(b, 'stuck_event_sent', False):
-                        logger.info(f"Stuck ball detected at {b.position} (Timer: {b.stuck_timer:.1f}s)!")
-                        self.events.append({
-                            'type': 'stuck_ball',
-                            'timestamp': time.time()
-                        })
-                        b.stuck_event_sent = True
+                lx, ly = b.last_stuck_pos
+                if (x - lx) ** 2 + (y - ly) ** 2 > 20.0 ** 2:
+                    b.last_stuck_pos = (x, y)
+                    b.stuck_timer = 0.0
+                    b.stuck_event_sent = False
+                elif x > self.width * 0.85:
+                    b.stuck_timer = 0.0
+                    b.stuck_event_sent = False
+                else:
+                    self._tick_stuck_timer(b, dt)
+        else:
+            self._check_balls_vectorized(balls, dt, balls_to_remove)
 
         # Remove flagged balls
         for b in balls_to_remove:
@@ -2056,6 +2244,93 @@ class PymunkEngine(Physics):
                   self.combo_timer = 0.0
                   self.score_multiplier = 1.0
 
+    def _ball_out_of_bounds(self, b, drained):
+        """A ball below the drain (drained) or far above the table: True if it must be removed."""
+        # 1. Out of Bounds (Bottom) - DRAIN
+        if drained:
+            if getattr(self, 'god_mode', False):
+                # Teleport to plunger lane
+                lane_x = self.width * 0.94 # Center of lane
+                lane_y = self.height * 0.9
+                b.position = (lane_x, lane_y)
+                b.velocity = (0, 0)
+                logger.info("God Mode: Ball rescued and teleported to plunger.")
+                return False
+
+            if self.stress_mode and (self.chaos_until is None or self.simulation_time < self.chaos_until):
+                # Chaos multiball: recycle drained balls to the top to keep the count up
+                b.position = (self.width * self.rng.uniform(0.1, 0.8), self.height * 0.05)
+                b.velocity = (0, 0)
+                return False
+
+            logger.info(f"Ball drained (Y > bound): {b.position} (Vel: {b.velocity})")
+            return True
+
+        # 2. Out of Bounds (Top) - REMOVE
+        logger.warning(f"Ball removed (Y < -300): {b.position} (Velocity: {b.velocity})")
+        return True
+
+    def _tick_stuck_timer(self, b, dt):
+        """Ball is effectively stationary (or trapped) outside the plunger lane."""
+        # Keeping the reference fixed at 'entry' of stuck zone: if it slowly
+        # drifts across table, it will eventually trip > 20.0.
+        b.stuck_timer += dt
+
+        if b.stuck_timer > 10.0:
+            if not getattr(b, 'stuck_event_sent', False):
+                logger.info(f"Stuck ball detected at {b.position} (Timer: {b.stuck_timer:.1f}s)!")
+                self.events.append({
+                    'type': 'stuck_ball',
+                    'timestamp': time.time()
+                })
+                b.stuck_event_sent = True
+
+    def _check_balls_vectorized(self, balls, dt, balls_to_remove):
+        """check_stuck_ball for several balls: every position is read once and checked as arrays."""
+        positions = np.array([tuple(b.position) for b in balls], dtype=float).reshape(-1, 2)
+        drained = positions[:, 1] > self.height + 100
+        escaped = positions[:, 1] < -300
+
+        for i in np.flatnonzero(drained | escaped):
+            if self._ball_out_of_bounds(balls[i], drained=drained[i]):
+                balls_to_remove.append(balls[i])
+
+        # 3. Stuck Check (Position-based for robustness against jitter)
+        # Threshold: Ball must stay within small radius for 10 seconds
+        idx = np.flatnonzero(~(drained | escaped))
+        last = np.empty((len(idx), 2))
+        for j, i in enumerate(idx):
+            b = balls[i]
+            if not hasattr(b, 'last_stuck_pos'):
+                b.last_stuck_pos = tuple(positions[i])
+                b.stuck_timer = 0.0
+                b.stuck_event_sent = False
+            last[j] = b.last_stuck_pos
+
+        # Check deviation
+        delta = positions[idx] - last
+        dist = np.hypot(delta[:, 0], delta[:, 1])
+
+        # Reset if moved significantly (20 pixels)
+        moved = dist > 20.0
+        # Ignore if in plunger lane (Adjusted to 0.85 for tighter lane bound)
+        in_lane = positions[idx, 0] > self.width * 0.85
+
+        for j in np.flatnonzero(moved):
+            b = balls[idx[j]]
+            b.last_stuck_pos = tuple(positions[idx[j]])
+            b.stuck_timer = 0.0
+            b.stuck_event_sent = False
+
+        for j in np.flatnonzero(~moved & in_lane):
+            b = balls[idx[j]]
+            if b.stuck_timer or b.stuck_event_sent:
+                b.stuck_timer = 0.0
+                b.stuck_event_sent = False
+
+        for j in np.flatnonzero(~moved & ~in_lane):
+            self._tick_stuck_timer(balls[idx[j]], dt)
+
     def rescue_ball(self):
         """Rescue stuck balls by moving them to the plunger lane."""
         logger.info("Rescuing stuck ball(s)...")
@@ -0,0 +1,139 @@
+import logging
+import math
+
+import cv2
+import numpy as np
+import pymunk
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_PIXEL_SHAPE = (84, 84) # (height, width)
+
+# Grayscale intensities per feature
+SHADE_STATIC = 110
+SHADE_MOTHERSHIP = 80
+SHADE_BUMPER = 150
+SHADE_DROP_TARGET = 190
+SHADE_FLIPPER = 220
+SHADE_BALL = 255
+
+
+class TableRasterizer:
+    """
+    Low-resolution grayscale rasterizer working straight from physics state.
+
+    Static geometry (walls, rails, slingshots) is drawn once per engine into a
+    cached layer. Each render copies that layer and draws only the features
+    that change: bumpers still alive, drop targets that are up, flippers,
+    the mothership and balls. Nothing is drawn at full resolution.
+
+    The cache is rebuilt when the engine, its rails or its bumpers are
+    replaced (layout switch, rail edit), not on in-place resets.
+    """
+
+    def __init__(self, out_height=DEFAULT_PIXEL_SHAPE[0], out_width=DEFAULT_PIXEL_SHAPE[1]):
+        self.out_height = out_height
+        self.out_width = out_width
+        self._static_key = None
+        self.static_layer = None
+        self._bumpers = []
+        self._targets = []
+        self._flippers = []
+
+    @property
+    def shape(self):
+        return (self.out_height, self.out_width)
+
+    def _pt(self, x, y):
+        return (int(round(x * self.sx)), int(round(y * self.sy)))
+
+    def _poly_points(self, shape):
+        body = shape.body
+        pts = [body.local_to_world(v) for v in shape.get_vertices()]
+        return np.array([self._pt(p.x, p.y) for p in pts], dtype=np.int32)
+
+    def _build_static(self, engine):
+        self.sx = self.out_width / engine.width
+        self.sy = self.out_height / engine.height
+        layer = np.zeros(self.shape, dtype=np.uint8)
+
+        dynamic = set(engine.drop_target_shapes) | set(engine.bumper_shape_map)
+        for shape in engine.space.static_body.shapes:
+            if shape.space is None or shape in dynamic:
+                continue
+            if isinstance(shape, pymunk.Segment):
+                thickness = max(1, int(round(2 * shape.radius * min(self.sx, self.sy))))
+                cv2.line(layer, self._pt(shape.a.x, shape.a.y), self._pt(shape.b.x, shape.b.y), SHADE_STATIC, thickness)
+            elif isinstance(shape, pymunk.Poly):
+                cv2.fillPoly(layer, [self._poly_points(shape)], SHADE_STATIC)
+            elif isinstance(shape, pymunk.Circle):
+                c = shape.body.local_to_world(shape.offset)
+                cv2.circle(layer, self._pt(c.x, c.y), max(1, int(round(shape.radius * self.sx))), SHADE_STATIC, -1)
+
+        # Per-feature geometry, converted to output pixels once
+        self._bumpers = []
+        for shape, i in engine.bumper_shape_map.items():
+            c = shape.body.local_to_world(shape.offset)
+            self._bumpers.append((i, self._pt(c.x, c.y), max(1, int(round(shape.radius * self.sx)))))
+        self._targets = [(i, self._poly_points(shape)) for shape, i in engine.drop_target_shape_map.items()]
+
+        self._flippers = []
+        for side in ('left', 'right'):
+            flipper = engine.flippers.get(side)
+            if not flipper:
+                continue
+            base, tip = flipper['shapes'][0], flipper['shapes'][1]
+            thickness = max(1, int(round(2 * base.radius * self.sx)))
+            self._flippers.append((flipper['body'], float(tip.offset.x), thickness))
+
+        self.static_layer = layer
+        self._static_key = (engine, engine.rail_shapes, engine.bumper_shape_map)
+
+    def _static_current(self, engine):
+        key = self._static_key
+        return (key is not None and key[0] is engine and key[1] is engine.rail_shapes
+                and key[2] is engine.bumper_shape_map)
+
+    def render(self, engine, out=None):
+        """Rasterize the table into out (uint8, shape (H, W)); returns it."""
+        if not self._static_current(engine):
+            self._build_static(engine)
+        if out is None:
+            out = np.empty(self.shape, dtype=np.uint8)
+        np.copyto(out, self.static_layer)
+
+        health = engine.bumper_health
+        for i, center, radius in self._bumpers:
+            if i < len(health) and health[i] > 0:
+                cv2.circle(out, center, radius, SHADE_BUMPER, -1)
+
+        states = engine.drop_target_states
+        for i, pts in self._targets:
+            if i < len(states) and states[i]:
+                cv2.fillPoly(out, [pts], SHADE_DROP_TARGET)
+
+        for body, length, thickness in self._flippers:
+            px, py = body.position
+            angle = body.angle
+            tip = (px + length * math.cos(angle), py + length * math.sin(angle))
+            cv2.line(out, self._pt(px, py), self._pt(*tip), SHADE_FLIPPER, thickness)
+
+        if engine.mothership_active and engine.mothership_body is not None:
+            pos = engine.mothership_body.position
+            cv2.circle(out, self._pt(pos.x, pos.y), max(1, int(round(112.5 * self.sx))), SHADE_MOTHERSHIP, -1)
+
+        radius = max(1, int(round(getattr(engine.config, 'ball_radius', 12.0) * self.sx)))
+        for b in engine.balls:
+            cv2.circle(out, self._pt(b.position.x, b.position.y), radius, SHADE_BALL, -1)
+        return out
+
+
+def rasterize_batch(rasterizers, engines, out=None):
+    """Render several tables into one (N, H, W) uint8 array (e.g. for a batched policy)."""
+    if out is None:
+        out = np.empty((len(engines),) + rasterizers[0].shape, dtype=np.uint8)
+    for i, (rasterizer, engine) in enumerate(zip(rasterizers, engines)):
+        rasterizer.render(engine, out=out[i])
+    return out
@@ -0,0 +1,660 @@
+import os
+import json
+import time
+import socket
+import struct
+import logging
+
+import numpy as np
+
+from pbwizard.dataset import DONE_TERMINATED, DONE_TRUNCATED
+
+
+logger = logging.getLogger(__name__)
+
+
+PROTOCOL_VERSION = 1
+MAGIC = b'PBRL'
+# magic, protocol version, message kind, payload bytes
+_HEADER = struct.Struct('<4sBBQ')
+# Length of the JSON head at the start of every payload
+_HEAD_LEN = struct.Struct('<I')
+
+# Message kinds
+MSG_HELLO = 1      # worker -> coordinator: env count, host, pid
+MSG_CONFIG = 2     # coordinator -> worker: training config and the worker's seed
+MSG_READY = 3      # worker -> coordinator: envs built, observation / action spaces
+MSG_WEIGHTS = 4    # coordinator -> workers: policy weights and observation stats
+MSG_COLLECT = 5    # coordinator -> worker: roll out n_steps per env with a weights version
+MSG_BATCH = 6      # worker -> coordinator: the transitions
+MSG_CLOSE = 7
+MSG_ERROR = 8
+
+DEFAULT_CONNECT_TIMEOUT = 60.0
+DEFAULT_ACCEPT_TIMEOUT = 300.0
+# A connected worker has this long to say hello and build its envs
+DEFAULT_HANDSHAKE_TIMEOUT = 120.0
+# Every worker's batch must arrive within this long of the collect request
+DEFAULT_COLLECT_TIMEOUT = 600.0
+# TCP keepalive: probe after 60s idle, every 10s, give up after 6 misses
+KEEPALIVE_IDLE = 60
+KEEPALIVE_INTERVAL = 10
+KEEPALIVE_COUNT = 6
+
+
+def parse_address(address):
+    """
+    'tcp://host:port' (or just 'host:port') -> (AF_INET, (host, port));
+    'unix:///path/to.sock' -> (AF_UNIX, path).
+    """
+    if address.startswith('unix://'):
+        return socket.AF_UNIX, address[len('unix://'):]
+    if address.startswith('tcp://'):
+        address = address[len('tcp://'):]
+    host, sep, port = address.rpartition(':')
+    if not sep or not port.isdigit():
+        raise ValueError(f"Invalid rollout address {address!r} (expected tcp://host:port or unix:///path)")
+    return socket.AF_INET, (host or '0.0.0.0', int(port))
+
+
+def encode(meta=None, arrays=None):
+    """
+    Payload of one message: a length-prefixed JSON head (meta plus the
+    name, dtype and shape of every array) followed by the raw array bytes.
+    """
+    arrays = {name: np.asarray(arr) for name, arr in (arrays or {}).items()}
+    head = json.dumps({'meta': meta or {},
+                       'arrays': [[name, arr.dtype.str, list(arr.shape)] for name, arr in arrays.items()]}).encode()
+    # C-order bytes, without a copy where the array already is
+    chunks = [arr.reshape(-1).data.cast('B') if arr.flags.c_contiguous and arr.size else arr.tobytes()
+              for arr in arrays.values()]
+    return b''.join([_HEAD_LEN.pack(len(head)), head] + chunks)
+
+
+def decode(payload):
+    """Inverse of encode(): (meta, arrays). The arrays are read-only views into payload."""
+    (head_len,) = _HEAD_LEN.unpack_from(payload, 0)
+    offset = _HEAD_LEN.size
+    head = json.loads(bytes(payload[offset:offset + head_len]))
+    offset += head_len
+    arrays = {}
+    for name, dtype, shape in head['arrays']:
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape, dtype=np.int64))
+        arrays[name] = np.frombuffer(payload, dtype=dtype, count=count, offset=offset).reshape(shape)
+        offset += count * dtype.itemsize
+    return head['meta'], arrays
+
+
+def send_payload(sock, kind, payload):
+    sock.sendall(_HEADER.pack(MAGIC, PROTOCOL_VERSION, kind, len(payload)))
+    sock.sendall(payload)
+
+
+def send_message(sock, kind, meta=None, arrays=None):
+    send_payload(sock, kind, encode(meta, arrays))
+
+
+def _recv_exact(sock, size):
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("Rollout connection closed")
+        received += n
+    return buf
+
+
+def recv_message(sock):
+    """Next message on sock: (kind, meta, arrays)."""
+    magic, version, kind, size = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if magic != MAGIC:
+        raise ConnectionError(f"Not a rollout connection (magic {magic!r})")
+    if version != PROTOCOL_VERSION:
+        raise ConnectionError(f"Rollout protocol version {version}, expected {PROTOCOL_VERSION}")
+    meta, arrays = decode(_recv_exact(sock, size))
+    if kind == MSG_ERROR:
+        raise RuntimeError(f"Rollout peer failed: {meta.get('error')}")
+    return kind, meta, arrays
+
+
+def _expect(sock, kind):
+    got, meta, arrays = recv_message(sock)
+    if got != kind:
+        raise ConnectionError(f"Unexpected rollout message {got} (expected {kind})")
+    return meta, arrays
+
+
+def _tune(sock):
+    if sock.family == socket.AF_INET:
+        # Headers and payloads go out as separate writes
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Workers sit idle through every PPO update: keepalive is what notices a
+        # peer whose host died or whose network went away
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for option, value in (('TCP_KEEPIDLE', KEEPALIVE_IDLE), ('TCP_KEEPINTVL', KEEPALIVE_INTERVAL),
+                              ('TCP_KEEPCNT', KEEPALIVE_COUNT)):
+            if hasattr(socket, option):
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+
+def connect(address, timeout=DEFAULT_CONNECT_TIMEOUT):
+    """Connect to a coordinator, retrying until it is listening or timeout runs out."""
+    family, target = parse_address(address)
+    deadline = time.monotonic() + timeout
+    while True:
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(max(deadline - time.monotonic(), 1.0))
+            sock.connect(target)
+            sock.settimeout(None)
+            _tune(sock)
+            return sock
+        except OSError:
+            sock.close()
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.5)
+
+
+def policy_arrays(policy):
+    """Policy weights as {name: ndarray} for a MSG_WEIGHTS message."""
+    return {f"policy/{k}": v.detach().cpu().numpy() for k, v in policy.state_dict().items()}
+
+
+class RolloutWorker:
+    """
+    Headless envs plus a copy of the coordinator's policy. collect() plays
+    n_steps per env with the last weights it was sent and returns the
+    transitions as a MSG_BATCH (meta, arrays) pair.
+
+    Only the raw observations and the actions go back: the coordinator
+    recomputes values and log-probs with the same weights in one batch.
+    """
+
+    def __init__(self, config, n_envs=1, seed=None, width=450, height=800):
+        from stable_baselines3.common.utils import set_random_seed
+        from pbwizard import agent, env_factory
+
+        # Paths and per-run services belong to the coordinator's machine
+        config = dict(config or {}, record_transitions=None, record_replays=False, eval_thread_budget=None)
+        if seed is not None:
+            set_random_seed(seed)
+        self.venv, self.cap = env_factory.make_training_vec_env(config, n_envs, width=width, height=height)
+        if seed is not None:
+            self.venv.seed(seed)
+        self.model = agent.make_ppo(self.venv, config, verbose=0)
+        self.n_envs = n_envs
+        self.obs = self.venv.reset()
+        self.starts = np.ones(n_envs, dtype=np.uint8)
+        self.version = None
+        self.obs_rms = None
+
+    def spaces(self):
+        obs_space = self.venv.observation_space
+        return {'obs_shape': list(obs_space.shape), 'obs_dtype': np.dtype(obs_space.dtype).str,
+                'n_actions': int(self.venv.action_space.n)}
+
+    def load(self, meta, arrays):
+        import torch
+
+        state = {k[len('policy/'):]: torch.as_tensor(np.array(v)) for k, v in arrays.items() if k.startswith('policy/')}
+        self.model.policy.load_state_dict(state)
+        self.obs_rms = None
+        if 'obs_mean' in arrays:
+            self.obs_rms = (arrays['obs_mean'], arrays['obs_var'], meta['clip_obs'], meta['epsilon'])
+        self.version = meta['version']
+
+    def collect(self, n_steps):
+        from pbwizard.agent import normalize_obs
+
+        n = self.n_envs
+        obs_space = self.venv.observation_space
+        obs = np.empty((n_steps, n) + obs_space.shape, dtype=obs_space.dtype)
+        actions = np.empty((n_steps, n), dtype=np.int8)
+        rewards = np.empty((n_steps, n), dtype=np.float32)
+        starts = np.empty((n_steps, n), dtype=np.uint8)
+        dones = np.zeros((n_steps, n), dtype=np.uint8)
+        terminal_obs = []
+        episodes = []
+
+        start = time.perf_counter()
+        for t in range(n_steps):
+            obs[t] = self.obs
+            starts[t] = self.starts
+            policy_obs = self.obs if self.obs_rms is None else normalize_obs(self.obs, *self.obs_rms)
+            action, _ = self.model.policy.predict(policy_obs, deterministic=False)
+            actions[t] = action
+            self.obs, reward, done, infos = self.venv.step(action)
+            rewards[t] = reward
+            for i in np.flatnonzero(done):
+                info = infos[i]
+                if info.get('TimeLimit.truncated') and info.get('terminal_observation') is not None:
+                    # Truncated episodes are bootstrapped from their last observation
+                    dones[t, i] = DONE_TRUNCATED
+                    terminal_obs.append(info['terminal_observation'])
+                else:
+                    dones[t, i] = DONE_TERMINATED
+                if 'episode' in info:
+                    episodes.append((info['episode']['r'], info['episode']['l']))
+            self.starts = done.astype(np.uint8)
+        elapsed = time.perf_counter() - start
+
+        arrays = {
+            'obs': obs, 'actions': actions, 'rewards': rewards, 'starts': starts, 'dones': dones,
+            'terminal_obs': np.array(terminal_obs, dtype=obs_space.dtype).reshape((-1,) + obs_space.shape),
+            'last_obs': self.obs.astype(obs_space.dtype, copy=False), 'last_starts': self.starts,
+            'episodes': np.array(episodes, dtype=np.float32).reshape(-1, 2),
+        }
+        meta = {'version': self.version, 'n_steps': n_steps, 'seconds': elapsed}
+        return meta, arrays
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.stop()
+        self.venv.close()
+
+
+def run_worker(address, n_envs=1, connect_timeout=DEFAULT_CONNECT_TIMEOUT, width=450, height=800):
+    """
+    Rollout worker process: connect to the coordinator at address, build
+    n_envs headless tables with the config it sends, then answer weight
+    broadcasts and collect requests until it closes the connection.
+    Returns the number of transitions sent.
+    """
+    sock = connect(address, connect_timeout)
+    worker = None
+    sent = 0
+    try:
+        send_message(sock, MSG_HELLO, {'n_envs': n_envs, 'host': socket.gethostname(), 'pid': os.getpid()})
+        meta, _ = _expect(sock, MSG_CONFIG)
+        worker = RolloutWorker(meta['config'], n_envs, seed=meta.get('seed'), width=width, height=height)
+        send_message(sock, MSG_READY, worker.spaces())
+        logger.info(f"Rollout worker {meta['worker']} ready: {n_envs} envs, coordinator {address}")
+
+        while True:
+            kind, meta, arrays = recv_message(sock)
+            if kind == MSG_WEIGHTS:
+                worker.load(meta, arrays)
+            elif kind == MSG_COLLECT:
+                if meta['version'] != worker.version:
+                    send_message(sock, MSG_ERROR, {'error': f"have weights {worker.version}, asked for {meta['version']}"})
+                    break
+                batch_meta, batch = worker.collect(int(meta['n_steps']))
+                send_message(sock, MSG_BATCH, batch_meta, batch)
+                sent += batch['actions'].size
+            elif kind == MSG_CLOSE:
+                break
+    except (ConnectionError, TimeoutError) as e:
+        # TimeoutError: keepalive probes went unanswered
+        logger.warning(f"Rollout worker lost the coordinator: {e}")
+    except Exception as e:
+        logger.error(f"Rollout worker failed: {e}")
+        try:
+            send_message(sock, MSG_ERROR, {'error': str(e)})
+        except OSError:
+            pass
+        raise
+    finally:
+        if worker is not None:
+            worker.close()
+        sock.close()
+    return sent
+
+
+class RolloutServer:
+    """
+    Coordinator side of the protocol: accepts workers, broadcasts weights
+    (encoded once, sent to everyone) and gathers their batches.
+    """
+
+    def __init__(self, address):
+        family, target = parse_address(address)
+        self.family = family
+        self.path = target if family == socket.AF_UNIX else None
+        if self.path and os.path.exists(self.path):
+            # Left behind by a coordinator that didn't shut down cleanly
+            os.unlink(self.path)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(target)
+        self.sock.listen()
+        if family == socket.AF_INET:
+            host, port = self.sock.getsockname()[:2]
+            self.address = f"tcp://{target[0]}:{port}"
+        else:
+            self.address = f"unix://{self.path}"
+        self.workers = []
+        self._next_id = 0
+        logger.info(f"Rollout coordinator listening on {self.address}")
+
+    @property
+    def n_envs(self):
+        return sum(w['n_envs'] for w in self.workers)
+
+    def accept(self, count, config, timeout=DEFAULT_ACCEPT_TIMEOUT, seed=0, handshake_timeout=DEFAULT_HANDSHAKE_TIMEOUT):
+        """
+        Wait until `count` workers have connected and built their envs (with
+        config). A connection that doesn't finish the handshake within
+        handshake_timeout seconds is closed.
+        """
+        deadline = time.monotonic() + timeout
+        while len(self.workers) < count:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Only {len(self.workers)}/{count} rollout workers connected to {self.address}")
+            self.sock.settimeout(remaining)
+            try:
+                conn, _ = self.sock.accept()
+            except socket.timeout:
+                continue
+            conn.settimeout(handshake_timeout)
+            _tune(conn)
+            worker_id = self._next_id
+            try:
+                hello, _ = _expect(conn, MSG_HELLO)
+                send_message(conn, MSG_CONFIG, {'config': config, 'worker': worker_id,
+                                                'seed': int(seed) + 1000 * (worker_id + 1)})
+                spaces, _ = _expect(conn, MSG_READY)
+            except socket.timeout:
+                logger.warning(f"Rollout worker handshake timed out after {handshake_timeout:.0f}s")
+                conn.close()
+                continue
+            except (OSError, RuntimeError) as e:
+                logger.warning(f"Rollout worker handshake failed: {e}")
+                conn.close()
+                continue
+            conn.settimeout(None)
+            self._next_id += 1
+            self.workers.append(dict(hello, id=worker_id, sock=conn, spaces=spaces))
+            logger.info(f"Rollout worker {worker_id} connected: {hello['n_envs']} envs on {hello['host']} "
+                        f"(pid {hello['pid']})")
+        self.sock.settimeout(None)
+
+    def _drop(self, worker, reason):
+        logger.warning(f"Dropping rollout worker {worker['id']}: {reason}")
+        self.workers.remove(worker)
+        worker['sock'].close()
+
+    def broadcast(self, meta, arrays, timeout=None):
+        """Send the same weights message to every worker; one that can't take it within timeout is dropped."""
+        payload = encode(meta, arrays)
+        for worker in list(self.workers):
+            try:
+                worker['sock'].settimeout(timeout)
+                send_payload(worker['sock'], MSG_WEIGHTS, payload)
+            except socket.timeout:
+                self._drop(worker, f"weights not taken within {timeout:.0f}s")
+            except OSError as e:
+                self._drop(worker, e)
+        return len(payload)
+
+    def collect(self, n_steps, version, timeout=None):
+        """
+        Ask every worker for n_steps per env and wait for all of them, at most
+        timeout seconds in total (None waits forever). Workers that fail or
+        miss the deadline are dropped. Returns [(worker, meta, arrays)].
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining():
+            return None if deadline is None else max(deadline - time.monotonic(), 1e-3)
+
+        for worker in list(self.workers):
+            try:
+                worker['sock'].settimeout(remaining())
+                send_message(worker['sock'], MSG_COLLECT, {'version': version, 'n_steps': n_steps})
+            except socket.timeout:
+                self._drop(worker, f"collect request not taken within {timeout:.0f}s")
+            except OSError as e:
+                self._drop(worker, e)
+        batches = []
+        for worker in list(self.workers):
+            try:
+                worker['sock'].settimeout(remaining())
+                meta, arrays = _expect(worker['sock'], MSG_BATCH)
+            except socket.timeout:
+                self._drop(worker, f"no batch within {timeout:.0f}s")
+                continue
+            except (OSError, RuntimeError) as e:
+                self._drop(worker, e)
+                continue
+            batches.append((worker, meta, arrays))
+        if not batches:
+            raise RuntimeError("No rollout workers left")
+        return batches
+
+    def close(self):
+        for worker in self.workers:
+            try:
+                send_message(worker['sock'], MSG_CLOSE)
+            except OSError:
+                pass
+            worker['sock'].close()
+        self.workers = []
+        self.sock.close()
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class RemoteLearner:
+    """
+    PPO fed by remote rollout workers.
+
+    Each round broadcasts the current weights (a new version), has every
+    worker play n_steps per env with them, and runs an ordinary PPO update
+    on the merged batch. Workers always act with the weights being updated,
+    so the data is exactly as on-policy as a local vec env's. Observation
+    and reward normalization happen here, with the model env's VecNormalize
+    stats, so the saved model loads like any other.
+    """
+
+    def __init__(self, model, server, total_timesteps, collect_timeout=DEFAULT_COLLECT_TIMEOUT):
+        from pbwizard.checkpoint import _find_vec_normalize
+
+        self.model = model
+        self.server = server
+        self.total_timesteps = total_timesteps
+        self.collect_timeout = collect_timeout
+        self.norm = _find_vec_normalize(model.get_env())
+        self.version = 0
+        # Discounted returns per worker env, for reward normalization
+        self.returns = {}
+        self.buffer = None
+
+    def _obs_stats(self):
+        norm = self.norm
+        if norm is None or not norm.norm_obs:
+            return None
+        return (norm.obs_rms.mean.copy(), norm.obs_rms.var.copy(), norm.clip_obs, norm.epsilon)
+
+    def _normalize_rewards(self, batches, rewards, dones):
+        norm = self.norm
+        if norm is None or not norm.norm_reward:
+            return rewards
+        returns = np.concatenate([self.returns.setdefault(w['id'], np.zeros(w['n_envs'])) for w, _, _ in batches])
+        out = np.empty_like(rewards)
+        for t in range(len(rewards)):
+            returns = returns * norm.gamma + rewards[t]
+            norm.ret_rms.update(returns)
+            out[t] = norm.normalize_reward(rewards[t])
+            returns[dones[t] > 0] = 0.0
+        offset = 0
+        for w, _, _ in batches:
+            self.returns[w['id']] = returns[offset:offset + w['n_envs']]
+            offset += w['n_envs']
+        return out
+
+    def round(self):
+        """One broadcast / collect / update cycle. Returns round stats."""
+        import torch
+        from stable_baselines3.common.buffers import RolloutBuffer
+        from pbwizard.agent import normalize_obs
+
+        model = self.model
+        policy = model.policy
+        n_steps = model.n_steps
+        self.version += 1
+        obs_rms = self._obs_stats()
+        arrays = policy_arrays(policy)
+        meta = {'version': self.version}
+        if obs_rms is not None:
+            arrays['obs_mean'], arrays['obs_var'] = obs_rms[0], obs_rms[1]
+            meta.update(clip_obs=obs_rms[2], epsilon=obs_rms[3])
+        weights_bytes = self.server.broadcast(meta, arrays, timeout=self.collect_timeout)
+
+        start = time.perf_counter()
+        batches = self.server.collect(n_steps, self.version, timeout=self.collect_timeout)
+        collect_seconds = time.perf_counter() - start
+
+        def merged(name, axis=1):
+            return np.concatenate([b[name] for _, _, b in batches], axis=axis)
+
+        raw_obs = merged('obs')
+        actions = merged('actions').astype(np.int64)
+        dones = merged('dones')
+        rewards = self._normalize_rewards(batches, merged('rewards'), dones)
+        n_envs = actions.shape[1]
+
+        # Same frozen stats the workers acted on
+        def prepare(x):
+            x = x if obs_rms is None else normalize_obs(x, *obs_rms)
+            return torch.as_tensor(np.asarray(x, dtype=np.float32), device=model.device)
+
+        policy.set_training_mode(False)
+        with torch.no_grad():
+            flat_obs = prepare(raw_obs.reshape((-1,) + raw_obs.shape[2:]))
+            values, log_probs, _ = policy.evaluate_actions(flat_obs, torch.as_tensor(actions.reshape(-1), device=model.device))
+            values = values.reshape(n_steps, n_envs)
+            log_probs = log_probs.reshape(n_steps, n_envs)
+            # Timeouts bootstrap from the value of the observation they were cut at
+            truncated = np.argwhere(np.concatenate(
+                [(b['dones'] & DONE_TRUNCATED).astype(bool) for _, _, b in batches], axis=1))
+            if len(truncated):
+                terminal = prepare(np.concatenate([b['terminal_obs'] for _, _, b in batches]))
+                rewards = rewards.copy()
+                # terminal_obs rows are in (step, env) order within each worker; re-sort to merged order
+                order = self._terminal_order(batches)
+                terminal_values = policy.predict_values(terminal).cpu().numpy().reshape(-1)[order]
+                rewards[truncated[:, 0], truncated[:, 1]] += model.gamma * terminal_values
+            last_values = policy.predict_values(prepare(merged('last_obs', axis=0)))
+
+        if self.buffer is None or self.buffer.n_envs != n_envs:
+            self.buffer = RolloutBuffer(n_steps, model.observation_space, model.action_space, device=model.device,
+                                        gamma=model.gamma, gae_lambda=model.gae_lambda, n_envs=n_envs)
+            model.rollout_buffer = self.buffer
+        self.buffer.reset()
+        norm_obs = flat_obs.cpu().numpy().reshape(raw_obs.shape)
+        starts = merged('starts')
+        for t in range(n_steps):
+            self.buffer.add(norm_obs[t], actions[t].reshape(-1, 1), rewards[t], starts[t], values[t], log_probs[t])
+        self.buffer.compute_returns_and_advantage(last_values=last_values, dones=merged('last_starts', axis=0))
+
+        if self.norm is not None and self.norm.norm_obs and self.norm.training:
+            self.norm.obs_rms.update(raw_obs.reshape((-1,) + raw_obs.shape[2:]))
+
+        steps = n_steps * n_envs
+        model.num_timesteps += steps
+        model._update_current_progress_remaining(model.num_timesteps, self.total_timesteps)
+        episodes = np.concatenate([b['episodes'] for _, _, b in batches])
+        for reward, length in episodes:
+            model.ep_info_buffer.append({'r': float(reward), 'l': int(length)})
+
+        start = time.perf_counter()
+        model.train()
+        train_seconds = time.perf_counter() - start
+
+        stats = {
+            'version': self.version,
+            'workers': len(batches),
+            'envs': n_envs,
+            'timesteps': model.num_timesteps,
+            'collect_seconds': collect_seconds,
+            'train_seconds': train_seconds,
+            'fps': steps / max(collect_seconds, 1e-9),
+            'weights_bytes': weights_bytes,
+            'episodes': len(episodes),
+            'mean_reward': float(np.mean([e['r'] for e in model.ep_info_buffer])) if model.ep_info_buffer else 0.0,
+        }
+        model.logger.record('rollout/ep_rew_mean', stats['mean_reward'])
+        for key in ('workers', 'envs', 'collect_seconds', 'train_seconds', 'fps'):
+            model.logger.record(f"remote/{key}", stats[key])
+        model.logger.dump(step=model.num_timesteps)
+        return stats
+
+    @staticmethod
+    def _terminal_order(batches):
+        """Permutation taking per-worker terminal_obs rows (concatenated) to merged (step, env) order."""
+        keys = []
+        offset = 0
+        for worker, _, b in batches:
+            steps, envs = np.nonzero((b['dones'] & DONE_TRUNCATED).astype(bool))
+            keys.extend(zip(steps, envs + offset))
+            offset += b['dones'].shape[1]
+        return np.array(sorted(range(len(keys)), key=lambda i: keys[i]), dtype=np.int64)
+
+
+def run(config, save_path, status_queue=None, control=None, server=None):
+    """
+    Train with remote rollouts. Listens on config['remote_listen'] (or uses
+    an existing RolloutServer), waits for 'remote_workers' workers, then
+    runs rounds until total_timesteps. A worker whose batch doesn't arrive
+    within 'remote_collect_timeout' seconds of a round's start (0 waits
+    forever) is dropped. Saves the model and its normalization stats to
+    save_path. Returns the per-round stats.
+    """
+    from pbwizard import agent, checkpoint, env_factory
+
+    total_timesteps = int(config.get('total_timesteps', 100000))
+    # A local (never stepped) table provides the spaces and the VecNormalize to save
+    venv, cap = env_factory.make_training_vec_env(dict(config, record_transitions=None, record_replays=False), 1)
+    history = []
+    try:
+        venv = agent.make_vec_normalize(venv, config)
+        tensorboard_log = config.get('tensorboard_log') or os.getenv('TENSORBOARD_LOG')
+        model = agent.make_ppo(venv, config, tensorboard_log=tensorboard_log, verbose=0)
+        total_timesteps, _ = model._setup_learn(total_timesteps, tb_log_name="PPO_remote")
+
+        if server is None:
+            server = RolloutServer(config['remote_listen'])
+        server.accept(int(config.get('remote_workers', 1)), config,
+                      timeout=float(config.get('remote_accept_timeout', DEFAULT_ACCEPT_TIMEOUT)),
+                      seed=config.get('seed') or 0)
+        expected = tuple(model.observation_space.shape)
+        for worker in server.workers:
+            if tuple(worker['spaces']['obs_shape']) != expected:
+                raise ValueError(f"Worker {worker['id']} observations {worker['spaces']['obs_shape']} "
+                                 f"do not match the policy's {expected}")
+
+        collect_timeout = float(config.get('remote_collect_timeout', DEFAULT_COLLECT_TIMEOUT)) or None
+        learner = RemoteLearner(model, server, total_timesteps, collect_timeout=collect_timeout)
+        if status_queue is not None:
+            status_queue.put(('status', 'started'))
+        while model.num_timesteps < total_timesteps:
+            stats = learner.round()
+            history.append(stats)
+            logger.info(f"Remote round {stats['version']}: {stats['workers']} workers / {stats['envs']} envs, "
+                        f"{stats['fps']:.0f} steps/s collecting, {stats['train_seconds']:.1f}s update, "
+                        f"{stats['timesteps']}/{total_timesteps} timesteps")
+            if status_queue is not None:
+                status_queue.put(('remote', stats))
+            if control is not None:
+                cmd = control.poll()
+                if cmd is not None and cmd.stop:
+                    logger.info("Stop requested: ending remote training after this round")
+                    break
+
+        model.save(save_path)
+        checkpoint.save_vec_normalize(model, agent.vec_normalize_path(save_path))
+        agent.save_obs_meta(save_path, config)
+        logger.info(f"Remote training finished: {model.num_timesteps} timesteps, model saved to {save_path}")
+    finally:
+        if server is not None:
+            server.close()
+        if cap is not None:
+            cap.stop()
+        venv.close()
+    return history
@@ -0,0 +1,181 @@
+import logging
+
+import numpy as np
+
+from pbwizard.physics import COLLISION_TYPE_BUMPER, COLLISION_TYPE_DROP_TARGET, COLLISION_TYPE_RAIL, COLLISION_LABELS
+
+
+logger = logging.getLogger(__name__)
+
+
+# Reward breakdown components, in buffer order
+COMPONENTS = ('score', 'survival', 'combo', 'multiplier', 'events', 'height',
+              'flipper_penalty', 'holding_penalty', 'ball_lost', 'shot')
+(SCORE, SURVIVAL, COMBO, MULTIPLIER, EVENTS, HEIGHT,
+ FLIPPER_PENALTY, HOLDING_PENALTY, BALL_LOST, SHOT) = range(len(COMPONENTS))
+
+# Event codes are the physics collision types (0 = not a rewarded event)
+EVENT_NONE = 0
+EVENT_CODE_COUNT = max(COLLISION_LABELS) + 1
+
+# Event code -> rewards_config weight key
+EVENT_WEIGHT_KEYS = {
+    COLLISION_TYPE_BUMPER: 'bumper_hit',
+    COLLISION_TYPE_DROP_TARGET: 'drop_target_hit',
+    COLLISION_TYPE_RAIL: 'rail_hit',
+}
+
+DEFAULT_REWARDS = {
+    "score_log_scale": 0.106,
+    "combo_increase_factor": 0.1,
+    "multiplier_increase_factor": 0.5,
+    "flipper_penalty": 0.00001,  # Updated from 0.0001 to match config.json
+    "bumper_hit": 0.5,
+    "drop_target_hit": 1.0,
+    "rail_hit": 0.5
+}
+
+# Tuned difficulty parameters
+DIFFICULTY_PRESETS = {
+    'easy': {
+        'survival_reward': 0.0001,  # Reduced from 0.01
+        'holding_threshold': 120,  # 4 seconds - more lenient
+        'holding_penalty': 0.001  # Lower penalty
+    },
+    'medium': {
+        'survival_reward': 0.005,  # Increased from 0.001 to value life more
+        'holding_threshold': 90,  # 3 seconds
+        'holding_penalty': 0.002
+    },
+    'hard': {
+        'survival_reward': 0.0005,  # Moderate survival pressure
+        'holding_threshold': 60,  # 2 seconds - aggressive
+        'holding_penalty': 0.008
+    }
+}
+
+# Label -> code for events that don't carry a code (cached after first sight)
+_label_codes = {}
+
+
+def label_to_code(label):
+    """Classify a collision label the way the reward used to (substring match)."""
+    code = _label_codes.get(label)
+    if code is None:
+        if 'bumper' in label:
+            code = COLLISION_TYPE_BUMPER
+        elif 'drop_target' in label:
+            code = COLLISION_TYPE_DROP_TARGET
+        elif 'rail' in label:
+            code = COLLISION_TYPE_RAIL
+        else:
+            code = EVENT_NONE
+        _label_codes[label] = code
+    return code
+
+
+def event_code(event):
+    """Integer code of an event; only collisions are rewarded."""
+    if event.get('type') != 'collision':
+        return EVENT_NONE
+    code = event.get('code')
+    if code is None:
+        return label_to_code(event.get('label', ''))
+    return code if 0 <= code < EVENT_CODE_COUNT else EVENT_NONE
+
+
+class RewardPipeline:
+    """
+    Reward weights compiled into scalars / a per-event-code weight array.
+
+    The environment writes each term into the reusable `breakdown` buffer
+    (indexed by the component constants above) and sums it once. Call
+    compile() again after the weights or difficulty change.
+    """
+
+    def __init__(self, rewards_config=None, difficulty='medium'):
+        self.breakdown = np.zeros(len(COMPONENTS), dtype=np.float64)
+        self.event_weights = np.zeros(EVENT_CODE_COUNT, dtype=np.float64)
+        self.compile(rewards_config or DEFAULT_REWARDS, difficulty)
+
+    def compile(self, rewards_config, difficulty='medium'):
+        config = dict(DEFAULT_REWARDS)
+        config.update(rewards_config)
+
+        self.score_log_scale = float(config['score_log_scale'])
+        self.combo_increase_factor = float(config['combo_increase_factor'])
+        self.multiplier_increase_factor = float(config['multiplier_increase_factor'])
+        self.flipper_penalty = float(config['flipper_penalty'])
+
+        self.event_weights.fill(0.0)
+        for code, key in EVENT_WEIGHT_KEYS.items():
+            self.event_weights[code] = float(config[key])
+
+        preset = DIFFICULTY_PRESETS.get(difficulty, DIFFICULTY_PRESETS['medium'])
+        self.survival_reward = preset['survival_reward']
+        self.holding_threshold = preset['holding_threshold']
+        self.holding_penalty = preset['holding_penalty']
+
+    def begin(self):
+        """Zero and return the breakdown buffer for a new step."""
+        self.breakdown.fill(0.0)
+        return self.breakdown
+
+    def event_reward(self, events):
+        """Sum of event weights over a list of physics events."""
+        if not events:
+            return 0.0
+        codes = np.fromiter((event_code(e) for e in events), dtype=np.intp, count=len(events))
+        return float(self.event_weights[codes].sum())
+
+    def total(self):
+        return float(self.breakdown.sum())
+
+    def as_dict(self):
+        return dict(zip(COMPONENTS, self.breakdown.tolist()))
+
+
+# Default env steps between reward window summaries in info
+DEFAULT_REWARD_WINDOW = 1000
+
+
+class RewardAggregator:
+    """
+    Running per-episode and per-window sums of the reward breakdown.
+
+    Row 0 of `sums` is the current episode, row 1 the current window; one
+    add per step updates both. Summaries are plain dicts of component sums
+    plus 'steps', built only when an episode ends or a window closes.
+    """
+
+    EPISODE, WINDOW = 0, 1
+
+    def __init__(self, window=DEFAULT_REWARD_WINDOW):
+        self.window = max(1, int(window))
+        self.sums = np.zeros((2, len(COMPONENTS)), dtype=np.float64)
+        self.steps = [0, 0]
+
+    def add(self, breakdown):
+        self.sums += breakdown
+        self.steps[0] += 1
+        self.steps[1] += 1
+
+    def window_full(self):
+        return self.steps[self.WINDOW] >= self.window
+
+    def _pop(self, row):
+        summary = dict(zip(COMPONENTS, self.sums[row].tolist()))
+        summary['steps'] = self.steps[row]
+        self.sums[row].fill(0.0)
+        self.steps[row] = 0
+        return summary
+
+    def pop_episode(self):
+        return self._pop(self.EPISODE)
+
+    def pop_window(self):
+        return self._pop(self.WINDOW)
+
+    def reset_episode(self):
+        self.sums[self.EPISODE].fill(0.0)
+        self.steps[self.EPISODE] = 0
@@ -0,0 +1,137 @@
+import os
+import sys
+import logging
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+
+logger = logging.getLogger(__name__)
+
+
+# Pool sizes OpenMP / BLAS builds read when they load
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+                   'NUMEXPR_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS')
+# CPUs left to the web server / optimization manager by default
+DEFAULT_RESERVE = 1
+
+
+def available_cpus():
+    """CPU ids this process may run on (its affinity mask where the OS exposes one)."""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def usable_cpus(cpus=None, reserve=DEFAULT_RESERVE):
+    """CPUs left for compute once the first `reserve` are set aside (never none)."""
+    cpus = list(cpus) if cpus is not None else available_cpus()
+    return cpus[max(0, int(reserve)):] or cpus[-1:]
+
+
+def split(n_workers, cpus=None, reserve=0):
+    """
+    One budget per worker process: {'threads': n, 'cpus': [ids]}.
+
+    The usable CPUs are cut into contiguous, disjoint blocks (spare CPUs go
+    to the first blocks); with more workers than CPUs every worker gets one
+    thread and the CPUs are shared round-robin.
+    """
+    usable = usable_cpus(cpus, reserve)
+    n_workers = max(1, int(n_workers))
+    if n_workers > len(usable):
+        return [{'threads': 1, 'cpus': [usable[i % len(usable)]]} for i in range(n_workers)]
+    size, spare = divmod(len(usable), n_workers)
+    budgets = []
+    start = 0
+    for i in range(n_workers):
+        end = start + size + (1 if i < spare else 0)
+        budgets.append({'threads': end - start, 'cpus': usable[start:end]})
+        start = end
+    return budgets
+
+
+def training_layout(n_envs, evaluator=False, torch_threads=None, cpus=None, reserve=DEFAULT_RESERVE):
+    """
+    Budgets for one training run: {'trainer', 'envs', 'eval'}.
+
+    The trainer and the env workers take turns (rollout, then update), so
+    the trainer's torch pool spans every usable CPU while each env worker is
+    single threaded on its own CPU. More than one env runs in worker
+    processes; a single env runs inside the trainer ('envs' is empty). The
+    evaluator gets one thread on the last CPU.
+    """
+    usable = usable_cpus(cpus, reserve)
+    trainer = {'threads': int(torch_threads or len(usable)), 'cpus': usable}
+    envs = []
+    if n_envs > 1:
+        # Single CPUs round-robin, even when there are more CPUs than envs
+        envs = [{'threads': 1, 'cpus': [usable[i % len(usable)]]} for i in range(n_envs)]
+    evaluation = {'threads': 1, 'cpus': usable[-1:]} if evaluator else None
+    return {'trainer': trainer, 'envs': envs, 'eval': evaluation}
+
+
+def env_vars(threads):
+    """OpenMP / BLAS environment for a process limited to `threads` threads."""
+    return {var: str(max(1, int(threads))) for var in THREAD_ENV_VARS}
+
+
+def default_env(threads=1):
+    """Set the pool-size variables that aren't already set. Call before torch / numpy are imported."""
+    for var, value in env_vars(threads).items():
+        os.environ.setdefault(var, value)
+
+
+def describe(budget, pin=False):
+    threads = budget['threads']
+    where = f"on CPUs {budget['cpus']}" if pin and budget.get('cpus') else "unpinned"
+    return f"{threads} thread{'s' if threads != 1 else ''} {where}"
+
+
+def apply(budget, pin=False, name=None):
+    """
+    Limit this process to budget['threads'] torch / OpenMP / BLAS threads
+    and, with pin, to the CPUs in budget['cpus'].
+
+    The environment variables reach pools that haven't started yet and
+    every process started from here on; torch's pool is resized in place,
+    and BLAS pools that are already loaded too if threadpoolctl is
+    installed. Returns the budget actually applied.
+    """
+    threads = max(1, int(budget['threads']))
+    os.environ.update(env_vars(threads))
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(threads)
+    if threadpool_limits is not None:
+        threadpool_limits(threads)
+
+    cpus = list(budget.get('cpus') or [])
+    if pin and cpus:
+        if hasattr(os, 'sched_setaffinity'):
+            try:
+                os.sched_setaffinity(0, cpus)
+            except OSError as e:
+                logger.warning(f"Could not pin {name or 'process'} to CPUs {cpus}: {e}")
+                pin = False
+        else:
+            logger.warning("CPU pinning is not supported on this platform")
+            pin = False
+
+    applied = {'threads': threads, 'cpus': cpus}
+    logger.info(f"Thread budget for {name or 'process'} (pid {os.getpid()}): {describe(applied, pin)}")
+    return applied
+
+
+def log_layout(layout, pin=False):
+    """One log line describing a training_layout()."""
+    parts = [f"trainer {describe(layout['trainer'], pin)}"]
+    if layout['envs']:
+        envs = layout['envs']
+        where = f" on CPUs {[b['cpus'][0] for b in envs]}" if pin else ""
+        parts.append(f"{len(envs)} env workers x 1 thread{where}")
+    if layout['eval'] is not None:
+        parts.append(f"evaluator {describe(layout['eval'], pin)}")
+    reserved = sorted(set(available_cpus()) - set(layout['trainer']['cpus']))
+    logger.info(f"Thread layout ({len(available_cpus())} CPUs, reserved {reserved or 'none'}): " + "; ".join(parts))
@@ -0,0 +1,256 @@
+import logging
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper, VecEnv
+
+
+logger = logging.getLogger(__name__)
+
+
+def _align(offset, alignment=8):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+class SharedBuffers:
+    """
+    Observation / reward / done / action arrays for N envs in one shared memory block.
+
+    The parent creates the block, workers attach by name. Each worker only
+    writes its own row, so no locking is needed.
+    """
+
+    def __init__(self, n_envs, observation_space, action_space, name=None):
+        self.n_envs = n_envs
+        obs_dtype = np.dtype(observation_space.dtype)
+        act_shape = action_space.shape or ()
+        act_dtype = np.dtype(np.int64) if isinstance(action_space, spaces.Discrete) else np.dtype(action_space.dtype)
+
+        layout = [
+            ('obs', (n_envs, *observation_space.shape), obs_dtype),
+            ('rewards', (n_envs,), np.dtype(np.float32)),
+            ('dones', (n_envs,), np.dtype(np.bool_)),
+            ('actions', (n_envs, *act_shape), act_dtype),
+        ]
+        offsets = {}
+        size = 0
+        for key, shape, dtype in layout:
+            size = _align(size)
+            offsets[key] = size
+            size += int(np.prod(shape)) * dtype.itemsize
+
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+            self.owner = True
+        else:
+            # Workers share the parent's resource tracker, so attaching does not
+            # hand over ownership; only the parent unlinks the block.
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+
+        for key, shape, dtype in layout:
+            setattr(self, key, np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offsets[key]))
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        # Drop array views before closing the mapping
+        self.obs = self.rewards = self.dones = self.actions = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _shm_worker(remote, parent_remote, env_fn_wrapper, index):
+    # Import here to avoid a circular import
+    from stable_baselines3.common.env_util import is_wrapped
+
+    parent_remote.close()
+    env = env_fn_wrapper.var()
+    buffers = None
+    while True:
+        try:
+            cmd, data = remote.recv()
+            if cmd == 'step':
+                action = buffers.actions[index]
+                if buffers.actions.ndim == 1:
+                    action = action.item()
+                else:
+                    action = action.copy()
+                observation, reward, terminated, truncated, info = env.step(action)
+                # convert to SB3 VecEnv api
+                done = terminated or truncated
+                info['TimeLimit.truncated'] = truncated and not terminated
+                reset_info = None
+                if done:
+                    # save final observation where user can get it, then reset
+                    info['terminal_observation'] = observation
+                    observation, reset_info = env.reset()
+                buffers.obs[index] = observation
+                buffers.rewards[index] = reward
+                buffers.dones[index] = done
+                # Only the (small) info dict goes through the pipe
+                remote.send((info, reset_info))
+            elif cmd == 'reset':
+                maybe_options = {'options': data[1]} if data[1] else {}
+                observation, reset_info = env.reset(seed=data[0], **maybe_options)
+                buffers.obs[index] = observation
+                remote.send(reset_info)
+            elif cmd == 'attach':
+                buffers = SharedBuffers(data[0], env.observation_space, env.action_space, name=data[1])
+                remote.send(True)
+            elif cmd == 'render':
+                remote.send(env.render())
+            elif cmd == 'close':
+                env.close()
+                if buffers is not None:
+                    buffers.close()
+                remote.close()
+                break
+            elif cmd == 'get_spaces':
+                remote.send((env.observation_space, env.action_space))
+            elif cmd == 'env_method':
+                method = env.get_wrapper_attr(data[0])
+                remote.send(method(*data[1], **data[2]))
+            elif cmd == 'get_attr':
+                remote.send(env.get_wrapper_attr(data))
+            elif cmd == 'has_attr':
+                try:
+                    env.get_wrapper_attr(data)
+                    remote.send(True)
+                except AttributeError:
+                    remote.send(False)
+            elif cmd == 'set_attr':
+                remote.send(setattr(env, data[0], data[1]))
+            elif cmd == 'is_wrapped':
+                remote.send(is_wrapped(env, data))
+            else:
+                raise NotImplementedError(f"`{cmd}` is not implemented in the worker")
+        except (EOFError, KeyboardInterrupt):
+            break
+
+
+class SharedMemoryVecEnv(VecEnv):
+    """
+    SB3 VecEnv running each env in its own process, exchanging observations,
+    rewards, dones and actions through shared memory NumPy buffers.
+
+    Pipes are only used as a doorbell and for the per-step info dicts, so
+    nothing large is pickled on the hot path. Works under VecNormalize like
+    DummyVecEnv / SubprocVecEnv.
+    """
+
+    def __init__(self, env_fns, start_method=None):
+        self.waiting = False
+        self.closed = False
+        n_envs = len(env_fns)
+
+        if start_method is None:
+            # Fork is not safe once torch / threads are running in the parent
+            start_method = 'forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn'
+        ctx = mp.get_context(start_method)
+
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(n_envs)])
+        self.processes = []
+        for index, (work_remote, remote, env_fn) in enumerate(zip(self.work_remotes, self.remotes, env_fns)):
+            args = (work_remote, remote, CloudpickleWrapper(env_fn), index)
+            # daemon=True: if the main process crashes, we should not cause things to hang
+            process = ctx.Process(target=_shm_worker, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        self.remotes[0].send(('get_spaces', None))
+        observation_space, action_space = self.remotes[0].recv()
+
+        self.buffers = SharedBuffers(n_envs, observation_space, action_space)
+        for remote in self.remotes:
+            remote.send(('attach', (n_envs, self.buffers.name)))
+        for remote in self.remotes:
+            remote.recv()
+
+        super().__init__(n_envs, observation_space, action_space)
+        logger.info(f"SharedMemoryVecEnv started {n_envs} workers ({start_method})")
+
+    def step_async(self, actions):
+        self.buffers.actions[:] = np.asarray(actions).reshape(self.buffers.actions.shape)
+        for remote in self.remotes:
+            remote.send(('step', None))
+        self.waiting = True
+
+    def step_wait(self):
+        results = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+        infos = [info for info, _ in results]
+        for i, (_, reset_info) in enumerate(results):
+            if reset_info is not None:
+                self.reset_infos[i] = reset_info
+        # Copy out: the shared buffers are overwritten on the next step
+        return self.buffers.obs.copy(), self.buffers.rewards.copy(), self.buffers.dones.copy(), infos
+
+    def reset(self):
+        for env_idx, remote in enumerate(self.remotes):
+            remote.send(('reset', (self._seeds[env_idx], self._options[env_idx])))
+        self.reset_infos = [remote.recv() for remote in self.remotes]
+        # Seeds and options are only used once
+        self._reset_seeds()
+        self._reset_options()
+        return self.buffers.obs.copy()
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(('close', None))
+        for process in self.processes:
+            process.join()
+        self.buffers.close()
+        self.closed = True
+
+    def get_images(self):
+        for pipe in self.remotes:
+            pipe.send(('render', None))
+        return [pipe.recv() for pipe in self.remotes]
+
+    def has_attr(self, attr_name):
+        for remote in self.remotes:
+            remote.send(('has_attr', attr_name))
+        return all([remote.recv() for remote in self.remotes])
+
+    def get_attr(self, attr_name, indices=None):
+        target_remotes = self._get_target_remotes(indices)
+        for remote in target_remotes:
+            remote.send(('get_attr', attr_name))
+        return [remote.recv() for remote in target_remotes]
+
+    def set_attr(self, attr_name, value, indices=None):
+        target_remotes = self._get_target_remotes(indices)
+        for remote in target_remotes:
+            remote.send(('set_attr', (attr_name, value)))
+        for remote in target_remotes:
+            remote.recv()
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        target_remotes = self._get_target_remotes(indices)
+        for remote in target_remotes:
+            remote.send(('env_method', (method_name, method_args, method_kwargs)))
+        return [remote.recv() for remote in target_remotes]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        target_remotes = self._get_target_remotes(indices)
+        for remote in target_remotes:
+            remote.send(('is_wrapped', wrapper_class))
+        return [remote.recv() for remote in target_remotes]
+
+    def _get_target_remotes(self, indices):
+        return [self.remotes[i] for i in self._get_indices(indices)]
@@ -5,12 +5,14 @@ import logging
 import json
 import random
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
 import numpy as np
 
 from pbwizard.physics import PymunkEngine
 from pbwizard.high_score_manager import HighScoreManager
+from pbwizard.engine_pool import EnginePool
 
 logger = logging.getLogger(__name__)
 
@@ -32,13 +34,14 @@ class ReplayManager:
         self.event_cursor = 0
         self.lock = threading.Lock()
 
-    def start_recording(self, seed, layout_name, layout_hash, config_hash):
+    def start_recording(self, seed, layout_name, layout_hash, config_hash, layout_id=None):
         with self.lock:
             self.is_recording = True
             self.is_playing = False
             self.replay_data = {
                 'seed': seed,
                 'layout': layout_name,
+                'layout_id': layout_id,  # layouts/<id>.json; the name is not unique
                 'layout_hash': layout_hash,
                 'config_hash': config_hash,
                 'final_score': 0,  # Will be set when recording stops
@@ -51,6 +54,7 @@ class ReplayManager:
         with self.lock:
             self.is_recording = False
             self.replay_data['final_score'] = final_score  # Store the final score
+            self.replay_data['frames'] = self.current_frame
             logger.info(f"Replay Recording Stopped. Final Score: {final_score}, Total Frames: {self.current_frame}, Total Events: {len(self.replay_data['events'])}")
 
     def record_event(self, event_type, value):
@@ -148,6 +152,8 @@ class FrameCapture:
     def __init__(self, camera_index=0, headless=False):
         self.cap = cv2.VideoCapture(int(camera_index))
         self.frame = None
+        # Incremented for every new frame (lets consumers skip frames they already saw)
+        self.frame_seq = 0
         self.running = False
         self.lock = threading.Lock()
         self.thread = None
@@ -170,6 +176,7 @@ class FrameCapture:
             if ret:
                 with self.lock:
                     self.frame = frame
+                    self.frame_seq += 1
             else:
                 logger.warning("Failed to read frame from camera")
             time.sleep(0.01)
@@ -591,6 +598,8 @@ class SimulatedFrameCapture(FrameCapture):
     def __init__(self, width=600, height=800, layout_config=None, socketio=None):
         self.layout = PinballLayout(config=layout_config)
         self.current_layout_id = 'default'  # Track the current layout ID
+        # Training: physics overrides applied to every engine swapped in by switch_layout
+        self.warm_layout_params = {}
         self.width = width
         self.height = height
         self.socketio = socketio
@@ -605,6 +614,18 @@ class SimulatedFrameCapture(FrameCapture):
         self.physics_engine = None
         self.current_seed = None
 
+        # Optional pool of prebuilt engines for instant layout switching
+        self.engine_pool = None
+
+        # Replay recording (training turns this off) and fast in-place resets
+        self.record_replays = os.getenv('RECORD_REPLAYS', 'true').lower() != 'false'
+        self.fast_reset = False
+        self._replay_writer = None
+
+        # Optional static geometry simplification (rail deviation in pixels, 0 = off)
+        self.simplify_tolerance = float(os.getenv('GEOMETRY_SIMPLIFY_TOLERANCE', 0)) or None
+        self._layouts_signature = None
+
         # CRITICAL: Initialize flipper_resting_angle BEFORE refresh_layouts()
         # because refresh_layouts() calls _init_physics() at line 1367
         # which uses this value for upper flippers at line 864
@@ -623,6 +644,10 @@ class SimulatedFrameCapture(FrameCapture):
         
         self.balls = [] # list of dicts: {'pos': [x,y], 'vel': [vx,vy], 'radius': r, 'lost': False}
         self.frame = np.zeros((height, width, 3), dtype=np.uint8)
+        self.frame_seq = 0
+        # Display driven by another process (live training view, see set_state)
+        self.external_control = False
+        self._external_dirty = False
         self.lock = threading.Lock()
         self.running = False
         self.thread = None
@@ -800,12 +825,26 @@ class SimulatedFrameCapture(FrameCapture):
     
     def _load_available_layouts(self):
         """Scan layouts directory and build available layouts dictionary."""
-        self._available_layouts = {}
         layouts_dir = 'layouts'
         
         if not os.path.exists(layouts_dir):
+            self._available_layouts = {}
+            self._layouts_signature = None
             logger.warning(f"Layouts directory not found: {layouts_dir}")
             return
+
+        # Skip re-parsing every layout file if nothing on disk changed
+        try:
+            signature = tuple(sorted(
+                (entry.name, entry.stat().st_mtime)
+                for entry in os.scandir(layouts_dir) if entry.name.endswith('.json')
+            ))
+        except OSError:
+            signature = None
+        if signature is not None and signature == self._layouts_signature:
+            return
+        self._layouts_signature = signature
+        self._available_layouts = {}
         
         try:
             for filename in os.listdir(layouts_dir):
@@ -840,7 +879,7 @@ class SimulatedFrameCapture(FrameCapture):
             logger.error(f"Error scanning layouts directory: {e}")
 
 
-    def _init_physics(self, seed=None):
+    def _init_physics(self, seed=None, engine=None):
         if self.physics_engine:
             try:
                 # Clean up shapes to prevent memory leaks?
@@ -850,7 +889,10 @@ class SimulatedFrameCapture(FrameCapture):
                 pass
         
         # Use provided seed or generate new one
-        if seed is None:
+        if engine is not None:
+            # Prebuilt engine (EnginePool) already carries its own seed and RNGs
+            self.current_seed = engine.seed
+        elif seed is None:
             # Check if we should record (if not playing back)
             if not self.replay_manager.is_playing:
                  # Generate a random seed
@@ -861,19 +903,38 @@ class SimulatedFrameCapture(FrameCapture):
         else:
             self.current_seed = str(seed)
 
-        self.physics_engine = PymunkEngine(self.layout, self.width, self.height, seed=self.current_seed)
+        if engine is not None:
+            self.physics_engine = engine
+        else:
+            self.physics_engine = PymunkEngine(self.layout, self.width, self.height, seed=self.current_seed,
+                                               simplify_tolerance=self.simplify_tolerance)
         
         # Start recording if not replaying
         if not self.replay_manager.is_playing:
-            # Calculate hashes for recording
-            layout_hash = self.layout.get_hash()
-            config_hash = self.physics_engine.config.get_hash()
-            self.replay_manager.start_recording(self.current_seed, self.layout.name, layout_hash, config_hash)
+            if self.record_replays:
+                self._start_replay_recording()
             
             # Spawn initial ball (Ball 1)
             # Use callback to ensure safety even during init
             self.physics_engine.add_ball((self.width * 0.94, self.height * 0.9))
 
+        self._sync_game_init()
+
+    def _start_replay_recording(self):
+        # Calculate hashes for recording
+        layout_hash = self.layout.get_hash()
+        config_hash = self.physics_engine.config.get_hash()
+        self.replay_manager.start_recording(self.current_seed, self.layout.name, layout_hash, config_hash,
+                                            layout_id=self.current_layout_id)
+
+    def _reset_physics_in_place(self, seed=None):
+        """Start a new game on the existing engine: new seed, no rebuild, ball placed directly."""
+        self.current_seed = str(time.time_ns()) if seed is None else str(seed)
+        self.physics_engine.reset_game(seed=self.current_seed, ball_pos=(self.width * 0.94, self.height * 0.9))
+        self._sync_game_init()
+
+    def _sync_game_init(self):
+        """Capture-side state and frontend notification after (re)initializing physics."""
         self.drop_target_states = [True] * len(self.layout.drop_targets)
         self.current_upper_angles = []
         for uf in self.layout.upper_flippers:
@@ -1049,20 +1110,23 @@ class SimulatedFrameCapture(FrameCapture):
         
         try:
             logger.info(f"Loading layout: {layout_name}")
-            # Load the new layout
-            self.layout = PinballLayout(filepath=filepath)
-            if 'name' in self.layout.config:
-                self.layout.name = self.layout.config['name']
+            # Reuse a prebuilt engine if the pool has one ready
+            if not self._load_pooled_layout(layout_name):
+                # Load the new layout
+                self.layout = PinballLayout(filepath=filepath)
+                if 'name' in self.layout.config:
+                    self.layout.name = self.layout.config['name']
+
+                # Reinitialize physics engine with new layout
+                # This will also start a new game with a fresh seed
+                self._init_physics()
 
             # Track the layout ID (filename without extension)
             self.set_last_layout(layout_name)
-
-            # Reinitialize physics engine with new layout
-            # This will also start a new game with a fresh seed
-            self._init_physics()
             
             # Reload available layouts (in case layout files changed)
             self._load_available_layouts()
+            self._prefetch_likely_layouts(layout_name)
             
             logger.info(f"Successfully loaded layout: {layout_name}")
             return True
@@ -1070,6 +1134,91 @@ class SimulatedFrameCapture(FrameCapture):
             logger.error(f"Failed to load layout {layout_name}: {e}")
             return False
 
+    def _ensure_engine_pool(self, max_engines=6, max_bytes=8 * 1024 * 1024):
+        if self.engine_pool is None:
+            self.engine_pool = EnginePool(self.width, self.height, max_engines=max_engines, max_bytes=max_bytes,
+                                          simplify_tolerance=self.simplify_tolerance)
+            logger.info(f"Engine pool enabled (max_engines={max_engines}, max_bytes={max_bytes})")
+        return self.engine_pool
+
+    def enable_engine_pool(self, max_engines=6, max_bytes=8 * 1024 * 1024):
+        """Start preparing engines in the background for instant layout switching."""
+        self._ensure_engine_pool(max_engines, max_bytes)
+        self._prefetch_likely_layouts(self.current_layout_id)
+        return self.engine_pool
+
+    def keep_layouts_warm(self, layout_ids):
+        """Training: have the engine pool prepare these layouts' engines in the background for switch_layout."""
+        self._ensure_engine_pool().keep_warm(layout_ids)
+
+    def _load_pooled_layout(self, layout_id):
+        """Swap in a prebuilt engine for layout_id. Returns False on a pool miss."""
+        if self.engine_pool is None:
+            return False
+
+        # A new game (and replay recording) starts on the engine as is: never take a used one
+        pooled = self.engine_pool.acquire(layout_id, fresh=True)
+        if pooled is None:
+            return False
+
+        layout, engine = pooled
+        self.layout = layout
+        self._init_physics(engine=engine)
+        logger.info(f"Swapped in prebuilt engine for layout: {layout_id}")
+        return True
+
+    def switch_layout(self, layout_id):
+        """
+        Make layout_id the active table. The outgoing engine goes back to the
+        engine pool, so switching back to a recently used (or keep-warm)
+        layout is a swap; a miss builds the engine here. No game is started
+        and the swapped-in engine may still hold the game it was released
+        with: the caller's next reset_game_state() must follow (it resets or
+        replaces the engine and gives it a fresh seed). load_layout() never
+        picks up released engines. Returns False if the layout file doesn't
+        exist.
+        """
+        if layout_id == self.current_layout_id and self.physics_engine is not None:
+            return True
+        pool = self._ensure_engine_pool()
+        pooled = pool.acquire(layout_id, refill=False)
+        if pooled is None:
+            pooled = pool.build(layout_id)
+            if pooled is None:
+                logger.error(f"Layout file not found: {os.path.join(pool.layouts_dir, f'{layout_id}.json')}")
+                return False
+            logger.info(f"Built engine for layout {layout_id} (pool miss)")
+        if self.physics_engine is not None:
+            pool.release(self.current_layout_id, self.layout, self.physics_engine)
+
+        self.layout, self.physics_engine = pooled
+        self.current_layout_id = layout_id
+        if self._needs_warm_params(self.physics_engine):
+            self.update_physics_params(self.warm_layout_params)
+        self._sync_game_init()
+        return True
+
+    def _needs_warm_params(self, engine):
+        """Whether an engine (freshly built by the pool) still lacks the training overrides."""
+        config = engine.config
+        return any(v is not None and hasattr(config, k) and getattr(config, k) != v
+                   for k, v in self.warm_layout_params.items())
+
+    def _prefetch_likely_layouts(self, layout_id):
+        """Ask the pool to prepare the current layout and its neighbours in the layout list."""
+        if self.engine_pool is None:
+            return
+
+        layout_ids = sorted(self.available_layouts.keys())
+        likely = [layout_id] if layout_id in layout_ids else []
+        if layout_id in layout_ids:
+            idx = layout_ids.index(layout_id)
+            likely.append(layout_ids[(idx + 1) % len(layout_ids)])
+            likely.append(layout_ids[(idx - 1) % len(layout_ids)])
+        else:
+            likely.extend(layout_ids[:2])
+        self.engine_pool.prefetch(likely)
+
     def add_ball(self, pos=None):
         """Add a ball to the game (delegates to physics engine)."""
         if not self.physics_engine:
@@ -1170,7 +1319,7 @@ class SimulatedFrameCapture(FrameCapture):
             traceback.print_exc()
             return False
 
-    def save_replay(self):
+    def save_replay(self, background=False):
         if self.replay_manager.is_recording:
              # Get final score before stopping recording
              final_score = self.physics_engine.score if self.physics_engine else 0
@@ -1181,22 +1330,55 @@ class SimulatedFrameCapture(FrameCapture):
              if not os.path.exists(replays_dir):
                  os.makedirs(replays_dir)
              
+             # start_recording() replaces this dict, so it is safe to hand off
              replay_data = self.replay_manager.replay_data
              # Use Game Hash as filename
              filename = f"{self.physics_engine.game_hash}.json"
              filepath = os.path.join(replays_dir, filename)
              
-             try:
-                 with open(filepath, 'w') as f:
-                     json.dump(replay_data, f)
-                 logger.info(f"Replay saved to {filepath} with score {final_score}")
-             except Exception as e:
-                 logger.error(f"Failed to save replay: {e}")
-
-    def reset_game_state(self, stop_replay=True):
-        # Save previous game replay if it exists
+             if background:
+                 if self._replay_writer is None:
+                     self._replay_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='replay-writer')
+                 self._replay_writer.submit(self._write_replay, filepath, replay_data, final_score)
+             else:
+                 self._write_replay(filepath, replay_data, final_score)
+
+    def _write_replay(self, filepath, replay_data, final_score):
+        try:
+            with open(filepath, 'w') as f:
+                json.dump(replay_data, f)
+            logger.info(f"Replay saved to {filepath} with score {final_score}")
+        except Exception as e:
+            logger.error(f"Failed to save replay: {e}")
+
+    def set_replay_recording(self, enabled):
+        """Turn replay recording on/off; disabling drops the game being recorded."""
+        self.record_replays = bool(enabled)
+        if not self.record_replays and self.replay_manager.is_recording:
+            self.replay_manager.stop_recording()
+
+    def flush_replays(self):
+        """Wait for background replay writes to finish."""
+        if self._replay_writer is not None:
+            self._replay_writer.shutdown(wait=True)
+            self._replay_writer = None
+
+    def stop(self):
+        super().stop()
+        self.flush_replays()
+        if self.engine_pool is not None:
+            self.engine_pool.stop()
+            self.engine_pool = None
+
+    def reset_game_state(self, stop_replay=True, seed=None):
+        """
+        Start a new game (with a fixed seed if given). Returns True when the
+        first ball is already on the table (fast reset), so callers can skip
+        stepping physics to spawn it.
+        """
+        # Save previous game replay if it exists (off the training thread in fast mode)
         if self.replay_manager.is_recording:
-            self.save_replay()
+            self.save_replay(background=self.fast_reset)
         
         # Stop any active replay playback if requested
         if stop_replay and self.replay_manager.is_playing:
@@ -1213,11 +1395,21 @@ class SimulatedFrameCapture(FrameCapture):
         self.drop_target_states = [True] * len(self.layout.drop_targets)
         self.respawn_timer = 0.0
         
+        # A game played on a reused engine doesn't replay the same on a fresh
+        # one (which is what playback builds), so recording takes the full reset
+        if (self.fast_reset and not self.record_replays and self.physics_engine is not None
+                and not self.replay_manager.is_playing):
+            # Reuse the engine: new seed and hash, static geometry kept
+            self._reset_physics_in_place(seed)
+            logger.debug("Reset Game State (fast): New game started with new seed")
+            return True
+
         # CRITICAL FIX: Re-initialize physics with NEW seed to ensure unique game hash
         # This generates a new seed and starts a new replay recording
-        self._init_physics()
+        self._init_physics(seed=seed)
         
         logger.info("Reset Game State: New game started with new seed")
+        return False
 
     def handle_input(self, data):
         # Ignore inputs during replay
@@ -1267,6 +1459,19 @@ class SimulatedFrameCapture(FrameCapture):
         with self.lock:
             self.input_queue.append(('nudge', data))
 
+    def chaos_multiball(self, count=50):
+        """Attraction mode: flood the table with balls (queued so it is recorded in replays)."""
+        if self.replay_manager.is_playing: return
+
+        with self.lock:
+            self.input_queue.append(('chaos_multiball', {'count': int(count)}))
+
+    def _apply_chaos_multiball(self, data):
+        if not self.physics_engine: return
+        self.physics_engine.chaos_multiball(data.get('count', 50))
+        if self.socketio:
+            self.socketio.emit('chaos_multiball', {'count': data.get('count', 50)}, namespace='/game')
+
     def _apply_nudge_input(self, data):
         direction = data.get('direction') # 'left', 'right', 'up'
         force = data.get('force', 10.0)
@@ -1372,8 +1577,11 @@ class SimulatedFrameCapture(FrameCapture):
              if os.path.exists(filepath):
                  logger.info(f"Loading layout: {filepath}")
                  try:
-                    self.layout = PinballLayout(filepath=filepath)
-                    self._init_physics()
+                    layout_id = os.path.splitext(specific_filename)[0]
+                    if not self._load_pooled_layout(layout_id):
+                        self.layout = PinballLayout(filepath=filepath)
+                        self._init_physics()
+                    self._prefetch_likely_layouts(layout_id)
                  except Exception as e:
                      logger.error(f"Failed to load specific layout: {e}")
              return
@@ -1556,6 +1764,7 @@ class SimulatedFrameCapture(FrameCapture):
                      if type == 'flipper': self._apply_flipper_input(data)
                      elif type == 'plunger': self._apply_plunger_input(data)
                      elif type == 'nudge': self._apply_nudge_input(data)
+                     elif type == 'chaos_multiball': self._apply_chaos_multiball(data)
 
         # Process Replay Inputs (Playback)
         if self.replay_manager.is_playing:
@@ -1568,6 +1777,8 @@ class SimulatedFrameCapture(FrameCapture):
                     self._apply_plunger_input(evt['value'])
                 elif evt['type'] == 'nudge':
                     self._apply_nudge_input(evt['value'])
+                elif evt['type'] == 'chaos_multiball':
+                    self._apply_chaos_multiball(evt['value'])
                 elif evt['type'] == 'add_ball':
                     # Directly add ball to physics engine to avoid recording loop
                     # (since self.add_ball records)
@@ -1627,6 +1838,8 @@ class SimulatedFrameCapture(FrameCapture):
                      self.respawn_timer = 3.0 
                  else:
                      self.game_over = True
+                     # A chaos multiball still running ends with the game
+                     self.physics_engine.disable_stress_mode()
                      # Use replay's original score if playing back, otherwise use current score
                      if self.replay_manager.is_playing and hasattr(self, 'replay_original_score'):
                          self.last_score = self.replay_original_score
@@ -1662,7 +1875,13 @@ class SimulatedFrameCapture(FrameCapture):
             dt = 0.016
             start_time = time.time()
             
-            self.manual_step(dt)
+            if self.external_control:
+                # Local sim is paused; only redraw when a new external state arrived
+                if self._external_dirty:
+                    self._external_dirty = False
+                    self._draw_frame()
+            else:
+                self.manual_step(dt)
 
             # Sleep remainder
             elapsed = time.time() - start_time
@@ -1673,9 +1892,24 @@ class SimulatedFrameCapture(FrameCapture):
                 # Headless: run as fast as possible but yield to other green threads
                 time.sleep(0)
 
+    def set_state(self, state):
+        """Show an external table state (from LiveStateRing.read()) instead of the local sim."""
+        radius = float(self.ball_radius)
+        balls = [{'pos': [x, y], 'vel': [vx, vy], 'radius': radius, 'lost': False}
+                 for x, y, vx, vy in state['balls']]
+        with self.lock:
+            self.balls = balls
+            self.score = state['score']
+            self.current_left_angle = state['left_angle']
+            self.current_right_angle = state['right_angle']
+            self.drop_target_states = state['drop_targets']
+            self.is_tilted = state['is_tilted']
+            self.tilt_value = state['tilt_value']
+        self._external_dirty = True
+
     def _draw_frame(self):
-        # Update sync variables
-        if self.physics_engine:
+        # Update sync variables (unless the display is driven externally)
+        if self.physics_engine and not self.external_control:
             # Sync balls
             self.balls = []
             for b in self.physics_engine.balls:
@@ -1854,6 +2088,7 @@ class SimulatedFrameCapture(FrameCapture):
             
         with self.lock:
              self.frame = canvas
+             self.frame_seq += 1
 
     def get_game_state(self):
         """Return current game state for frontend sync."""
@@ -2003,6 +2238,10 @@ class SimulatedFrameCapture(FrameCapture):
             self.layout.save_to_file(filepath)
             logger.info(f"✓ Saved layout configuration to {filepath}")
 
+            # Prebuilt engines for this layout are now out of date
+            if self.engine_pool is not None:
+                self.engine_pool.invalidate(os.path.splitext(os.path.basename(filepath))[0])
+
             # Keep flag set for a short time to let file system events settle
             import threading
             def clear_flag():
@@ -12,6 +12,7 @@ from flask import Flask, render_template
 from flask_socketio import SocketIO
 
 from pbwizard import constants
+from pbwizard.physics import STRESS_MAX_BALLS
 
 
 logger = logging.getLogger(__name__)
@@ -262,6 +263,23 @@ def handle_alien_nudge():
         logger.info("👽 Alien Nudge Triggered!")
 
 
+@socketio.on('chaos_multiball', namespace='/control')
+def handle_chaos_multiball(data=None):
+    """Attraction mode: flood the table with balls."""
+    if not vision_system: return
+    capture = vision_system.capture if hasattr(vision_system, 'capture') else vision_system
+
+    try:
+        count = int((data or {}).get('count', 50))
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring chaos multiball with invalid count: {data}")
+        return
+    count = max(1, min(count, STRESS_MAX_BALLS))
+    if hasattr(capture, 'chaos_multiball'):
+        capture.chaos_multiball(count)
+        logger.info(f"🌪️ Chaos Multiball Triggered ({count} balls)")
+
+
 @socketio.on('relaunch_ball', namespace='/game')
 def handle_relaunch_ball():
     if not vision_system: return
@@ -900,6 +918,17 @@ def handle_stop_training():
         logger.error("No controller attached to vision system")
 
 
+@socketio.on('pause_training', namespace='/training')
+def handle_pause_training(data=None):
+    paused = (data or {}).get('paused', True)
+    logger.info(f"Received pause_training event: paused={paused}")
+    if hasattr(vision_system, 'controller'):
+        vision_system.controller.pause_training(paused)
+        socketio.emit('training_paused', {'paused': paused}, namespace='/training')
+    else:
+        logger.error("No controller attached to vision system")
+
+
 def emit_training_finished(model_name):
     """Called by main loop when training finishes."""
     if socketio:
@@ -0,0 +1,72 @@
+import logging
+
+import numpy as np
+import gymnasium as gym
+from gymnasium import spaces
+
+
+logger = logging.getLogger(__name__)
+
+
+class RingFrameStack(gym.Wrapper):
+    """
+    Stack the last k observations along the first axis without per-step copies.
+
+    Observations of shape (C, ...) become (k * C, ...), oldest first; 1-D
+    vectors (d,) become (k * d,). Frames live in a preallocated buffer of
+    2k slots: each new frame is written twice (slot i and i + k), so the
+    last k frames are always one contiguous slice and step() returns a view.
+
+    The returned view is only valid until the next step()/reset(). Vec envs
+    copy observations into their own buffers, so that is fine for training;
+    the final observation of an episode is returned as a copy because
+    VecEnvs keep it in info['terminal_observation'] across the reset.
+    """
+
+    def __init__(self, env, k=4):
+        super().__init__(env)
+        if k < 1:
+            raise ValueError("k must be >= 1")
+        space = env.observation_space
+        if not isinstance(space, spaces.Box):
+            raise TypeError("RingFrameStack only supports Box observation spaces")
+
+        self.k = k
+        self.frame_shape = space.shape
+        self.rows = space.shape[0] if space.shape else 1
+        self._buffer = np.zeros((2 * k * self.rows,) + space.shape[1:], dtype=space.dtype)
+        self._index = 0
+
+        self.observation_space = spaces.Box(
+            low=np.concatenate([space.low] * k, axis=0),
+            high=np.concatenate([space.high] * k, axis=0),
+            dtype=space.dtype
+        )
+
+    def _push(self, obs):
+        rows = self.rows
+        start = self._index * rows
+        self._buffer[start:start + rows] = obs
+        self._buffer[start + self.k * rows:start + (self.k + 1) * rows] = obs
+        self._index = (self._index + 1) % self.k
+
+    def _view(self):
+        # Window of the k most recent frames, oldest first
+        start = self._index * self.rows
+        return self._buffer[start:start + self.k * self.rows]
+
+    def reset(self, **kwargs):
+        obs, info = self.env.reset(**kwargs)
+        # Fill the history with the first frame so no stale episode leaks in
+        self._index = 0
+        for _ in range(self.k):
+            self._push(obs)
+        return self._view(), info
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        self._push(obs)
+        view = self._view()
+        if terminated or truncated:
+            view = view.copy()
+        return view, reward, terminated, truncated, info
@@ -0,0 +1,38 @@
+import os
+import sys
+import argparse
+import logging
+
+from pbwizard import threads
+
+# One thread per pool unless told otherwise; must precede the torch import
+threads.default_env(1)
+
+from pbwizard import remote
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+# Force Headless Mode for Simulation
+os.environ['HEADLESS_SIM'] = 'true'
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Remote rollout worker: plays headless tables for a training coordinator "
+                    "started with train.py --remote-listen (or the 'remote_listen' config key). "
+                    "The env settings come from the coordinator.")
+    parser.add_argument("--connect", required=True, help="Coordinator address (tcp://host:port or unix:///path)")
+    parser.add_argument("--n-envs", type=int, default=1, help="Tables played by this worker")
+    parser.add_argument("--timeout", type=float, default=remote.DEFAULT_CONNECT_TIMEOUT,
+                        help="Seconds to keep retrying the connection")
+    args = parser.parse_args()
+    # Every drained step logs a warning; nobody is watching this process
+    logging.getLogger('pbwizard.environment').setLevel(logging.ERROR)
+
+    # Policy inference on a handful of observations: one thread is plenty
+    threads.apply({'threads': 1}, name="rollout worker")
+    sent = remote.run_worker(args.connect, n_envs=max(1, args.n_envs), connect_timeout=args.timeout)
+    logger.info(f"Rollout worker done: {sent} transitions sent")
+    sys.exit(0 if sent else 1)
@@ -0,0 +1,48 @@
+import unittest
+import os
+import sys
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbwizard import autotune
+
+
+class TestAutotune(unittest.TestCase):
+    def test_valid_ppo_settings(self):
+        self.assertTrue(autotune.valid_ppo_settings(4, 256, 128))
+        # batch must tile the rollout and fit in it
+        self.assertFalse(autotune.valid_ppo_settings(3, 100, 64))
+        self.assertFalse(autotune.valid_ppo_settings(1, 64, 128))
+        self.assertFalse(autotune.valid_ppo_settings(1, 64, 1))
+
+    def test_sweep_picks_fastest_valid(self):
+        calls = []
+
+        def fake_measure(config, n_envs, n_steps, batch_size, threads, device='cpu', **kwargs):
+            calls.append((n_envs, n_steps, batch_size, threads))
+            # More envs and bigger batches are "faster" here
+            sps = n_envs * 1000 + batch_size + threads
+            return {'n_envs': n_envs, 'n_steps': n_steps, 'batch_size': batch_size, 'torch_threads': threads,
+                    'device': device, 'steps_per_sec': float(sps)}
+
+        config = {'autotune_envs': [1, 2], 'autotune_n_steps': [64, 96], 'autotune_batch_sizes': [32, 128],
+                  'autotune_threads': [1, 2], 'autotune_devices': ['cpu'], 'autotune_probe_n_steps': 64,
+                  'autotune_probe_batch_size': 32}
+        report = autotune.autotune(config, measure=fake_measure)
+        chosen = report['chosen']
+
+        for n_envs, n_steps, batch, _ in calls:
+            self.assertTrue(autotune.valid_ppo_settings(n_envs, n_steps, batch))
+        # 96 * 2 = 192 is not divisible by 128, so that pair is never measured
+        self.assertNotIn((2, 96, 128, 2), calls)
+        self.assertEqual(chosen, {'n_envs': 2, 'n_steps': 64, 'batch_size': 128, 'torch_threads': 2, 'device': 'cpu'})
+        self.assertEqual(len(report['measurements']), len(calls))
+
+    def test_real_measurement(self):
+        r = autotune.measure_throughput({'layout': 'default'}, 1, 32, 16, 1)
+        self.assertEqual(r['timesteps'], 32)
+        self.assertGreater(r['steps_per_sec'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+from unittest.mock import MagicMock
+
+from pbwizard.backend import EnvBackend
+from pbwizard.environment import PinballEnv
+from pbwizard.constants import ACTION_NOOP, ACTION_NUDGE_LEFT
+
+
+class CaptureStub:
+    def __init__(self):
+        self.width = 450
+        self.height = 800
+        self.ball_lost = False
+        self.drop_target_states = [True, False]
+        self.physics_engine = 'engine_a'
+        self.steps = []
+
+    def manual_step(self, dt=None, render=True):
+        self.steps.append((dt, render))
+
+    def get_ball_status(self):
+        return (1.0, 2.0), (3.0, 4.0)
+
+    def get_score(self):
+        return 42
+
+
+class WrapperStub:
+    def __init__(self, capture):
+        self.capture = capture
+
+    def manual_step(self, dt=None):
+        raise AssertionError("capture.manual_step should take priority")
+
+    def get_ball_status(self):
+        return (9.0, 9.0), (0.0, 0.0)
+
+
+class TestEnvBackend(unittest.TestCase):
+    def test_resolution_priority(self):
+        cap = CaptureStub()
+        backend = EnvBackend.from_vision(WrapperStub(cap))
+
+        # Wrapper methods win for status, capture wins for stepping
+        self.assertEqual(backend.ball_status(), ((9.0, 9.0), (0.0, 0.0)))
+        backend.step(0.016)
+        self.assertEqual(cap.steps, [(0.016, False)])
+        self.assertEqual(backend.score(None), 42)
+        self.assertEqual(backend.dimensions(), (450, 800))
+        self.assertIsNone(backend.nudge_left)
+        self.assertIs(backend.capture, cap)
+
+    def test_live_attributes_are_not_cached(self):
+        cap = CaptureStub()
+        backend = EnvBackend.from_capture(cap)
+
+        # Layout switches replace the engine; the backend must follow
+        cap.physics_engine = 'engine_b'
+        cap.ball_lost = True
+        cap.drop_target_states = [False]
+        self.assertEqual(backend.physics_engine(), 'engine_b')
+        self.assertTrue(backend.ball_lost())
+        self.assertEqual(backend.drop_targets(), [False])
+
+    def test_score_reader_fallback(self):
+        score_reader = MagicMock()
+        score_reader.read_score.return_value = 7
+        backend = EnvBackend.from_vision(object(), score_reader)
+
+        self.assertIsNone(backend.score(None))
+        self.assertEqual(backend.score('frame'), 7)
+
+    def test_unknown_member_rejected(self):
+        with self.assertRaises(ValueError):
+            EnvBackend(teleport=lambda: None)
+
+    def test_custom_backend_drives_env(self):
+        nudges = []
+        frames = []
+        backend = EnvBackend(
+            step=frames.append,
+            ball_status=lambda: ((225.0, 400.0), (50.0, -50.0)),
+            score=lambda frame: 0,
+            events=lambda: [],
+            dimensions=lambda: (450, 800),
+            nudge_left=lambda: nudges.append('left'),
+        )
+        env = PinballEnv(None, MagicMock(), None, headless=True, backend=backend)
+        env.reset()
+        frames.clear()
+
+        obs, reward, terminated, _, _ = env.step(ACTION_NOOP)
+        self.assertEqual(frames, [0.016])
+        self.assertAlmostEqual(obs[0], 0.5)
+        self.assertFalse(terminated)
+
+        env.step(ACTION_NUDGE_LEFT)
+        self.assertEqual(nudges, ['left'])
+
+
+if __name__ == '__main__':
+    unittest.main()
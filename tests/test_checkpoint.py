@@ -0,0 +1,106 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import numpy as np
+import torch
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import VecNormalize
+
+from pbwizard import agent, checkpoint, env_factory
+from pbwizard.observation import BALL_FEATURES, FIXED_FEATURES
+
+
+def make_model(n_steps=32):
+    venv, cap = env_factory.make_training_vec_env({'layout': 'default'})
+    venv = VecNormalize(venv, norm_obs=True, norm_reward=True, clip_obs=10.)
+    return PPO("MlpPolicy", venv, n_steps=n_steps, batch_size=16, n_epochs=1, device='cpu', verbose=0), cap
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.model, self.cap = make_model()
+        self.model.learn(total_timesteps=32)
+
+    def tearDown(self):
+        self.cap.stop()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_snapshot_write_restore(self):
+        writer = checkpoint.CheckpointWriter(self.tmp, keep=2)
+        state = checkpoint.snapshot(self.model)
+        expected_next = np.random.rand()
+        path = writer.submit(state)
+        writer.close()
+        self.assertTrue(os.path.exists(path))
+
+        fresh, cap = make_model()
+        try:
+            checkpoint.restore(fresh, checkpoint.resolve(self.tmp))
+            self.assertEqual(fresh.num_timesteps, 32)
+            for a, b in zip(self.model.policy.parameters(), fresh.policy.parameters()):
+                self.assertTrue(torch.equal(a.detach(), b.detach()))
+            norm = fresh.get_env()
+            np.testing.assert_array_equal(norm.obs_rms.mean, self.model.get_env().obs_rms.mean)
+            self.assertEqual(norm.obs_rms.count, self.model.get_env().obs_rms.count)
+            # RNG streams continue from the snapshot
+            self.assertEqual(np.random.rand(), expected_next)
+        finally:
+            cap.stop()
+
+    def test_keep_last_and_resolve(self):
+        writer = checkpoint.CheckpointWriter(self.tmp, keep=2)
+        for steps in (100, 200, 300):
+            writer.submit(dict(checkpoint.snapshot(self.model), num_timesteps=steps))
+        writer.close()
+        self.assertEqual([s for s, _ in checkpoint.list_checkpoints(self.tmp)], [200, 300])
+        self.assertTrue(checkpoint.resolve(self.tmp).endswith("ckpt_300.pt"))
+        self.assertIsNone(checkpoint.resolve(os.path.join(self.tmp, "missing")))
+
+    def test_agent_resume_counts_from_checkpoint(self):
+        writer = checkpoint.CheckpointWriter(self.tmp)
+        writer.submit(checkpoint.snapshot(self.model))
+        writer.close()
+
+        venv = self.model.get_env()
+        rl = agent.RLAgent(env=venv)
+        rl.train(total_timesteps=64, hyperparams={'n_steps': 32, 'batch_size': 16}, resume_from=self.tmp)
+        self.assertEqual(rl.model.num_timesteps, 64)
+
+    def test_inference_uses_saved_normalization(self):
+        model_path = os.path.join(self.tmp, "m_v1")
+        self.model.save(model_path)
+        self.assertTrue(checkpoint.save_vec_normalize(self.model, agent.vec_normalize_path(model_path)))
+
+        rl = agent.RLAgent(model_path=model_path + ".zip")
+        self.assertIsNotNone(rl.obs_rms)
+        obs = np.full(8, 0.5, dtype=np.float32)
+        expected = self.model.get_env().normalize_obs(obs)
+        np.testing.assert_allclose(rl.normalize_observation(obs), expected, rtol=1e-5)
+        rl.predict(obs)
+
+    def test_model_obs_layout_is_saved_and_used(self):
+        # 8-dim obs with 4 stacked frames has the size of a 3-slot multiball observation
+        stacked = 4 * 8
+        self.assertIsNone(agent.multiball_observation_for(None, stacked))
+        self.assertIsNone(agent.multiball_observation_for({'obs_mode': 'single', 'frame_stack': 4}, stacked))
+        self.assertEqual(agent.multiball_observation_for({'obs_mode': 'multiball', 'ball_slots': 3}, stacked).ball_slots, 3)
+        self.assertEqual(agent.multiball_observation_for(None, 4 * BALL_FEATURES + FIXED_FEATURES).ball_slots, 4)
+
+        model_path = os.path.join(self.tmp, "m_v1")
+        self.model.save(model_path)
+        rl = agent.RLAgent(model_path=model_path + ".zip")
+        self.assertIsNone(rl.obs_meta)
+        meta = agent.save_obs_meta(model_path, {'obs_mode': 'multiball', 'ball_slots': 2})
+        self.assertTrue(rl.load_model(model_path + ".zip"))
+        self.assertEqual(rl.obs_meta, meta)
+        self.assertEqual(rl.multiball_observation().ball_slots, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from unittest.mock import MagicMock
+import os
+import sys
+import threading
+import time
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbwizard.control import ControlChannel, VERSION
+import train
+
+
+class TestControlChannel(unittest.TestCase):
+    def setUp(self):
+        self.main = ControlChannel.create()
+        self.worker = ControlChannel.attach(self.main.name)
+
+    def tearDown(self):
+        self.worker.close()
+        self.main.close()
+
+    def test_poll_only_reports_changes(self):
+        self.assertFalse(self.worker.changed())
+        self.assertIsNone(self.worker.poll())
+
+        self.main.set_paused(True)
+        self.assertTrue(self.worker.changed())
+        cmd = self.worker.poll()
+        self.assertTrue(cmd.paused)
+        self.assertFalse(cmd.stop)
+        self.assertIsNone(cmd.rewards)
+        self.assertIsNone(self.worker.poll())
+
+        self.main.set_paused(False)
+        self.main.request_stop()
+        cmd = self.worker.poll()
+        self.assertFalse(cmd.paused)
+        self.assertTrue(cmd.stop)
+
+    def test_reward_updates_merge(self):
+        # Two updates between polls: neither is lost
+        self.main.update_rewards({'bumper_hit': 2.0})
+        self.main.update_rewards({'rail_hit': 0.1})
+        cmd = self.worker.poll()
+        self.assertEqual(cmd.rewards, {'bumper_hit': 2.0, 'rail_hit': 0.1})
+
+        self.main.set_paused(True)
+        # Rewards are only delivered when they changed
+        self.assertIsNone(self.worker.poll().rewards)
+
+    def test_write_in_progress_is_skipped(self):
+        self.main.header[VERSION] += 1
+        self.assertIsNone(self.worker.poll())
+        self.main.header[VERSION] += 1
+        self.assertIsNotNone(self.worker.poll())
+
+    def test_clear(self):
+        self.main.request_stop()
+        self.main.update_rewards({'bumper_hit': 2.0})
+        self.main.clear()
+        cmd = self.worker.poll()
+        self.assertFalse(cmd.stop)
+        self.main.update_rewards({'rail_hit': 0.1})
+        self.assertEqual(self.worker.poll().rewards, {'rail_hit': 0.1})
+
+
+class TestControlCallback(unittest.TestCase):
+    def setUp(self):
+        self.main = ControlChannel.create()
+        self.callback = train.ControlCallback(ControlChannel.attach(self.main.name), pause_poll=0.01)
+        self.callback.model = MagicMock()
+        self.venv = self.callback.model.get_env.return_value
+
+    def tearDown(self):
+        self.callback.channel.close()
+        self.main.close()
+
+    def test_rewards_and_stop(self):
+        self.assertTrue(self.callback._on_step())
+        self.main.update_rewards({'bumper_hit': 2.0})
+        self.assertTrue(self.callback._on_step())
+        self.venv.env_method.assert_called_once_with('update_rewards', {'bumper_hit': 2.0})
+        self.main.request_stop()
+        self.assertFalse(self.callback._on_step())
+
+    def test_pause_blocks_until_resumed(self):
+        self.main.set_paused(True)
+        result = {}
+        t = threading.Thread(target=lambda: result.setdefault('ok', self.callback._on_step()))
+        t.start()
+        time.sleep(0.05)
+        self.assertTrue(t.is_alive())
+        self.main.set_paused(False)
+        t.join(timeout=1.0)
+        self.assertFalse(t.is_alive())
+        self.assertTrue(result['ok'])
+
+
+if __name__ == '__main__':
+    unittest.main()
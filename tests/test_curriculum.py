@@ -0,0 +1,106 @@
+import unittest
+import os
+import sys
+import time
+from unittest.mock import MagicMock
+import numpy as np
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbwizard import env_factory
+from pbwizard.curriculum import LayoutCurriculum
+
+
+class TestLayoutCurriculum(unittest.TestCase):
+    def test_weights_shift_toward_lowest_reward(self):
+        curriculum = LayoutCurriculum(['a', 'b', 'c'], min_share=0.1, rate=1.0, seed=0)
+        weights = curriculum.update({'a': 5.0, 'b': 1.0, 'c': 3.0})
+        self.assertEqual(int(np.argmax(weights)), 1)
+        self.assertEqual(int(np.argmin(weights)), 0)
+        self.assertGreaterEqual(weights.min(), 0.1)
+        self.assertAlmostEqual(weights.sum(), 1.0)
+
+    def test_initial_weights_and_assignment(self):
+        curriculum = LayoutCurriculum({'a': 3, 'b': 1}, seed=0)
+        self.assertEqual(curriculum.assign(4), ['a', 'a', 'a', 'b'])
+        # Fewer workers than layouts still yields one layout per worker
+        curriculum = LayoutCurriculum(['a', 'b', 'c'], seed=0)
+        self.assertEqual(len(curriculum.assign(2)), 2)
+
+    def test_apply_moves_few_workers(self):
+        venv = MagicMock(num_envs=4)
+        curriculum = LayoutCurriculum({'a': 1, 'b': 1}, seed=0)
+        curriculum.weights = np.array([0.75, 0.25])
+        result = curriculum.apply(venv, ['a', 'b', 'b', 'a'])
+        self.assertEqual(sorted(result), ['a', 'a', 'a', 'b'])
+        # Only one of the two 'b' workers had to switch
+        venv.env_method.assert_called_once()
+        args, kwargs = venv.env_method.call_args
+        self.assertEqual(args, ('set_layout', 'a'))
+        self.assertIn(kwargs['indices'][0], (1, 2))
+
+
+class TestLayoutSwitching(unittest.TestCase):
+    def setUp(self):
+        self.env, self.cap = env_factory.make_training_env({'layout': 'default'}, monitor=False)
+
+    def tearDown(self):
+        self.cap.stop()
+
+    def test_pinned_layout_keeps_engines_warm(self):
+        default_engine = self.cap.physics_engine
+        self.env.set_layout('slalom')
+        self.env.reset()
+        self.assertEqual(self.env.current_layout(), 'slalom')
+        slalom_engine = self.cap.physics_engine
+        self.assertIsNot(slalom_engine, default_engine)
+        # Training overrides reach engines built for a switch
+        self.assertTrue(slalom_engine.config.auto_plunge_enabled)
+        self.env.step(0)
+
+        self.env.set_layout('default')
+        self.env.reset()
+        self.assertIs(self.cap.physics_engine, default_engine)
+        self.env.set_layout('slalom')
+        self.env.reset()
+        self.assertIs(self.cap.physics_engine, slalom_engine)
+        _, _, _, _, _ = self.env.step(1)
+        self.assertEqual(len(self.cap.physics_engine.balls), 1)
+        # Outgoing engines live in the capture's (capped) engine pool
+        self.assertIs(self.cap.engine_pool._entries['default']['engine'], default_engine)
+
+    def test_train_layouts_are_prepared_in_background(self):
+        env, cap = env_factory.make_training_env({'layout': 'default', 'train_layouts': ['slalom']}, monitor=False)
+        try:
+            pool = cap.engine_pool
+            deadline = time.time() + 10
+            while 'slalom' not in pool._entries and time.time() < deadline:
+                time.sleep(0.01)
+            prebuilt = pool._entries['slalom']['engine']
+            env.set_layout('slalom')
+            env.reset()
+            self.assertIs(cap.physics_engine, prebuilt)
+            self.assertTrue(prebuilt.config.auto_plunge_enabled)
+        finally:
+            cap.stop()
+
+    def test_random_layouts(self):
+        self.env.random_layouts = True
+        self.env.layout_pool = ['default', 'slalom']
+        seen = set()
+        for seed in range(8):
+            self.env.reset(seed=seed)
+            seen.add(self.env.current_layout())
+            self.env.step(0)
+        self.assertEqual(seen, {'default', 'slalom'})
+
+    def test_env_layouts_pin_workers(self):
+        venv, cap = env_factory.make_training_vec_env({'layout': 'default', 'env_layouts': ['slalom']})
+        try:
+            self.assertEqual(cap.current_layout_id, 'slalom')
+        finally:
+            cap.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
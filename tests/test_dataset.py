@@ -0,0 +1,88 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+import numpy as np
+from gymnasium import spaces
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbwizard import dataset, env_factory, rewards
+from pbwizard.physics import COLLISION_TYPE_BUMPER
+
+
+class TestTransitionWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.space = spaces.Box(low=0, high=1, shape=(8,), dtype=np.float32)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_shards_and_round_trip(self):
+        writer = dataset.TransitionWriter(self.tmp, self.space, shard_size=4, flush_every=2)
+        events = [{'type': 'collision', 'code': COLLISION_TYPE_BUMPER}] * 2 + [{'type': 'nudge'}]
+        for i in range(10):
+            writer.add(np.full(8, i, dtype=np.float32), i % 4, float(i), i == 9, False,
+                       events if i == 3 else [])
+        # Two full shards indexed so far, the third is still open
+        with open(os.path.join(self.tmp, dataset.INDEX_FILE)) as f:
+            self.assertEqual(len(json.load(f)['shards']), 2)
+        writer.close()
+
+        data = dataset.TransitionDataset(self.tmp)
+        self.assertEqual(len(data), 10)
+        self.assertEqual([length for _, _, length in data.shards()], [4, 4, 2])
+        batches = list(data.iter_batches(batch_size=3))
+        obs = np.concatenate([b['obs'] for b in batches])
+        np.testing.assert_array_equal(obs[:, 0], np.arange(10))
+        rewards_ = np.concatenate([b['reward'] for b in batches])
+        np.testing.assert_array_equal(rewards_, np.arange(10, dtype=np.float32))
+        done = np.concatenate([b['done'] for b in batches])
+        self.assertEqual(done[9], dataset.DONE_TERMINATED)
+        self.assertEqual(done[:9].sum(), 0)
+        counts = np.concatenate([b['events'] for b in batches])
+        self.assertEqual(counts[3, COLLISION_TYPE_BUMPER], 2)
+        self.assertEqual(counts[3, rewards.EVENT_NONE], 0)
+        self.assertEqual(counts.sum(), 2)
+
+    def test_shuffled_batches_cover_everything(self):
+        writer = dataset.TransitionWriter(self.tmp, self.space, shard_size=5)
+        for i in range(12):
+            writer.add(np.full(8, i, dtype=np.float32), 0, 0.0, False, False)
+        writer.close()
+        data = dataset.TransitionDataset(self.tmp)
+        seen = np.concatenate([b['obs'][:, 0] for b in data.iter_batches(4, fields=['obs'], shuffle=True, seed=1)])
+        self.assertEqual(sorted(seen.tolist()), list(range(12)))
+
+
+class TestEnvRecording(unittest.TestCase):
+    def test_env_records_transitions(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            env, cap = env_factory.make_training_env({'layout': 'default', 'record_transitions': tmp,
+                                                      'transition_shard_size': 16}, monitor=False)
+            try:
+                obs, _ = env.reset()
+                steps = 0
+                for _ in range(40):
+                    obs, _, terminated, truncated, _ = env.step(env.action_space.sample())
+                    steps += 1
+                    if terminated or truncated:
+                        env.reset()
+            finally:
+                env.close()
+                cap.stop()
+
+            data = dataset.TransitionDataset(tmp)
+            self.assertEqual(len(data), steps)
+            last = np.concatenate([b['obs'] for b in data.iter_batches(64)])[-1]
+            np.testing.assert_array_equal(last.shape, env.observation_space.shape)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
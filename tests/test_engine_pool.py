@@ -0,0 +1,159 @@
+import unittest
+import os
+import sys
+import time
+import numpy as np
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbwizard.engine_pool import EnginePool
+from pbwizard.vision import SimulatedFrameCapture
+
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestEnginePool(unittest.TestCase):
+    def setUp(self):
+        self.layout_ids = sorted(f[:-5] for f in os.listdir('layouts') if f.endswith('.json'))
+
+    def test_prefetch_and_acquire(self):
+        pool = EnginePool(450, 800, max_engines=4)
+        try:
+            layout_id = self.layout_ids[0]
+            pool.prefetch([layout_id])
+            self.assertTrue(wait_for(lambda: layout_id in pool._entries))
+
+            pooled = pool.acquire(layout_id)
+            self.assertIsNotNone(pooled)
+            layout, engine = pooled
+            self.assertIs(engine.layout, layout)
+            self.assertEqual(pool.hits, 1)
+
+            # Engines are handed out once; the slot is refilled in the background
+            self.assertTrue(wait_for(lambda: layout_id in pool._entries))
+            _, engine2 = pool.acquire(layout_id)
+            self.assertIsNot(engine, engine2)
+        finally:
+            pool.stop()
+
+    def test_miss_returns_none(self):
+        pool = EnginePool(450, 800)
+        try:
+            self.assertIsNone(pool.acquire('does_not_exist'))
+            self.assertEqual(pool.misses, 1)
+        finally:
+            pool.stop()
+
+    def test_lru_eviction_respects_limits(self):
+        if len(self.layout_ids) < 3:
+            self.skipTest("Need at least 3 layouts")
+        pool = EnginePool(450, 800, max_engines=2)
+        try:
+            for layout_id in self.layout_ids[:3]:
+                pool.prefetch([layout_id])
+                self.assertTrue(wait_for(lambda: layout_id in pool._entries))
+            self.assertEqual(list(pool._entries.keys()), self.layout_ids[1:3])
+
+            # Byte cap: a single engine must always be kept even if it is over budget
+            pool.max_bytes = 1
+            pool.prefetch([self.layout_ids[0]])
+            self.assertTrue(wait_for(lambda: self.layout_ids[0] in pool._entries))
+            self.assertEqual(list(pool._entries.keys()), [self.layout_ids[0]])
+        finally:
+            pool.stop()
+
+    def test_keep_warm_layouts_evicted_last(self):
+        if len(self.layout_ids) < 3:
+            self.skipTest("Need at least 3 layouts")
+        pool = EnginePool(450, 800, max_engines=2)
+        try:
+            warm, other, released = self.layout_ids[:3]
+            pool.keep_warm([warm])
+            self.assertTrue(wait_for(lambda: warm in pool._entries))
+            pool.prefetch([other])
+            self.assertTrue(wait_for(lambda: other in pool._entries))
+
+            # A released engine is stored as is; the oldest non-keep-warm entry makes room
+            layout, engine = pool.build(released)
+            pool.release(released, layout, engine)
+            self.assertEqual(set(pool._entries), {warm, released})
+            self.assertIs(pool.acquire(released, refill=False)[1], engine)
+            time.sleep(0.1)
+            self.assertNotIn(released, pool._entries)
+            self.assertIsNone(pool.build('does_not_exist'))
+        finally:
+            pool.stop()
+
+    def test_capture_swaps_prebuilt_engine(self):
+        sim = SimulatedFrameCapture(width=450, height=800)
+        pool = sim.enable_engine_pool(max_engines=4)
+        try:
+            target = self.layout_ids[0]
+            pool.prefetch([target])
+            self.assertTrue(wait_for(lambda: target in pool._entries))
+            prebuilt = pool._entries[target]['engine']
+
+            self.assertTrue(sim.load_layout(target))
+            self.assertIs(sim.physics_engine, prebuilt)
+            self.assertEqual(sim.current_seed, prebuilt.seed)
+            self.assertEqual(sim.current_layout_id, target)
+
+            # Engine must be usable straight away (ball is spawned on first step)
+            sim.manual_step(0.016, render=False)
+            self.assertEqual(len(sim.physics_engine.balls), 1)
+        finally:
+            pool.stop()
+
+    def test_load_layout_after_switch_away_starts_clean(self):
+        if len(self.layout_ids) < 2:
+            self.skipTest("Need at least 2 layouts")
+        sim = SimulatedFrameCapture(width=450, height=800)
+        pool = sim.enable_engine_pool(max_engines=4)
+        try:
+            first, second = self.layout_ids[:2]
+            self.assertTrue(sim.switch_layout(first))
+            used = sim.physics_engine
+            for _ in range(30):
+                sim.manual_step(0.016, render=False)
+            used.score = 1234
+            used.add_ball((200, 200))
+            used.update(0.016)
+
+            # The used engine goes back to the pool, but a new game never starts on it
+            self.assertTrue(sim.switch_layout(second))
+            self.assertTrue(pool._entries[first]['released'])
+            self.assertTrue(sim.load_layout(first))
+            self.assertIsNot(sim.physics_engine, used)
+            self.assertEqual(sim.physics_engine.score, 0)
+            sim.manual_step(0.016, render=False)
+            self.assertEqual(len(sim.physics_engine.balls), 1)
+        finally:
+            pool.stop()
+
+    def test_building_engines_leaves_global_rng_alone(self):
+        pool = EnginePool(450, 800, max_engines=4)
+        try:
+            np.random.seed(1234)
+            state = np.random.get_state()[1].copy()
+            layout_id = self.layout_ids[0]
+            pool.prefetch([layout_id])
+            self.assertTrue(wait_for(lambda: layout_id in pool._entries))
+            np.testing.assert_array_equal(np.random.get_state()[1], state)
+
+            # Each engine draws from its own seeded stream
+            _, engine = pool.acquire(layout_id)
+            twin = type(engine)(engine.layout, 450, 800, seed=engine.seed)
+            self.assertEqual(engine.np_rng.random(), twin.np_rng.random())
+        finally:
+            pool.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
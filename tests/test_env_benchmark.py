@@ -0,0 +1,49 @@
+import unittest
+import os
+import sys
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import benchmark
+
+
+class TestEnvBenchmark(unittest.TestCase):
+    def test_case_reports_phases(self):
+        r = benchmark.bench_env_case('default', balls=3, policy='scripted', steps=50, warmup=5)
+        self.assertGreater(r['steps_per_sec'], 0)
+        self.assertEqual(set(r['phase_ms']), set(benchmark.ENV_PHASES))
+        self.assertGreater(r['phase_ms']['physics'], 0)
+        self.assertGreater(r['phase_ms']['observation'], 0)
+        self.assertGreater(r['phase_ms']['reward'], 0)
+
+    def test_forced_multiball_is_regular_play(self):
+        from pbwizard import env_factory, physics
+        env, cap = env_factory.make_training_env({'layout': 'default'}, monitor=False)
+        try:
+            env.reset(seed=0)
+            engine = cap.physics_engine
+            benchmark.force_multiball(engine, 3)
+            env.step(0)
+            self.assertEqual(len(engine.balls), 3)
+            # Regular multiball: normal ball cap, balls drain instead of recycling
+            self.assertEqual(engine.max_balls, physics.DEFAULT_MAX_BALLS)
+            self.assertIsNone(engine._ball_ball_handler)
+            benchmark.force_multiball(engine, 50)
+            env.step(0)
+            self.assertEqual(len(engine.balls), engine.multiball_max_balls)
+        finally:
+            cap.stop()
+
+    def test_compare_to_baseline(self):
+        base = {'layout': 'default', 'balls': 1, 'policy': 'random', 'obs_mode': 'single', 'frame_skip': 1,
+                'steps_per_sec': 1000.0, 'reset_ms': 1.0}
+        ok = dict(base, steps_per_sec=850.0, reset_ms=1.1)
+        slow = dict(base, steps_per_sec=700.0, reset_ms=2.0)
+        other = dict(base, layout='chaos', steps_per_sec=1.0)
+
+        self.assertEqual(benchmark.compare_to_baseline([ok, other], [base], tolerance=0.2), [])
+        self.assertEqual(len(benchmark.compare_to_baseline([slow], [base], tolerance=0.2)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import os
+import sys
+from unittest.mock import MagicMock
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import VecNormalize
+
+from pbwizard import env_factory, evaluation
+from train import AsyncEvalCallback
+
+
+class TestPlayEpisodes(unittest.TestCase):
+    def setUp(self):
+        self.env, self.cap = env_factory.make_training_env({'layout': 'default'}, monitor=False)
+        self.model = PPO("MlpPolicy", self.env, n_steps=32, batch_size=16, device='cpu', verbose=0)
+
+    def tearDown(self):
+        self.cap.stop()
+
+    def test_fixed_seeds_are_reproducible(self):
+        first = evaluation.play_episodes(self.model, self.env, [3, 7], max_steps=200)
+        second = evaluation.play_episodes(self.model, self.env, [3, 7], max_steps=200)
+        self.assertEqual(first, second)
+        self.assertEqual([e['seed'] for e in first], [3, 7])
+
+    def test_summarize(self):
+        episodes = [{'score': 100, 'length': 10, 'drained': True},
+                    {'score': 300, 'length': 30, 'drained': False}]
+        summary = evaluation.summarize(episodes)
+        self.assertEqual(summary['mean_score'], 200.0)
+        self.assertEqual(summary['max_score'], 300.0)
+        self.assertEqual(summary['drain_rate'], 0.5)
+        self.assertEqual(summary['mean_length'], 20.0)
+        self.assertEqual(evaluation.summarize([])['episodes'], 0)
+
+    def test_snapshot_includes_normalization(self):
+        venv, cap = env_factory.make_training_vec_env({'layout': 'default'})
+        try:
+            venv = VecNormalize(venv, norm_obs=True, norm_reward=True)
+            model = PPO("MlpPolicy", venv, n_steps=32, batch_size=16, device='cpu', verbose=0)
+            snap = evaluation.policy_snapshot(model)
+            self.assertEqual(snap['timesteps'], 0)
+            self.assertIsNotNone(snap['obs_rms'])
+            self.assertTrue(all(t.device.type == 'cpu' for t in snap['policy'].values()))
+        finally:
+            cap.stop()
+
+
+class TestPolicyEvaluator(unittest.TestCase):
+    def test_out_of_process_evaluation(self):
+        env, cap = env_factory.make_training_env({'layout': 'default'}, monitor=False)
+        try:
+            model = PPO("MlpPolicy", env, n_steps=32, batch_size=16, device='cpu', verbose=0)
+            snap = evaluation.policy_snapshot(model, timesteps=123)
+        finally:
+            cap.stop()
+
+        evaluator = evaluation.PolicyEvaluator({'layout': 'default', 'eval_episodes': 2, 'eval_max_steps': 50})
+        try:
+            self.assertTrue(evaluator.submit(snap))
+            # Still running: further snapshots are dropped, not queued
+            self.assertFalse(evaluator.submit(snap))
+            result = evaluator.results.get(timeout=120)
+            self.assertNotIn('error', result)
+            self.assertEqual(result['timesteps'], 123)
+            self.assertEqual(result['episodes'], 2)
+            self.assertIn('default', result['layouts'])
+        finally:
+            evaluator.close()
+
+
+class TestAsyncEvalCallback(unittest.TestCase):
+    def test_submits_on_interval_and_reports(self):
+        evaluator = MagicMock()
+        evaluator.poll.return_value = []
+        evaluator.submit.return_value = True
+        status_queue = MagicMock()
+        callback = AsyncEvalCallback(evaluator, interval=100, status_queue=status_queue)
+        callback.model = MagicMock(num_timesteps=0)
+        callback._on_training_start()
+
+        with unittest.mock.patch.object(evaluation, 'policy_snapshot', return_value={}):
+            callback.num_timesteps = 50
+            callback._on_step()
+            evaluator.submit.assert_not_called()
+            callback.num_timesteps = 100
+            callback._on_step()
+            evaluator.submit.assert_called_once()
+
+        result = {'timesteps': 100, 'mean_score': 10.0, 'max_score': 20.0, 'drain_rate': 1.0,
+                  'mean_length': 5.0, 'layouts': {'default': {'mean_score': 10.0}}}
+        evaluator.poll.return_value = [result]
+        callback.num_timesteps = 101
+        callback._on_step()
+        status_queue.put.assert_called_with(('eval', result))
+        callback.model.logger.record.assert_any_call('eval/mean_score', 10.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
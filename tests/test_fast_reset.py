@@ -0,0 +1,103 @@
+import unittest
+import os
+import sys
+import threading
+from unittest.mock import patch
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbwizard.vision import SimulatedFrameCapture
+from pbwizard import env_factory
+
+
+class TestFastReset(unittest.TestCase):
+    def setUp(self):
+        self.cap = SimulatedFrameCapture(width=450, height=800)
+        self.cap.headless = True
+        self.cap.fast_reset = True
+        self.cap.set_replay_recording(False)
+
+    def tearDown(self):
+        self.cap.stop()
+
+    def test_engine_reused_with_new_game(self):
+        engine = self.cap.physics_engine
+        for _ in range(30):
+            self.cap.manual_step(0.016, render=False)
+        engine.score = 1234
+        engine.bumper_health = [0] * len(engine.bumper_health)
+        old_hash = engine.game_hash
+
+        self.assertTrue(self.cap.reset_game_state())
+
+        self.assertIs(self.cap.physics_engine, engine)
+        self.assertNotEqual(engine.game_hash, old_hash)
+        self.assertEqual(engine.seed, self.cap.current_seed)
+        self.assertEqual(engine.score, 0)
+        self.assertTrue(all(h == 100 for h in engine.bumper_health))
+        self.assertTrue(all(engine.drop_target_states))
+        # Ball placed directly, no physics step needed
+        self.assertEqual(len(engine.balls), 1)
+        self.assertAlmostEqual(engine.balls[0].position.x, 450 * 0.94)
+
+    def test_no_replay_io_when_recording_disabled(self):
+        with patch.object(self.cap, '_write_replay') as write:
+            self.cap.reset_game_state()
+            self.cap.reset_game_state()
+        write.assert_not_called()
+        self.assertFalse(self.cap.replay_manager.is_recording)
+
+    def test_replays_written_off_thread(self):
+        self.cap.set_replay_recording(True)
+        self.cap.reset_game_state()
+        self.assertTrue(self.cap.replay_manager.is_recording)
+
+        writers = []
+        with patch.object(self.cap, '_write_replay', side_effect=lambda *a: writers.append(threading.current_thread())):
+            self.cap.reset_game_state()
+            self.cap.flush_replays()
+
+        self.assertEqual(len(writers), 1)
+        self.assertIsNot(writers[0], threading.current_thread())
+
+    def test_recorded_games_replay_to_the_same_score(self):
+        def play(frames):
+            for t in range(frames):
+                if t % 60 == 10: self.cap.trigger_left()
+                if t % 60 == 40: self.cap.release_left()
+                if t % 45 == 5: self.cap.trigger_right()
+                if t % 45 == 30: self.cap.release_right()
+                self.cap.manual_step(0.016, render=False)
+
+        self.cap.set_replay_recording(True)
+        self.cap.reset_game_state(seed=1)
+        engine = self.cap.physics_engine
+        play(400)
+        # Recording takes the full reset: a reused engine would not replay the same
+        self.assertFalse(self.cap.reset_game_state(seed=2))
+        self.assertIsNot(self.cap.physics_engine, engine)
+        play(1500)
+        score = self.cap.score
+        self.assertGreater(score, 0)
+
+        self.assertTrue(self.cap.handle_load_replay(dict(self.cap.replay_manager.replay_data)))
+        for _ in range(1500):
+            self.cap.manual_step(0.016, render=False)
+        self.assertEqual(self.cap.score, score)
+
+
+class TestTrainingEnvReset(unittest.TestCase):
+    def test_reset_does_not_step_physics(self):
+        env, cap = env_factory.make_training_env({'layout': 'default'}, monitor=False)
+        try:
+            with patch.object(cap, 'manual_step', wraps=cap.manual_step) as step:
+                env.reset()
+            step.assert_not_called()
+            self.assertIsNotNone(cap.get_ball_status())
+            self.assertFalse(cap.replay_manager.is_recording)
+        finally:
+            cap.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+from unittest.mock import MagicMock
+
+from pbwizard.environment import PinballEnv
+from pbwizard.constants import ACTION_NOOP
+
+
+class StepCountingCapture:
+    """Headless capture stub: counts manual_step calls, ball drains after N frames."""
+
+    def __init__(self, drain_after=None, lost_after=None, over_after=None):
+        self.width = 450
+        self.height = 800
+        self.frames = 0
+        self.drain_after = drain_after
+        self.lost_after = lost_after
+        self.over_after = over_after
+        self.physics_engine = MagicMock()
+        self.physics_engine.get_combo_status.return_value = {
+            'combo_count': 0, 'combo_active': False, 'combo_timer': 0.0
+        }
+        self.physics_engine.get_multiplier.return_value = 1.0
+        self.physics_engine.get_events.return_value = []
+
+    def manual_step(self, dt=None, render=True):
+        self.frames += 1
+
+    @property
+    def ball_lost(self):
+        return self.lost_after is not None and self.frames >= self.lost_after
+
+    @property
+    def game_over(self):
+        return self.over_after is not None and self.frames >= self.over_after
+
+    def get_ball_status(self):
+        if self.drain_after is not None and self.frames >= self.drain_after:
+            return (225.0, 795.0), (0.0, 300.0)
+        # Mid-table, moving fast enough not to count as holding
+        return (225.0, 400.0), (50.0, -50.0)
+
+
+class HeadlessVision:
+    def __init__(self, capture):
+        self.capture = capture
+
+    def get_score(self):
+        return 0
+
+
+class TestFrameSkip(unittest.TestCase):
+    def make_env(self, frame_skip, drain_after=None, lost_after=None, over_after=None):
+        cap = StepCountingCapture(drain_after=drain_after, lost_after=lost_after, over_after=over_after)
+        env = PinballEnv(HeadlessVision(cap), MagicMock(), MagicMock(), headless=True, frame_skip=frame_skip)
+        env.reset()
+        cap.frames = 0
+        return env, cap
+
+    def test_default_is_single_frame(self):
+        env, cap = self.make_env(1)
+        env.step(ACTION_NOOP)
+        self.assertEqual(cap.frames, 1)
+        self.assertEqual(env.step_count, 1)
+
+    def test_action_repeated_and_survival_summed(self):
+        single, _ = self.make_env(1)
+        single.step(ACTION_NOOP)
+        breakdown_single = single.reward_pipeline.as_dict()
+
+        env, cap = self.make_env(4)
+        _, _, terminated, _, _ = env.step(ACTION_NOOP)
+        breakdown = env.reward_pipeline.as_dict()
+
+        self.assertFalse(terminated)
+        self.assertEqual(cap.frames, 4)
+        # Episode length is counted in physics frames, not decisions
+        self.assertEqual(env.step_count, 4)
+        self.assertAlmostEqual(breakdown['survival'],
+                               breakdown_single['survival'] * 4)
+        self.assertAlmostEqual(breakdown['height'],
+                               breakdown_single['height'] * 4)
+
+    def test_repeat_stops_early_on_drain(self):
+        env, cap = self.make_env(8, drain_after=3)
+        _, reward, terminated, _, _ = env.step(ACTION_NOOP)
+
+        self.assertEqual(cap.frames, 3)
+        self.assertTrue(terminated)
+        self.assertLess(reward, 0)
+
+    def test_repeat_stops_on_ball_lost_flag(self):
+        # Ball still mid-table, but the backend flags it as lost: same check as termination
+        env, cap = self.make_env(8, lost_after=2)
+        _, _, terminated, _, _ = env.step(ACTION_NOOP)
+
+        self.assertEqual(cap.frames, 2)
+        self.assertTrue(terminated)
+
+    def test_repeat_stops_on_game_over(self):
+        env, cap = self.make_env(8, over_after=5)
+        env.step(ACTION_NOOP)
+        self.assertEqual(cap.frames, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import os
+import sys
+import numpy as np
+import gymnasium as gym
+from gymnasium import spaces
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbwizard import env_factory
+from pbwizard.wrappers import RingFrameStack
+
+
+class CountingEnv(gym.Env):
+    """Observation is filled with the step count; terminates after `length` steps."""
+
+    def __init__(self, shape=(2,), length=10):
+        self.observation_space = spaces.Box(low=0, high=1000, shape=shape, dtype=np.float32)
+        self.action_space = spaces.Discrete(1)
+        self.length = length
+        self.t = 0
+
+    def reset(self, seed=None, options=None):
+        self.t = 0
+        return np.full(self.observation_space.shape, 0, dtype=np.float32), {}
+
+    def step(self, action):
+        self.t += 1
+        obs = np.full(self.observation_space.shape, self.t, dtype=np.float32)
+        return obs, 0.0, self.t >= self.length, False, {}
+
+
+class TestRingFrameStack(unittest.TestCase):
+    def test_stack_order_and_reset_fill(self):
+        env = RingFrameStack(CountingEnv(shape=(2,)), k=3)
+        self.assertEqual(env.observation_space.shape, (6,))
+
+        obs, _ = env.reset()
+        np.testing.assert_array_equal(obs, np.zeros(6))
+        for t in range(1, 6):
+            obs, _, _, _, _ = env.step(0)
+            # Oldest first, newest last
+            expected = np.repeat([max(t - 2, 0), max(t - 1, 0), t], 2)
+            np.testing.assert_array_equal(obs, expected)
+
+    def test_returns_view_without_copy(self):
+        env = RingFrameStack(CountingEnv(shape=(1, 4, 4)), k=4)
+        self.assertEqual(env.observation_space.shape, (4, 4, 4))
+        env.reset()
+        obs, _, _, _, _ = env.step(0)
+        self.assertIs(obs.base, env._buffer)
+        self.assertTrue(obs.flags['C_CONTIGUOUS'])
+
+    def test_terminal_observation_survives_reset(self):
+        env = RingFrameStack(CountingEnv(length=2), k=2)
+        env.reset()
+        env.step(0)
+        last, _, terminated, _, _ = env.step(0)
+        self.assertTrue(terminated)
+        env.reset()
+        np.testing.assert_array_equal(last, [1, 1, 2, 2])
+        self.assertTrue(env.observation_space.contains(last))
+
+    def test_factory_pixels(self):
+        env, cap = env_factory.make_training_env({'layout': 'default', 'obs_mode': 'pixels',
+                                                  'pixel_shape': [42, 42], 'frame_stack': 4}, monitor=False)
+        try:
+            self.assertEqual(env.observation_space.shape, (4, 42, 42))
+            env.reset()
+            obs, _, _, _, _ = env.step(0)
+            self.assertTrue(env.observation_space.contains(obs))
+        finally:
+            cap.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
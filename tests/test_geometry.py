@@ -0,0 +1,75 @@
+import unittest
+import os
+import sys
+import math
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbwizard.geometry import simplify_polyline, simplify_rails, drop_degenerate_points
+from pbwizard.physics import PymunkEngine
+from pbwizard.vision import PinballLayout
+
+
+class TestGeometrySimplification(unittest.TestCase):
+    def test_collinear_points_collapse(self):
+        points = [(0, 0), (10, 0), (20, 0), (30, 0)]
+        simplified, error = simplify_polyline(points, 0.5)
+        self.assertEqual(simplified, [(0, 0), (30, 0)])
+        self.assertEqual(error, 0.0)
+
+    def test_corner_is_kept(self):
+        points = [(0, 0), (10, 0), (10, 10)]
+        simplified, _ = simplify_polyline(points, 0.5)
+        self.assertEqual(simplified, points)
+
+    def test_error_is_bounded(self):
+        # Quarter circle sampled finely
+        points = [(100 * math.cos(a / 50 * math.pi / 2), 100 * math.sin(a / 50 * math.pi / 2)) for a in range(51)]
+        for tolerance in (0.5, 2.0, 5.0):
+            simplified, error = simplify_polyline(points, tolerance)
+            self.assertLess(len(simplified), len(points))
+            self.assertLessEqual(error, tolerance)
+
+    def test_degenerate_and_duplicates_removed(self):
+        self.assertEqual(drop_degenerate_points([(0, 0), (0, 0), (5, 5)]), [(0, 0), (5, 5)])
+
+        polylines = [
+            [(0, 0), (10, 0)],
+            [(10, 0), (0, 0)],          # Same rail, reversed
+            [(50, 50), (50, 50)],       # Zero length
+        ]
+        segments, report = simplify_rails(polylines, 1.0)
+        self.assertEqual(len(segments), 1)
+        self.assertEqual(report['segments_before'], 3)
+        self.assertEqual(report['removed_degenerate'], 1)
+
+    def test_touching_collinear_rails_merge(self):
+        polylines = [[(0, 0), (10, 0)], [(10, 0), (20, 0)], [(20, 0), (30, 0)]]
+        segments, report = simplify_rails(polylines, 0.5)
+        self.assertEqual(segments, [((0, 0), (30, 0))])
+        self.assertEqual(report['segments_after'], 1)
+
+    def test_engine_reports_reduction(self):
+        layout = PinballLayout(filepath='layouts/default.json')
+        # Shallow curved rail (10 segments) plus two touching collinear rails
+        layout.rails = list(layout.rails) + [
+            {'p1': {'x': 0.2, 'y': 0.3}, 'p2': {'x': 0.6, 'y': 0.3},
+             'c1': {'x': 0.3, 'y': 0.302}, 'c2': {'x': 0.5, 'y': 0.302}},
+            {'p1': {'x': 0.1, 'y': 0.5}, 'p2': {'x': 0.2, 'y': 0.5}},
+            {'p1': {'x': 0.2, 'y': 0.5}, 'p2': {'x': 0.3, 'y': 0.5}},
+        ]
+        plain = PymunkEngine(layout, 450, 800, seed='geo')
+        simplified = PymunkEngine(layout, 450, 800, seed='geo', simplify_tolerance=1.0)
+
+        self.assertIsNone(plain.geometry_report)
+        report = simplified.geometry_report
+        self.assertIsNotNone(report)
+        self.assertEqual(report['segments_before'], len(plain.rail_shapes))
+        self.assertEqual(report['segments_after'], len(simplified.rail_shapes))
+        self.assertLess(len(simplified.rail_shapes), len(plain.rail_shapes))
+        self.assertLessEqual(report['max_error'], 1.0)
+        self.assertNotEqual(plain.game_hash, simplified.game_hash)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+import numpy as np
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import VecNormalize
+
+from pbwizard import constants, env_factory, imitation
+from pbwizard.dataset import TransitionDataset, TransitionWriter
+
+
+def record_replay(steps=240, seed=5, layout='default'):
+    """Play a scripted game with replay recording on and return the replay dict."""
+    env, cap = env_factory.make_training_env({'layout': layout, 'record_replays': True}, monitor=False)
+    try:
+        env.reset(seed=seed)
+        for i in range(steps):
+            env.step((i // 20) % 4)
+        cap.replay_manager.stop_recording(cap.physics_engine.score)
+        return json.loads(json.dumps(cap.replay_manager.replay_data))
+    finally:
+        cap.stop()
+
+
+class TestFlipperTimeline(unittest.TestCase):
+    def test_hold_state_to_actions(self):
+        events = [
+            {'frame': 2, 'type': 'flipper', 'value': {'side': 'left', 'action': 'hold'}},
+            {'frame': 4, 'type': 'nudge', 'value': {'direction': 'left'}},
+            {'frame': 5, 'type': 'flipper', 'value': {'side': 'right', 'action': 'hold'}},
+            {'frame': 7, 'type': 'flipper', 'value': {'side': 'left', 'action': 'release'}},
+        ]
+        timeline = imitation.FlipperTimeline(events)
+        actions = [timeline.action_at(f) for f in range(9)]
+        self.assertEqual(actions, [constants.ACTION_NOOP] * 2 + [constants.ACTION_FLIP_LEFT] * 3 +
+                         [constants.ACTION_FLIP_BOTH] * 2 + [constants.ACTION_FLIP_RIGHT] * 2)
+
+
+class TestReplayConversion(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.replay = record_replay()
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_conversion_is_deterministic(self):
+        env, cap = env_factory.make_training_env({'layout': 'default'}, monitor=False)
+        try:
+            for name in ('a', 'b'):
+                writer = TransitionWriter(os.path.join(self.tmp, name), env.observation_space)
+                self.assertGreater(imitation.convert_replay(self.replay, env, writer, tail_frames=60), 0)
+                writer.close()
+        finally:
+            cap.stop()
+        a = next(TransitionDataset(os.path.join(self.tmp, 'a')).iter_batches(10000))
+        b = next(TransitionDataset(os.path.join(self.tmp, 'b')).iter_batches(10000))
+        np.testing.assert_array_equal(a['obs'], b['obs'])
+        np.testing.assert_array_equal(a['action'], b['action'])
+        # The scripted game used every flipper action
+        self.assertEqual(set(a['action'].tolist()), {0, 1, 2, 3})
+
+    def test_pool_conversion_and_behavior_cloning(self):
+        replay_dir = os.path.join(self.tmp, 'replays')
+        os.makedirs(replay_dir)
+        for i in range(2):
+            with open(os.path.join(replay_dir, f"game_{i}.json"), 'w') as f:
+                json.dump(self.replay, f)
+        with open(os.path.join(replay_dir, "broken.json"), 'w') as f:
+            f.write("{")
+
+        out = os.path.join(self.tmp, 'dataset')
+        result = imitation.convert_replays(replay_dir, out, config={'tail_frames': 60}, workers=2)
+        self.assertEqual(result['replays'], 3)
+        self.assertEqual(len(result['failed']), 1)
+        self.assertEqual(len(TransitionDataset(out)), result['pairs'])
+
+        venv, cap = env_factory.make_training_vec_env({'layout': 'default'})
+        try:
+            venv = VecNormalize(venv, norm_obs=True, norm_reward=True)
+            model = PPO("MlpPolicy", venv, n_steps=32, batch_size=16, device='cpu', verbose=0)
+            first = imitation.behavior_clone(model, out, epochs=1, seed=0)
+            last = imitation.behavior_clone(model, out, epochs=5, seed=0)
+            self.assertEqual(first['samples'], result['pairs'])
+            self.assertLess(last['loss'], first['loss'])
+            # Normalization stats now come from the dataset
+            self.assertEqual(venv.obs_rms.count, result['pairs'] + 1e-4)
+        finally:
+            cap.stop()
+
+
+class TestReplayLayout(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.replay = record_replay(steps=600, seed=11, layout='cathedral')
+
+    def test_resolves_table_by_hash(self):
+        # The display name is shared with the default table
+        self.assertEqual(self.replay['layout'], 'default')
+        self.assertEqual(imitation.replay_layout_id(self.replay), 'cathedral')
+        legacy = dict(self.replay, layout_id=None)
+        self.assertEqual(imitation.replay_layout_id(legacy), 'cathedral')
+        with self.assertRaises(ValueError):
+            imitation.replay_layout_id(dict(self.replay, layout_hash='0' * 32))
+
+    def test_replay_on_resolved_table_reproduces_score(self):
+        tmp = tempfile.mkdtemp()
+        layout = imitation.replay_layout_id(self.replay)
+        env, cap = env_factory.make_training_env({'layout': layout}, monitor=False)
+        try:
+            writer = TransitionWriter(tmp, env.observation_space)
+            self.assertGreater(imitation.convert_replay(self.replay, env, writer, tail_frames=0), 0)
+            writer.close()
+            self.assertEqual(cap.physics_engine.score, self.replay['final_score'])
+        finally:
+            cap.stop()
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def test_wrong_table_is_refused(self):
+        env, cap = env_factory.make_training_env({'layout': 'default'}, monitor=False)
+        try:
+            with self.assertRaises(ValueError):
+                imitation.convert_replay(self.replay, env, None)
+        finally:
+            cap.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import os
+import sys
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbwizard.live_view import LiveStateRing, SEQ
+from pbwizard.vision import SimulatedFrameCapture
+
+
+class TestLiveStateRing(unittest.TestCase):
+    def setUp(self):
+        self.cap = SimulatedFrameCapture(width=450, height=800)
+        self.cap.headless = True
+        self.cap.manual_step(0.016, render=False)
+        self.engine = self.cap.physics_engine
+        self.ring = LiveStateRing.create()
+
+    def tearDown(self):
+        self.ring.close()
+        self.cap.stop()
+
+    def test_publish_and_read_across_handles(self):
+        reader = LiveStateRing.attach(self.ring.name)
+        try:
+            self.assertIsNone(reader.read())
+            self.engine.score = 1234
+            self.ring.publish(self.engine)
+
+            state = reader.read()
+            self.assertEqual(state['score'], 1234)
+            self.assertEqual(len(state['balls']), len(self.engine.balls))
+            self.assertAlmostEqual(state['balls'][0][0], self.engine.balls[0].position.x)
+            self.assertEqual(state['drop_targets'], list(self.engine.drop_target_states))
+            # Nothing new published: the reader does not re-deliver
+            self.assertIsNone(reader.read())
+
+            for _ in range(6): # wraps the ring
+                self.ring.publish(self.engine)
+            self.assertIsNotNone(reader.read())
+        finally:
+            reader.close()
+
+    def test_slot_being_written_is_skipped(self):
+        self.ring.publish(self.engine)
+        latest = int(self.ring.header[0])
+        self.ring.records[latest, SEQ] += 1 # writer mid-update
+        self.assertIsNone(self.ring.read())
+        self.ring.records[latest, SEQ] += 1
+        self.assertIsNotNone(self.ring.read())
+
+    def test_capture_shows_external_state(self):
+        self.ring.publish(self.engine)
+        state = self.ring.read()
+        state['balls'] = [[100.0, 200.0, 0.0, 0.0], [300.0, 400.0, 0.0, 0.0]]
+        state['score'] = 99
+
+        self.cap.external_control = True
+        self.cap.set_state(state)
+        self.cap._draw_frame()
+        game = self.cap.get_game_state()
+        self.assertEqual(len(game['balls']), 2)
+        self.assertAlmostEqual(game['balls'][0]['x'], 100.0 / 450)
+        self.assertEqual(game['score'], 99)
+
+    def test_first_vec_env_worker_publishes(self):
+        import numpy as np
+        from pbwizard import env_factory
+
+        config = {'layout': 'default', 'live_view_name': self.ring.name, 'live_view_hz': 1000.0}
+        self.assertIsNone(env_factory._env_config(config, 1).get('live_view_name'))
+        venv, _ = env_factory.make_training_vec_env(config, n_envs=2)
+        try:
+            venv.reset()
+            for _ in range(5):
+                venv.step(np.zeros(2, dtype=np.int64))
+            state = self.ring.read()
+            self.assertIsNotNone(state)
+            self.assertEqual(len(state['balls']), 1)
+        finally:
+            venv.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import os
+import sys
+import numpy as np
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbwizard import env_factory
+from pbwizard.observation import MultiballObservation, BALL_FEATURES, FIXED_FEATURES, THREAT_HORIZON
+from pbwizard.vision import SimulatedFrameCapture
+
+
+class TestMultiballObservation(unittest.TestCase):
+    def setUp(self):
+        self.cap = SimulatedFrameCapture(width=450, height=800)
+        self.cap.headless = True
+        self.engine = self.cap.physics_engine
+
+    def tearDown(self):
+        self.cap.stop()
+
+    def test_slots_sorted_by_threat(self):
+        self.engine.enable_stress_mode(max_balls=10)
+        self.engine.chaos_multiball(6)
+        for _ in range(20):
+            self.cap.manual_step(0.016, render=False)
+
+        builder = MultiballObservation(ball_slots=4)
+        obs = builder.build(self.engine, 450, 800)
+        self.assertEqual(obs.shape, (4 * BALL_FEATURES + FIXED_FEATURES,))
+        self.assertTrue(np.all(obs >= -1.0) and np.all(obs <= 1.0))
+
+        # More balls than slots: every slot filled, most threatening first
+        self.assertGreater(len(self.engine.balls), 4)
+        self.assertTrue(np.all(builder.balls[:, 0] == 1.0))
+        threat = builder.balls[:, 2] + np.maximum(builder.balls[:, 4] * 800, 0) * THREAT_HORIZON / 800
+        self.assertTrue(np.all(np.diff(threat) <= 1e-6))
+
+    def test_table_state_and_empty_slots(self):
+        self.engine.bumper_health[0] = 50
+        self.engine.is_tilted = True
+        builder = MultiballObservation(ball_slots=3)
+        builder.build(self.engine, 450, 800, drop_targets=[True, False])
+
+        self.assertEqual(builder.balls[1:, 0].tolist(), [0.0, 0.0])
+        self.assertEqual(builder.drop_targets[:2].tolist(), [1.0, 0.0])
+        self.assertAlmostEqual(builder.bumpers[0], 0.5)
+        self.assertEqual(builder.tilt[0], 1.0)
+
+        # The buffer is reused between calls
+        self.assertIs(builder.build(self.engine, 450, 800), builder.buffer)
+
+    def test_from_size(self):
+        self.assertEqual(MultiballObservation.from_size(MultiballObservation(5).size).ball_slots, 5)
+        # The legacy 8-float single-ball observation is not a multiball layout
+        self.assertIsNone(MultiballObservation.from_size(8))
+
+
+class TestMultiballEnv(unittest.TestCase):
+    def test_env_multiball_mode(self):
+        env, cap = env_factory.make_training_env({'layout': 'default', 'obs_mode': 'multiball', 'ball_slots': 3},
+                                                 monitor=False)
+        try:
+            self.assertEqual(env.observation_space.shape, (3 * BALL_FEATURES + FIXED_FEATURES,))
+            env.reset()
+            obs, _, _, _, _ = env.step(0)
+            self.assertTrue(env.observation_space.contains(obs))
+            self.assertEqual(obs[0], 1.0)
+            # Returned observations are copies, not the shared builder buffer
+            self.assertIsNot(obs, env.multiball_obs.buffer)
+        finally:
+            cap.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+from unittest.mock import MagicMock
+import os
+import sys
+import numpy as np
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbwizard.backend import EnvBackend
+from pbwizard.environment import PinballEnv
+from pbwizard.pacing import ControlClock
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestControlClock(unittest.TestCase):
+    def test_processing_time_is_subtracted(self):
+        t = FakeTime()
+        clock = ControlClock(0.03, clock=t.clock, sleep=t.sleep)
+        clock.wait()
+        t.now += 0.01 # processing
+        slack = clock.wait()
+        self.assertAlmostEqual(slack, 0.02)
+        # Ticks land on a fixed 30ms grid
+        self.assertAlmostEqual(t.now, 0.06)
+        self.assertEqual(clock.deadline_misses, 0)
+
+    def test_overrun_counts_miss_and_reanchors(self):
+        t = FakeTime()
+        clock = ControlClock(0.03, clock=t.clock, sleep=t.sleep)
+        clock.wait()
+        t.now += 0.05 # overrun by 20ms
+        self.assertEqual(clock.wait(), 0.0)
+        self.assertEqual(clock.deadline_misses, 1)
+        self.assertAlmostEqual(clock.stats()['max_overrun_ms'], 20.0)
+
+        # Next tick is a full period after the late one, not an immediate catch-up
+        clock.wait()
+        self.assertAlmostEqual(t.now, 0.11)
+        self.assertEqual(clock.deadline_misses, 1)
+
+
+class TestRealtimeEnv(unittest.TestCase):
+    def make_env(self, frame_shape=(800, 450, 3), ball_pos=(100.0, 400.0)):
+        self.seq = 0
+        self.process_frame = MagicMock(return_value=(ball_pos, None))
+        backend = EnvBackend(
+            frame=lambda: np.zeros(frame_shape, dtype=np.uint8),
+            frame_seq=lambda: self.seq,
+            process_frame=self.process_frame,
+            dimensions=lambda: (450, 800),
+        )
+        env = PinballEnv(MagicMock(), MagicMock(), MagicMock(), headless=False, backend=backend,
+                         realtime_pacing=True, control_period=0.001)
+        env.reset()
+        return env
+
+    def test_stale_frames_not_reprocessed(self):
+        env = self.make_env()
+        self.seq = 1
+        obs, _, _, _, _ = env.step(0)
+        self.assertEqual(self.process_frame.call_count, 1)
+
+        # Same frame again: vision is skipped and the last estimate reused
+        obs_stale, _, _, _, _ = env.step(0)
+        self.assertEqual(self.process_frame.call_count, 1)
+        np.testing.assert_array_equal(obs[:2], obs_stale[:2])
+
+        self.seq = 2
+        env.step(0)
+        self.assertEqual(self.process_frame.call_count, 2)
+
+        stats = env.pacing_stats()
+        self.assertEqual(stats['ticks'], 3)
+        self.assertEqual(stats['stale_frames'], 1)
+
+    def test_stale_frames_keep_camera_resolution(self):
+        # Camera frames larger than the backend's nominal 450x800
+        env = self.make_env(frame_shape=(1080, 1920, 3), ball_pos=(960.0, 540.0))
+        self.seq = 1
+        obs, _, _, _, _ = env.step(0)
+        np.testing.assert_allclose(obs[:2], [0.5, 0.5])
+
+        obs_stale, _, _, _, _ = env.step(0)
+        self.assertEqual(self.process_frame.call_count, 1)
+        np.testing.assert_allclose(obs_stale[:2], [0.5, 0.5])
+
+    def test_default_pacing_unchanged(self):
+        env = PinballEnv(MagicMock(), MagicMock(), MagicMock(), headless=True, realtime_pacing=True)
+        # Pacing only applies to the real-time (non-headless) loop
+        self.assertIsNone(env.pacing_stats())
+
+
+if __name__ == '__main__':
+    unittest.main()
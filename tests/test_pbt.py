@@ -0,0 +1,97 @@
+import unittest
+import os
+import sys
+import json
+import random
+import shutil
+import tempfile
+import numpy as np
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbwizard import pbt
+
+
+class TestPBTSchedule(unittest.TestCase):
+    def test_exploit_plan_replaces_bottom_with_top(self):
+        rng = random.Random(0)
+        plan = pbt.exploit_plan([5.0, 50.0, 1.0, 30.0], 0.25, rng)
+        self.assertEqual(plan, {2: 1})
+        plan = pbt.exploit_plan([5.0, 50.0, 1.0, 30.0], 0.5, rng)
+        self.assertEqual(set(plan), {0, 2})
+        self.assertTrue(set(plan.values()) <= {1, 3})
+        self.assertEqual(pbt.exploit_plan([1.0], 0.5, rng), {})
+
+    def test_perturb_scales_and_clips(self):
+        hp = {'learning_rate': 1e-2, 'ent_coef': 0.01, 'rewards': {'bumper_hit': 0.5}}
+        out = pbt.perturb(hp, random.Random(1))
+        # Clipped to the upper bound
+        self.assertLessEqual(out['learning_rate'], pbt.HYPERPARAM_BOUNDS['learning_rate'][1])
+        self.assertIn(round(out['ent_coef'] / 0.01, 6), pbt.PERTURB_FACTORS)
+        self.assertIn(round(out['rewards']['bumper_hit'] / 0.5, 6), pbt.PERTURB_FACTORS)
+        # Source untouched
+        self.assertEqual(hp['rewards']['bumper_hit'], 0.5)
+
+    def test_initial_population(self):
+        population = pbt.initial_population({'learning_rate': 1e-3, 'pbt_reward_keys': ['rail_hit']}, 3,
+                                            np.random.default_rng(0))
+        self.assertEqual(len(population), 3)
+        self.assertEqual(population[0]['learning_rate'], 1e-3)
+        self.assertEqual(set(population[0]['rewards']), {'rail_hit'})
+        self.assertNotEqual(population[1]['learning_rate'], population[2]['learning_rate'])
+
+    def test_only_supported_hyperparams(self):
+        with self.assertRaises(ValueError):
+            pbt.initial_population({'pbt_hyperparams': ['learning_rate', 'n_epochs']}, 2, np.random.default_rng(0))
+        population = pbt.initial_population({'pbt_hyperparams': ['gamma', 'clip_range'], 'gamma': 0.999}, 8,
+                                            np.random.default_rng(0))
+        out = pbt.perturb(population[0], random.Random(0), factors=(1.25,))
+        # Discounts never reach 1
+        self.assertEqual(out['gamma'], pbt.HYPERPARAM_BOUNDS['gamma'][1])
+        for member in population:
+            for key in ('gamma', 'clip_range'):
+                low, high = pbt.HYPERPARAM_BOUNDS[key]
+                self.assertTrue(low <= member[key] <= high)
+
+    def test_apply_hyperparams_to_model(self):
+        from stable_baselines3.common.vec_env import DummyVecEnv
+        from pbwizard import agent, env_factory
+
+        env, cap = env_factory.make_training_env({'layout': 'default'}, monitor=False)
+        try:
+            venv = agent.make_vec_normalize(DummyVecEnv([lambda: env]), {})
+            model = agent.make_ppo(venv, {'n_steps': 16, 'batch_size': 16}, verbose=0)
+            pbt._apply_hyperparams(model, {'gamma': 0.95, 'gae_lambda': 0.9, 'clip_range': 0.1})
+            self.assertEqual(model.gamma, 0.95)
+            self.assertEqual(model.rollout_buffer.gamma, 0.95)
+            self.assertEqual(venv.gamma, 0.95)
+            self.assertEqual(model.rollout_buffer.gae_lambda, 0.9)
+            self.assertAlmostEqual(model.clip_range(1.0), 0.1)
+        finally:
+            cap.stop()
+
+
+class TestPBTRun(unittest.TestCase):
+    def test_two_member_run(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            config = {'layout': 'default', 'pbt_members': 2, 'pbt_interval': 64, 'total_timesteps': 128,
+                      'n_steps': 32, 'batch_size': 16, 'pbt_eval_episodes': 1, 'pbt_eval_max_steps': 30,
+                      'pbt_dir': os.path.join(tmp, 'pbt'), 'seed': 3}
+            save_path = os.path.join(tmp, 'best')
+            history = pbt.run(config, save_path)
+            self.assertEqual(len(history), 2)
+            # Round 1 replaced the worse member with a copy of the better one
+            self.assertEqual(len(history[0]['exploits']), 1)
+            for result in history[-1]['results']:
+                self.assertGreaterEqual(result['timesteps'], 128)
+            self.assertTrue(os.path.exists(save_path + '.zip'))
+            self.assertTrue(os.path.exists(save_path + '_vecnormalize.pkl'))
+            with open(save_path + '_pbt.json') as f:
+                self.assertIn('best_member', json.load(f))
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import os
+import sys
+import numpy as np
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbwizard import agent, env_factory
+from pbwizard.raster import TableRasterizer, rasterize_batch, SHADE_BALL, SHADE_DROP_TARGET
+from pbwizard.vision import SimulatedFrameCapture
+
+
+class TestTableRasterizer(unittest.TestCase):
+    def setUp(self):
+        self.cap = SimulatedFrameCapture(width=450, height=800)
+        self.cap.headless = True
+        self.cap.manual_step(0.016, render=False)
+        self.engine = self.cap.physics_engine
+
+    def tearDown(self):
+        self.cap.stop()
+
+    def test_ball_and_static_layer(self):
+        raster = TableRasterizer(84, 84)
+        img = raster.render(self.engine)
+        self.assertEqual(img.shape, (84, 84))
+        self.assertEqual(img.dtype, np.uint8)
+
+        # Ball pixel lands where the ball is
+        b = self.engine.balls[0].position
+        self.assertEqual(img[int(round(b.y * 84 / 800)), int(round(b.x * 84 / 450))], SHADE_BALL)
+        # Walls are in the cached static layer
+        self.assertGreater(np.count_nonzero(raster.static_layer), 0)
+
+    def test_static_layer_cached_until_engine_changes(self):
+        raster = TableRasterizer(84, 84)
+        raster.render(self.engine)
+        layer = raster.static_layer
+        self.cap.manual_step(0.016, render=False)
+        raster.render(self.engine)
+        self.assertIs(raster.static_layer, layer)
+
+        self.engine._rebuild_rails()
+        raster.render(self.engine)
+        self.assertIsNot(raster.static_layer, layer)
+
+    def test_drop_targets_follow_state(self):
+        if not self.engine.drop_target_states:
+            self.skipTest("layout has no drop targets")
+        raster = TableRasterizer(96, 168)
+        up = np.count_nonzero(raster.render(self.engine) == SHADE_DROP_TARGET)
+        self.engine.drop_target_states = [False] * len(self.engine.drop_target_states)
+        down = np.count_nonzero(raster.render(self.engine) == SHADE_DROP_TARGET)
+        self.assertGreater(up, down)
+
+    def test_batch(self):
+        out = rasterize_batch([TableRasterizer(), TableRasterizer()], [self.engine, self.engine])
+        self.assertEqual(out.shape, (2, 84, 84))
+        np.testing.assert_array_equal(out[0], out[1])
+
+
+class TestPixelEnv(unittest.TestCase):
+    def test_env_pixels_mode(self):
+        env, cap = env_factory.make_training_env({'layout': 'default', 'obs_mode': 'pixels', 'pixel_shape': [84, 84]},
+                                                 monitor=False)
+        try:
+            self.assertEqual(env.observation_space.shape, (1, 84, 84))
+            obs, _ = env.reset()
+            self.assertEqual(obs.dtype, np.uint8)
+            obs, _, _, _, _ = env.step(0)
+            self.assertTrue(env.observation_space.contains(obs))
+            self.assertEqual(env.render().shape, (84, 84, 3))
+        finally:
+            cap.stop()
+
+    def test_pixels_train_with_cnn_and_raw_frames(self):
+        from stable_baselines3.common.policies import ActorCriticCnnPolicy
+        from stable_baselines3.common.vec_env import DummyVecEnv
+        config = {'layout': 'default', 'obs_mode': 'pixels', 'pixel_shape': [84, 84], 'n_steps': 16, 'batch_size': 16}
+        env, cap = env_factory.make_training_env(config, monitor=False)
+        try:
+            venv = agent.make_vec_normalize(DummyVecEnv([lambda: env]), config)
+            # CnnPolicy scales uint8 frames itself; VecNormalize only scales rewards
+            self.assertFalse(venv.norm_obs)
+            self.assertTrue(venv.norm_reward)
+            model = agent.make_ppo(venv, config, verbose=0)
+            self.assertIsInstance(model.policy, ActorCriticCnnPolicy)
+            self.assertEqual(agent.policy_for({'layout': 'default'}), "MlpPolicy")
+        finally:
+            cap.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
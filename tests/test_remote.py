@@ -0,0 +1,181 @@
+import unittest
+import os
+import sys
+import socket
+import shutil
+import tempfile
+import threading
+import multiprocessing as mp
+import numpy as np
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbwizard import remote
+from pbwizard.dataset import DONE_TRUNCATED
+
+
+def _start_workers(address, count, n_envs=1):
+    start_method = 'forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn'
+    ctx = mp.get_context(start_method)
+    # Not daemonic: a worker with several envs starts its own env processes
+    processes = [ctx.Process(target=remote.run_worker, args=(address, n_envs)) for _ in range(count)]
+    for process in processes:
+        process.start()
+    return processes
+
+
+class TestWireFormat(unittest.TestCase):
+    def test_message_round_trip(self):
+        a, b = socket.socketpair()
+        try:
+            arrays = {
+                'obs': np.random.default_rng(0).standard_normal((4, 2, 3)).astype(np.float32),
+                'actions': np.array([[0, 3], [1, 2], [2, 1], [3, 0]], dtype=np.int8),
+                'terminal_obs': np.zeros((0, 3), dtype=np.float32),
+                # Non-contiguous input is sent in C order
+                'strided': np.arange(10, dtype=np.int64)[::2],
+            }
+            remote.send_message(a, remote.MSG_BATCH, {'version': 7}, arrays)
+            kind, meta, received = remote.recv_message(b)
+            self.assertEqual(kind, remote.MSG_BATCH)
+            self.assertEqual(meta, {'version': 7})
+            for name, arr in arrays.items():
+                self.assertEqual(received[name].dtype, arr.dtype)
+                np.testing.assert_array_equal(received[name], arr)
+
+            remote.send_message(a, remote.MSG_ERROR, {'error': 'boom'})
+            with self.assertRaises(RuntimeError):
+                remote.recv_message(b)
+            a.close()
+            with self.assertRaises(ConnectionError):
+                remote.recv_message(b)
+        finally:
+            a.close()
+            b.close()
+
+    def test_parse_address(self):
+        self.assertEqual(remote.parse_address('tcp://127.0.0.1:5555'), (socket.AF_INET, ('127.0.0.1', 5555)))
+        self.assertEqual(remote.parse_address(':5555'), (socket.AF_INET, ('0.0.0.0', 5555)))
+        self.assertEqual(remote.parse_address('unix:///tmp/pb.sock'), (socket.AF_UNIX, '/tmp/pb.sock'))
+        with self.assertRaises(ValueError):
+            remote.parse_address('localhost')
+
+
+class TestTerminalOrder(unittest.TestCase):
+    def test_terminal_rows_follow_merged_order(self):
+        # Worker 0 (2 envs) truncates at (step 1, env 1) then (3, 0); worker 1 (1 env) at step 2
+        dones0 = np.zeros((4, 2), dtype=np.uint8)
+        dones0[1, 1] = dones0[3, 0] = DONE_TRUNCATED
+        dones1 = np.zeros((4, 1), dtype=np.uint8)
+        dones1[2, 0] = DONE_TRUNCATED
+        batches = [({'id': 0}, {}, {'dones': dones0}), ({'id': 1}, {}, {'dones': dones1})]
+        # Concatenated rows: w0 (1,1), w0 (3,0), w1 (2,2) -> merged order (1,1), (2,2), (3,0)
+        np.testing.assert_array_equal(remote.RemoteLearner._terminal_order(batches), [0, 2, 1])
+
+
+class TestTimeouts(unittest.TestCase):
+    def test_silent_connection_is_closed_after_handshake_timeout(self):
+        server = remote.RolloutServer('tcp://127.0.0.1:0')
+        silent = remote.connect(server.address, timeout=5)
+        try:
+            with self.assertRaises(TimeoutError):
+                server.accept(1, {}, timeout=1.5, handshake_timeout=0.3)
+            self.assertEqual(server.workers, [])
+            silent.settimeout(5)
+            self.assertEqual(silent.recv(1), b'')
+        finally:
+            silent.close()
+            server.close()
+
+    def test_stalled_worker_is_dropped_at_collect_deadline(self):
+        server = remote.RolloutServer('tcp://127.0.0.1:0')
+        stalled = threading.Event()
+
+        def fake_worker():
+            sock = remote.connect(server.address, timeout=5)
+            try:
+                remote.send_message(sock, remote.MSG_HELLO, {'n_envs': 1, 'host': 'test', 'pid': 0})
+                remote._expect(sock, remote.MSG_CONFIG)
+                remote.send_message(sock, remote.MSG_READY, {'obs_shape': [3]})
+                # Takes the collect request and never answers it
+                remote._expect(sock, remote.MSG_COLLECT)
+                stalled.wait(10)
+            finally:
+                sock.close()
+
+        thread = threading.Thread(target=fake_worker, daemon=True)
+        thread.start()
+        try:
+            server.accept(1, {}, timeout=10)
+            conn = server.workers[0]['sock']
+            self.assertTrue(conn.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE))
+            self.assertIsNone(conn.gettimeout())
+            with self.assertRaises(RuntimeError):
+                server.collect(8, version=1, timeout=0.3)
+            self.assertEqual(server.workers, [])
+        finally:
+            stalled.set()
+            thread.join(5)
+            server.close()
+
+
+class TestRemoteRollouts(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.processes = []
+
+    def tearDown(self):
+        for process in self.processes:
+            process.join(10)
+            if process.is_alive():
+                process.terminate()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_collect_over_unix_socket(self):
+        from stable_baselines3 import PPO
+        from pbwizard import env_factory
+
+        server = remote.RolloutServer(f"unix://{os.path.join(self.tmp, 'rollout.sock')}")
+        env, cap = env_factory.make_training_env({'layout': 'default'}, monitor=False)
+        try:
+            self.processes = _start_workers(server.address, 1, n_envs=2)
+            server.accept(1, {'layout': 'default', 'seed': 5}, timeout=120)
+            self.assertEqual(server.n_envs, 2)
+
+            policy = PPO("MlpPolicy", env, device='cpu', verbose=0).policy
+            server.broadcast({'version': 1}, remote.policy_arrays(policy))
+            [(worker, meta, batch)] = server.collect(40, version=1)
+            self.assertEqual(meta['version'], 1)
+            obs_shape = env.observation_space.shape
+            self.assertEqual(batch['obs'].shape, (40, 2) + obs_shape)
+            self.assertEqual(batch['actions'].shape, (40, 2))
+            self.assertEqual(batch['last_obs'].shape, (2,) + obs_shape)
+            # Fresh envs start an episode; one terminal observation per truncation
+            self.assertTrue(batch['starts'][0].all())
+            self.assertEqual(len(batch['terminal_obs']), int((batch['dones'] & DONE_TRUNCATED).astype(bool).sum()))
+
+            # A collect for weights the worker never got is refused
+            self.assertRaises(RuntimeError, server.collect, 8, 2)
+        finally:
+            server.close()
+            cap.stop()
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, 'rollout.sock')))
+
+    def test_training_run_over_tcp(self):
+        server = remote.RolloutServer('tcp://127.0.0.1:0')
+        self.processes = _start_workers(server.address, 2)
+        config = {'layout': 'default', 'remote_workers': 2, 'n_steps': 32, 'batch_size': 16,
+                  'total_timesteps': 128, 'seed': 1, 'remote_accept_timeout': 120}
+        save_path = os.path.join(self.tmp, 'remote_model')
+        history = remote.run(config, save_path, server=server)
+
+        self.assertEqual(len(history), 2)
+        self.assertEqual([stats['version'] for stats in history], [1, 2])
+        self.assertEqual(history[0]['envs'], 2)
+        self.assertEqual(history[-1]['timesteps'], 128)
+        self.assertTrue(os.path.exists(save_path + '.zip'))
+        self.assertTrue(os.path.exists(save_path + '_vecnormalize.pkl'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import numpy as np
+from unittest.mock import MagicMock
+
+from pbwizard import rewards
+from pbwizard.environment import PinballEnv
+from pbwizard.physics import COLLISION_TYPE_BUMPER, COLLISION_TYPE_DROP_TARGET, COLLISION_TYPE_RAIL
+
+
+class TestRewardPipeline(unittest.TestCase):
+    def test_event_codes_and_label_fallback(self):
+        pipeline = rewards.RewardPipeline()
+        events = [
+            {'type': 'collision', 'label': 'bumper', 'code': COLLISION_TYPE_BUMPER},
+            {'type': 'collision', 'label': 'drop_target', 'code': COLLISION_TYPE_DROP_TARGET},
+            # Events without a code are classified by label, like before
+            {'type': 'collision', 'label': 'left_rail'},
+            {'type': 'collision', 'label': 'wall'},
+            {'type': 'mothership_spawn', 'health': 500},
+        ]
+        self.assertEqual(rewards.event_code(events[2]), COLLISION_TYPE_RAIL)
+        self.assertEqual(rewards.event_code(events[4]), rewards.EVENT_NONE)
+        self.assertAlmostEqual(pipeline.event_reward(events), 0.5 + 1.0 + 0.5)
+        self.assertEqual(pipeline.event_reward([]), 0.0)
+
+    def test_compile_hot_update(self):
+        pipeline = rewards.RewardPipeline()
+        pipeline.compile({'bumper_hit': 2.0}, 'hard')
+        self.assertEqual(pipeline.event_weights[COLLISION_TYPE_BUMPER], 2.0)
+        # Unspecified weights keep their defaults
+        self.assertEqual(pipeline.event_weights[COLLISION_TYPE_DROP_TARGET], 1.0)
+        self.assertEqual(pipeline.survival_reward, rewards.DIFFICULTY_PRESETS['hard']['survival_reward'])
+
+    def test_breakdown_buffer_reused(self):
+        pipeline = rewards.RewardPipeline()
+        buf = pipeline.begin()
+        buf[rewards.SCORE] = 1.0
+        buf[rewards.BALL_LOST] = -0.25
+        self.assertAlmostEqual(pipeline.total(), 0.75)
+        self.assertEqual(set(pipeline.as_dict()), set(rewards.COMPONENTS))
+        self.assertIs(pipeline.begin(), buf)
+        self.assertEqual(pipeline.total(), 0.0)
+
+
+class TestEnvRewardWeights(unittest.TestCase):
+    def setUp(self):
+        self.vision = MagicMock()
+        self.vision.capture.width = 450
+        self.vision.capture.height = 800
+        self.vision.get_score.return_value = 0
+        self.vision.ball_lost = False
+        self.vision.get_ball_status.return_value = ((225.0, 400.0), (50.0, -50.0))
+        self.vision.get_events.return_value = [{'type': 'collision', 'label': 'bumper', 'code': COLLISION_TYPE_BUMPER}]
+        self.vision.capture.physics_engine.get_combo_status.return_value = {'combo_count': 0, 'combo_active': False}
+        self.vision.capture.physics_engine.get_multiplier.return_value = 1.0
+        self.env = PinballEnv(self.vision, MagicMock(), MagicMock(), headless=True)
+        self.env.reset()
+
+    def test_update_rewards_applies_to_next_step(self):
+        self.env.step(0)
+        self.assertAlmostEqual(self.env.reward_pipeline.as_dict()['events'], 0.5)
+
+        self.env.update_rewards({'bumper_hit': 3.0})
+        _, reward, _, _, _ = self.env.step(0)
+        breakdown = self.env.reward_pipeline.as_dict()
+        self.assertAlmostEqual(breakdown['events'], 3.0)
+        self.assertAlmostEqual(reward, sum(breakdown.values()))
+
+    def test_difficulty_change_recompiles(self):
+        self.env.difficulty = 'easy'
+        self.env.step(0)
+        self.assertAlmostEqual(self.env.reward_pipeline.as_dict()['survival'],
+                               rewards.DIFFICULTY_PRESETS['easy']['survival_reward'])
+
+
+class TestRewardAggregates(unittest.TestCase):
+    def test_aggregator_rows(self):
+        stats = rewards.RewardAggregator(window=3)
+        step = np.zeros(len(rewards.COMPONENTS))
+        step[rewards.SURVIVAL] = 0.5
+        for _ in range(3):
+            stats.add(step)
+        self.assertTrue(stats.window_full())
+        window = stats.pop_window()
+        self.assertEqual(window['steps'], 3)
+        self.assertAlmostEqual(window['survival'], 1.5)
+        self.assertFalse(stats.window_full())
+
+        stats.add(step)
+        episode = stats.pop_episode()
+        self.assertEqual(episode['steps'], 4)
+        self.assertAlmostEqual(episode['survival'], 2.0)
+
+    def test_env_reports_only_at_episode_end_and_window(self):
+        vision = MagicMock()
+        vision.capture.width = 450
+        vision.capture.height = 800
+        vision.get_score.return_value = 0
+        vision.ball_lost = False
+        vision.get_ball_status.return_value = ((225.0, 400.0), (50.0, -50.0))
+        vision.get_events.return_value = []
+        vision.capture.physics_engine.get_combo_status.return_value = {'combo_count': 0, 'combo_active': False}
+        vision.capture.physics_engine.get_multiplier.return_value = 1.0
+        env = PinballEnv(vision, MagicMock(), MagicMock(), headless=True, reward_window=4)
+        env.reset()
+
+        total = 0.0
+        for i in range(3):
+            _, reward, _, _, info = env.step(0)
+            total += reward
+            self.assertEqual(info, {})
+        _, reward, _, _, info = env.step(0)
+        total += reward
+        self.assertEqual(info['reward_window']['steps'], 4)
+        self.assertAlmostEqual(sum(v for k, v in info['reward_window'].items() if k != 'steps'), total)
+
+        vision.ball_lost = True
+        _, _, terminated, _, info = env.step(0)
+        self.assertTrue(terminated)
+        self.assertEqual(info['reward_episode']['steps'], 5)
+        self.assertEqual(info['reward_episode']['ball_lost'], -1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import os
+import sys
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbwizard.physics import PymunkEngine, DEFAULT_MAX_BALLS, STRESS_MAX_BALLS, COLLISION_TYPE_BALL
+from pbwizard.vision import PinballLayout, SimulatedFrameCapture
+
+
+class TestStressMode(unittest.TestCase):
+    def setUp(self):
+        self.layout = PinballLayout(filepath='layouts/default.json')
+
+    def test_default_cap_unchanged(self):
+        engine = PymunkEngine(self.layout, 450, 800, seed='stress')
+        for i in range(DEFAULT_MAX_BALLS + 5):
+            engine.add_ball((50 + i * 20, 100))
+        engine.update(1 / 60)
+        self.assertEqual(len(engine.balls), DEFAULT_MAX_BALLS)
+
+    def test_chaos_multiball_respects_hard_cap(self):
+        engine = PymunkEngine(self.layout, 450, 800, seed='stress')
+        engine.chaos_multiball(1000)
+        engine.update(1 / 60)
+        self.assertEqual(engine.max_balls, STRESS_MAX_BALLS)
+        self.assertEqual(len(engine.balls), STRESS_MAX_BALLS)
+
+    def test_chaos_multiball_allows_50_plus(self):
+        engine = PymunkEngine(self.layout, 450, 800, seed='stress')
+        engine.chaos_multiball(60)
+        self.assertTrue(engine.stress_mode)
+
+        engine.update(1 / 60)
+        self.assertEqual(len(engine.balls), 60)
+        self.assertTrue(any(e['type'] == 'chaos_multiball' for e in engine.get_events()))
+
+        # Drained balls are recycled, so the count holds while the table churns
+        for _ in range(300):
+            engine.update(1 / 60)
+        self.assertGreaterEqual(len(engine.balls), 60)
+
+    def test_ball_ball_contacts_skip_events(self):
+        engine = PymunkEngine(self.layout, 450, 800, seed='stress')
+        engine.enable_stress_mode(max_balls=64)
+        engine.chaos_multiball(50)
+        for _ in range(120):
+            engine.update(1 / 60)
+        labels = {e.get('label') for e in engine.get_events() if e['type'] == 'collision'}
+        self.assertNotIn('ball', labels)
+
+    def test_disable_restores_normal_play(self):
+        engine = PymunkEngine(self.layout, 450, 800, seed='stress')
+        engine.chaos_multiball(20)
+        engine.disable_stress_mode()
+        self.assertFalse(engine.stress_mode)
+        self.assertEqual(engine.max_balls, DEFAULT_MAX_BALLS)
+        # Ball <-> ball contacts go through the scoring callback again
+        handler = engine.space.add_collision_handler(COLLISION_TYPE_BALL, COLLISION_TYPE_BALL)
+        self.assertIs(handler.begin, engine._begin_collision)
+
+        # Turning it on again still suppresses them
+        engine.enable_stress_mode()
+        self.assertEqual(engine.max_balls, STRESS_MAX_BALLS)
+        self.assertIsNot(handler.begin, engine._begin_collision)
+
+    def test_reset_game_clears_stress_mode(self):
+        engine = PymunkEngine(self.layout, 450, 800, seed='stress')
+        engine.chaos_multiball(20)
+        engine.reset_game(seed='next')
+        self.assertFalse(engine.stress_mode)
+        self.assertIsNone(engine.chaos_until)
+        self.assertEqual(engine.max_balls, DEFAULT_MAX_BALLS)
+
+    def test_chaos_multiball_ends(self):
+        engine = PymunkEngine(self.layout, 450, 800, seed='stress')
+        engine.chaos_multiball(10, duration=0.5)
+        # Past the window drained balls leave the table and stress mode switches off
+        for _ in range(60 * 60):
+            engine.update(1 / 60)
+            if not engine.stress_mode:
+                break
+        self.assertFalse(engine.stress_mode)
+        self.assertLessEqual(len(engine.balls), 1)
+
+    def test_ball_arrays(self):
+        engine = PymunkEngine(self.layout, 450, 800, seed='stress')
+        engine.chaos_multiball(20)
+        engine.update(1 / 60)
+        positions, velocities = engine.get_ball_arrays()
+        self.assertEqual(positions.shape, (20, 2))
+        self.assertEqual(velocities.shape, (20, 2))
+        self.assertAlmostEqual(positions[3][0], engine.balls[3].position.x)
+
+    def test_capture_chaos_multiball(self):
+        sim = SimulatedFrameCapture(width=450, height=800)
+        sim.chaos_multiball(50)
+        sim.manual_step(0.016, render=False)
+        sim.manual_step(0.016, render=False)
+        self.assertGreaterEqual(len(sim.physics_engine.balls), 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
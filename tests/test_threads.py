@@ -0,0 +1,64 @@
+import unittest
+import os
+import sys
+from unittest.mock import patch
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import torch
+
+from pbwizard import env_factory, threads
+
+
+class TestThreadBudgets(unittest.TestCase):
+    def test_split_gives_disjoint_blocks(self):
+        budgets = threads.split(3, cpus=range(8), reserve=1)
+        self.assertEqual([b['cpus'] for b in budgets], [[1, 2, 3], [4, 5], [6, 7]])
+        self.assertEqual([b['threads'] for b in budgets], [3, 2, 2])
+
+    def test_split_more_workers_than_cpus(self):
+        budgets = threads.split(5, cpus=[0, 1, 2], reserve=1)
+        self.assertEqual([b['cpus'] for b in budgets], [[1], [2], [1], [2], [1]])
+        self.assertTrue(all(b['threads'] == 1 for b in budgets))
+        # Reserving every CPU still leaves one to run on
+        self.assertEqual(threads.usable_cpus([0], reserve=1), [0])
+
+    def test_training_layout(self):
+        layout = threads.training_layout(4, evaluator=True, cpus=range(4), reserve=1)
+        self.assertEqual(layout['trainer'], {'threads': 3, 'cpus': [1, 2, 3]})
+        self.assertEqual([b['cpus'] for b in layout['envs']], [[1], [2], [3], [1]])
+        self.assertEqual(layout['eval'], {'threads': 1, 'cpus': [3]})
+        # A single env runs in the trainer; torch_threads overrides the trainer's pool
+        layout = threads.training_layout(1, torch_threads=2, cpus=range(4))
+        self.assertEqual(layout['envs'], [])
+        self.assertIsNone(layout['eval'])
+        self.assertEqual(layout['trainer']['threads'], 2)
+
+    def test_apply_sets_pools_and_affinity(self):
+        saved_threads = torch.get_num_threads()
+        saved_env = {var: os.environ.get(var) for var in threads.THREAD_ENV_VARS}
+        try:
+            with patch.object(threads.os, 'sched_setaffinity', create=True) as setaffinity:
+                applied = threads.apply({'threads': 2, 'cpus': [0]}, pin=True, name="test")
+            setaffinity.assert_called_once_with(0, [0])
+            self.assertEqual(applied['threads'], 2)
+            self.assertEqual(torch.get_num_threads(), 2)
+            for var in threads.THREAD_ENV_VARS:
+                self.assertEqual(os.environ[var], '2')
+        finally:
+            torch.set_num_threads(saved_threads)
+            for var, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(var, None)
+                else:
+                    os.environ[var] = value
+
+    def test_env_config_hands_out_budgets(self):
+        config = {'env_thread_budgets': [{'threads': 1, 'cpus': [1]}, {'threads': 1, 'cpus': [2]}]}
+        self.assertEqual(env_factory._env_config(config, 3)['thread_budget'], {'threads': 1, 'cpus': [2]})
+        self.assertNotIn('env_thread_budgets', env_factory._env_config(config, 0))
+        self.assertIsNone(env_factory._env_config({}, 0)['thread_budget'])
+
+
+if __name__ == '__main__':
+    unittest.main()
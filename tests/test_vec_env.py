@@ -0,0 +1,60 @@
+import unittest
+import os
+import sys
+import numpy as np
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from stable_baselines3.common.vec_env import VecNormalize
+
+from pbwizard.env_factory import make_env_fns
+from pbwizard.vec_env import SharedMemoryVecEnv
+
+
+class TestSharedMemoryVecEnv(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.venv = SharedMemoryVecEnv(make_env_fns(2, {'layout': 'default', 'reward_window': 10}))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.venv.close()
+
+    def test_spaces_and_step(self):
+        venv = self.venv
+        self.assertEqual(venv.num_envs, 2)
+        obs = venv.reset()
+        self.assertEqual(obs.shape, (2, 8))
+
+        for _ in range(20):
+            obs, rewards, dones, infos = venv.step(np.array([1, 2]))
+        self.assertEqual(obs.shape, (2, 8))
+        self.assertEqual(rewards.shape, (2,))
+        self.assertEqual(dones.dtype, np.bool_)
+        self.assertEqual(len(infos), 2)
+        # Reward aggregates come back from the workers once per window
+        self.assertEqual(infos[0]['reward_window']['steps'], 10)
+
+        # Returned arrays are copies, not views of the shared buffers
+        obs[:] = -1
+        self.assertFalse(np.all(venv.buffers.obs == -1))
+
+    def test_vec_normalize_compatible(self):
+        norm = VecNormalize(self.venv, norm_obs=True, norm_reward=True, clip_obs=10.)
+        obs = norm.reset()
+        for _ in range(10):
+            obs, rewards, dones, infos = norm.step(np.zeros(2, dtype=np.int64))
+        self.assertTrue(np.all(np.abs(obs) <= 10.))
+
+    def test_env_method_and_attrs(self):
+        self.venv.env_method('update_rewards', {'bumper_hit': 2.0})
+        configs = self.venv.get_attr('rewards_config')
+        self.assertEqual([c['bumper_hit'] for c in configs], [2.0, 2.0])
+
+        self.venv.env_method('update_rewards', {'bumper_hit': 3.0}, indices=[1])
+        configs = self.venv.get_attr('rewards_config')
+        self.assertEqual([c['bumper_hit'] for c in configs], [2.0, 3.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
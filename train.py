@@ -1,13 +1,13 @@
 import os
 import time
 import logging
-import multiprocessing
 import numpy as np
 from stable_baselines3.common.callbacks import BaseCallback
 from stable_baselines3.common.utils import safe_mean
 
-from pbwizard import vision, hardware, agent
-from pbwizard.environment import PinballEnv
+from pbwizard import agent, checkpoint, env_factory, evaluation, threads
+from pbwizard.live_view import LiveStateRing, DEFAULT_PUBLISH_HZ
+from pbwizard.control import ControlChannel
 
 # Configure logging
 logging.basicConfig(
@@ -19,78 +19,87 @@ logger = logging.getLogger(__name__)
 
 class StateSyncCallback(BaseCallback):
     """
-    Callback to sync simulation state to the main process via a queue.
+    Publishes the training table to the UI through a shared memory LiveStateRing.
+
+    Rate limited to the UI refresh rate; the per-step cost otherwise is one
+    clock read. The main process reads the ring without blocking.
     """
-    def __init__(self, vision_wrapper, state_queue, verbose=0):
+    def __init__(self, capture, live_view, max_hz=DEFAULT_PUBLISH_HZ, verbose=0):
         super().__init__(verbose)
-        self.vision_wrapper = vision_wrapper
-        self.state_queue = state_queue
-        self.last_sync = 0
+        self.capture = capture
+        self.live_view = live_view
+        self.period = 1.0 / max_hz
+        self.last_sync = 0.0
 
     def _on_step(self) -> bool:
-        # Sync at ~30 FPS
-        current_time = time.time()
-        if current_time - self.last_sync > 0.033:
-            if hasattr(self.vision_wrapper.capture, 'get_state'):
-                state = self.vision_wrapper.capture.get_state()
+        now = time.perf_counter()
+        if now - self.last_sync >= self.period:
+            self.last_sync = now
+            engine = self.capture.physics_engine
+            if engine is not None:
                 try:
-                    # Clear old state if queue is full to avoid lag
-                    if self.state_queue.full():
-                        try:
-                            self.state_queue.get_nowait()
-                        except:
-                            pass
-                    self.state_queue.put(state)
-                except:
-                    pass
-            self.last_sync = current_time
+                    self.live_view.publish(engine)
+                except Exception as e:
+                    logger.debug(f"Live view publish failed: {e}")
         return True
 
 
-class QueueStopCallback(BaseCallback):
+class ControlCallback(BaseCallback):
     """
-    Callback to check a multiprocessing queue for a STOP command.
+    Applies stop / pause / reward-weight commands from the main process.
+
+    The per-step cost is one integer compare against the shared memory
+    ControlChannel version; the command is only decoded when it changed.
+    While paused, training blocks here until resumed or stopped.
     """
-    def __init__(self, command_queue, verbose=0):
+    def __init__(self, channel, pause_poll=0.05, verbose=0):
         super().__init__(verbose)
-        self.command_queue = command_queue
+        self.channel = channel
+        self.pause_poll = pause_poll
+
+    def _apply(self, cmd):
+        if cmd.rewards is not None:
+            # env_method reaches PinballEnv through Monitor/VecNormalize and
+            # across worker processes (SharedMemoryVecEnv)
+            self.training_env.env_method('update_rewards', cmd.rewards)
+        if cmd.stop:
+            logger.info("Training stopped by user command.")
+            return False
+        return True
 
     def _on_step(self) -> bool:
-        if not self.command_queue.empty():
-            try:
-                cmd = self.command_queue.get_nowait()
-                if cmd == 'STOP':
-                    logger.info("Training stopped by user command.")
-                    return False
-                elif isinstance(cmd, dict) and cmd.get('type') == 'UPDATE_REWARDS':
-                    # Update environment rewards
-                    # self.training_env is a VecEnv (DummyVecEnv)
-                    if hasattr(self.training_env, 'envs'):
-                        for env in self.training_env.envs:
-                            # Unwrap Monitor if present
-                            while hasattr(env, 'env'):
-                                if hasattr(env, 'rewards_config'):
-                                    env.rewards_config.update(cmd.get('rewards', {}))
-                                    logger.info(f"Updated rewards config: {cmd.get('rewards')}")
-                                    break
-                                env = env.env
-                            else:
-                                # If loop finished without break, check the env itself
-                                if hasattr(env, 'rewards_config'):
-                                    env.rewards_config.update(cmd.get('rewards', {}))
-                                    logger.info(f"Updated rewards config: {cmd.get('rewards')}")
-            except Exception as e:
-                logger.error(f"Error processing command queue: {e}")
+        if not self.channel.changed():
+            return True
+        try:
+            cmd = self.channel.poll()
+            if cmd is None:
+                return True
+            if not self._apply(cmd):
+                return False
+            if cmd.paused:
+                logger.info("Training paused.")
+                while cmd is None or cmd.paused:
+                    time.sleep(self.pause_poll)
+                    cmd = self.channel.poll()
+                    if cmd is not None and not self._apply(cmd):
+                        return False
+                logger.info("Training resumed.")
+        except Exception as e:
+            logger.error(f"Error processing control command: {e}")
         return True
 
 
 class WebStatsCallback(BaseCallback):
-    def __init__(self, status_queue, total_timesteps, model_name="Unknown", verbose=0):
+    def __init__(self, status_queue, total_timesteps, model_name="Unknown", interval=1.0, verbose=0):
         super().__init__(verbose)
         self.status_queue = status_queue
         self.total_timesteps = total_timesteps
         self.model_name = model_name
+        # Stats go out on a wall-clock cadence, one queue put per interval
+        self.interval = interval
         self.start_time = None
+        self.last_emit = 0.0
+        self.last_episode_reward = 0.0
 
     def _on_training_start(self) -> None:
         self.start_time = time.time()
@@ -99,13 +108,15 @@ class WebStatsCallback(BaseCallback):
         if self.start_time is None:
             self.start_time = time.time()
 
-        if self.num_timesteps % 100 == 0:
-            # Extract stats
-            infos = self.locals.get("infos", [{}])[0]
-            mean_reward = 0
-            if "episode" in infos:
-                mean_reward = infos["episode"]["r"]
-                logger.info(f"Step {self.num_timesteps}: Episode Reward={mean_reward:.2f}")
+        # Remember the latest finished episode between emits
+        for info in self.locals.get("infos", ()):
+            if "episode" in info:
+                self.last_episode_reward = info["episode"]["r"]
+
+        now = time.perf_counter()
+        if now - self.last_emit >= self.interval:
+            self.last_emit = now
+            mean_reward = self.last_episode_reward
             
             # Calculate ETA
             elapsed_time = time.time() - self.start_time
@@ -183,32 +194,167 @@ class ProgressBarCallback(BaseCallback):
 
 
 class TensorboardRewardCallback(BaseCallback):
+    """
+    Logs reward components from the env's running aggregates.
+
+    Envs report summed breakdowns only when a window closes ('reward_window')
+    or an episode ends ('reward_episode'); this keeps two small sum tables
+    and logs per-step and per-episode means every log_interval steps.
+    """
+
     def __init__(self, log_interval=2048, verbose=0):
         super().__init__(verbose)
         self.log_interval = log_interval
         self.last_log_step = 0
-        self.reward_buffer = {}
+        self.window_sums = {}
+        self.window_steps = 0
+        self.episode_sums = {}
+        self.episodes = 0
 
     def _on_step(self) -> bool:
         infos = self.locals.get('infos', [])
         for info in infos:
-            breakdown = info.get('reward_breakdown')
-            if not breakdown:
-                continue
-            for key, value in breakdown.items():
-                self.reward_buffer.setdefault(key, []).append(value)
-        if self.reward_buffer and self.num_timesteps - self.last_log_step >= self.log_interval:
-            for key, values in self.reward_buffer.items():
-                if values:
-                    self.logger.record(f'custom/reward_{key}', float(np.mean(values)))
-            self.reward_buffer.clear()
+            window = info.get('reward_window')
+            if window:
+                self.window_steps += window['steps']
+                for key, value in window.items():
+                    if key != 'steps':
+                        self.window_sums[key] = self.window_sums.get(key, 0.0) + value
+            episode = info.get('reward_episode')
+            if episode:
+                self.episodes += 1
+                for key, value in episode.items():
+                    if key != 'steps':
+                        self.episode_sums[key] = self.episode_sums.get(key, 0.0) + value
+        if self.num_timesteps - self.last_log_step >= self.log_interval:
+            if self.window_steps:
+                for key, total in self.window_sums.items():
+                    self.logger.record(f'custom/reward_{key}', total / self.window_steps)
+            if self.episodes:
+                for key, total in self.episode_sums.items():
+                    self.logger.record(f'custom/episode_reward_{key}', total / self.episodes)
+            self.window_sums.clear()
+            self.window_steps = 0
+            self.episode_sums.clear()
+            self.episodes = 0
             self.last_log_step = self.num_timesteps
         return True
 
 
-def train_worker(config, state_queue, command_queue, status_queue):
+class PeriodicCheckpointCallback(BaseCallback):
+    """
+    Snapshots model, optimizer, VecNormalize stats, step counter and RNG state
+    every `interval` timesteps. The snapshot is an in-memory copy; writing it
+    to disk happens on the CheckpointWriter thread so rollouts don't stall.
+    """
+    def __init__(self, writer, interval, extra=None, verbose=0):
+        super().__init__(verbose)
+        self.writer = writer
+        self.interval = interval
+        self.extra = extra or {}
+        self.last_checkpoint = 0
+
+    def _on_training_start(self) -> None:
+        # Resumed runs count from the restored step
+        self.last_checkpoint = self.model.num_timesteps
+
+    def _on_step(self) -> bool:
+        if self.num_timesteps - self.last_checkpoint >= self.interval:
+            self.last_checkpoint = self.num_timesteps
+            self.writer.submit(checkpoint.snapshot(self.model, self.extra))
+        return True
+
+
+class AsyncEvalCallback(BaseCallback):
+    """
+    Hands a policy snapshot to a PolicyEvaluator every `interval` timesteps
+    and reports finished evaluations (TensorBoard + status queue). Never waits
+    on the evaluator: a snapshot is skipped while the previous one is running.
+    """
+    def __init__(self, evaluator, interval, status_queue=None, curriculum=None, assignment=None, verbose=0):
+        super().__init__(verbose)
+        self.evaluator = evaluator
+        self.interval = interval
+        self.status_queue = status_queue
+        # Optional LayoutCurriculum fed with per-layout evaluation reward
+        self.curriculum = curriculum
+        self.assignment = assignment
+        self.last_submit = 0
+
+    def _on_training_start(self) -> None:
+        self.last_submit = self.model.num_timesteps
+
+    def _report(self, result):
+        if 'error' in result:
+            logger.warning(f"Evaluation at {result.get('timesteps')} failed: {result['error']}")
+            return
+        for key in ('mean_score', 'max_score', 'drain_rate', 'mean_length'):
+            self.logger.record(f"eval/{key}", result[key])
+        for layout, summary in result.get('layouts', {}).items():
+            self.logger.record(f"eval/{layout}/mean_score", summary['mean_score'])
+        logger.info(f"Eval @ {result['timesteps']}: mean score {result['mean_score']:.0f}, "
+                    f"drain rate {result['drain_rate']:.2f}")
+        if self.curriculum is not None and result.get('layouts'):
+            self.curriculum.update({layout: s['mean_reward'] for layout, s in result['layouts'].items()})
+            self.assignment = self.curriculum.apply(self.training_env, self.assignment)
+            for layout, weight in self.curriculum.as_dict().items():
+                self.logger.record(f"curriculum/{layout}", weight)
+            result = dict(result, curriculum=self.curriculum.as_dict())
+        if self.status_queue is not None:
+            self.status_queue.put(('eval', result))
+
+    def _on_step(self) -> bool:
+        for result in self.evaluator.poll():
+            self._report(result)
+        if self.num_timesteps - self.last_submit >= self.interval:
+            if self.evaluator.submit(evaluation.policy_snapshot(self.model)):
+                self.last_submit = self.num_timesteps
+        return True
+
+
+def next_model_path(model_name, models_dir="models"):
+    """models/<name>_v<N> for the next unused version N (no extension)."""
+    os.makedirs(models_dir, exist_ok=True)
+
+    # Auto-increment version
+    import re
+    pattern = re.compile(rf"{model_name}_v(\d+).zip")
+    max_version = 0
+    for filename in os.listdir(models_dir):
+        match = pattern.match(filename)
+        if match:
+            version = int(match.group(1))
+            if version > max_version:
+                max_version = version
+    return os.path.join(models_dir, f"{model_name}_v{max_version + 1}")
+
+
+def pbt_worker(config, control, status_queue):
+    """Population based training (config 'pbt_members' > 1) instead of a single run."""
+    from pbwizard import pbt
+
+    save_path = next_model_path(config.get('model_name', 'ppo_pinball'))
+    status_queue.put(('status', 'started'))
+    pbt.run(config, save_path, status_queue=status_queue, control=control)
+    status_queue.put(('status', {'state': 'finished', 'model': f"{os.path.basename(save_path)}.zip"}))
+
+
+def remote_train_worker(config, control, status_queue):
+    """Remote rollouts (config 'remote_listen'): envs run in rollout_worker.py processes, possibly on other machines."""
+    from pbwizard import remote
+
+    save_path = next_model_path(config.get('model_name', 'ppo_pinball'))
+    remote.run(config, save_path, status_queue=status_queue, control=control)
+    status_queue.put(('status', {'state': 'finished', 'model': f"{os.path.basename(save_path)}.zip"}))
+
+
+def train_worker(config, live_view_name, control_name, status_queue):
     """
     Worker function to run training in a separate process.
+
+    live_view_name / control_name are the shared memory names of the main
+    process's LiveStateRing (None to not publish the table) and
+    ControlChannel.
     """
     try:
         logger.info(f"Training Worker Started with config: {config}")
@@ -216,87 +362,65 @@ def train_worker(config, state_queue, command_queue, status_queue):
         # 1. Setup Environment
         width = int(os.getenv('SIM_WIDTH', 450))
         height = int(os.getenv('SIM_HEIGHT', 800))
-        
-        # Load Layout if specified
-        layout_config = None
-        layout_name = config.get('layout')
-        if layout_name:
-            import json
-            # Check if it's a filename or "Default"
-            if layout_name.lower() == 'default':
-                 layout_file = 'default.json'
-            else:
-                 layout_file = f"{layout_name}.json"
-            
-            layout_path = os.path.join(os.getcwd(), 'layouts', layout_file)
-            if os.path.exists(layout_path):
-                try:
-                    with open(layout_path, 'r') as f:
-                        layout_config = json.load(f)
-                    logger.info(f"Training using layout: {layout_name}")
-                except Exception as e:
-                    logger.error(f"Failed to load layout {layout_path}: {e}")
-            else:
-                logger.warning(f"Layout file not found: {layout_path}")
 
-        # Always use simulated capture for training
-        cap = vision.SimulatedFrameCapture(layout_config=layout_config, width=width, height=height)
-        
-        # Apply Physics Config if provided
-        physics_config = config.get('physics') or {}
-        
-        # Merge top-level config keys into physics_config for backward compatibility
-        # (Since config.json often has flat structure)
-        overrides = ['launch_angle', 'flipper_speed', 'auto_plunge_enabled', 'plunger_release_speed']
-        for key in overrides:
-            if key in config:
-                physics_config[key] = config[key]
-        # Force auto-plunge for training to prevent negative reward loops
-        physics_config['auto_plunge_enabled'] = True
-        
-        if hasattr(cap, 'update_physics_params'):
-            logger.info("Applying custom physics config for training (Auto-Plunge Forced)")
-            cap.update_physics_params(physics_config)
-            
-        cap.start()
-        
-        # Mock Controller
-        hw = hardware.MockController(vision_system=cap)
-        
-        # Minimal Vision Wrapper
-        class TrainingVisionWrapper:
-            def __init__(self, capture):
-                self.capture = capture
-                self.lock = multiprocessing.Lock() # Not really needed in single process, but for compat
-                
-            def update(self):
-                # In headless training, we don't need to process frames with CV
-                # We just need to step the environment which steps the sim
-                pass
-                
-            def get_stats(self):
-                return {}
+        # Optional calibration sweep: measured n_envs / n_steps / batch_size /
+        # torch threads / device override the configured ones
+        autotune_report = None
+        if config.get('autotune'):
+            from pbwizard import autotune
+            autotune_report = autotune.autotune(config, width=width, height=height)
+            config = dict(config, **autotune_report['chosen'])
 
-            def manual_step(self, dt=None):
-                if hasattr(self.capture, 'manual_step'):
-                    self.capture.manual_step(dt)
+        if int(config.get('pbt_members', 0)) > 1:
+            # Members build their own envs in their own processes
+            control = ControlChannel.attach(control_name)
+            pbt_worker(config, control, status_queue)
+            return
 
-        vision_wrapper = TrainingVisionWrapper(cap)
-        
-        # Score Reader (Mock)
-        class MockScoreReader:
-            def read_score(self, frame): return 0
-            
-        score_reader = MockScoreReader()
-        
-        # Environment
-        from stable_baselines3.common.monitor import Monitor
-        from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
-        
-        env = PinballEnv(vision_wrapper, hw, score_reader, headless=True, random_layouts=config.get('random_layouts', False))
-        env = Monitor(env)
-        env = DummyVecEnv([lambda: env])
-        env = VecNormalize(env, norm_obs=True, norm_reward=True, clip_obs=10., gamma=config.get('gamma', 0.99))
+        if config.get('remote_listen'):
+            # No local envs: the learner gets every usable core
+            pin = bool(config.get('pin_cpus', False))
+            layout = threads.training_layout(1, torch_threads=config.get('torch_threads'),
+                                             reserve=config.get('reserve_cpus', threads.DEFAULT_RESERVE))
+            threads.apply(layout['trainer'], pin=pin, name="remote learner")
+            control = ControlChannel.attach(control_name)
+            remote_train_worker(config, control, status_queue)
+            return
+
+        n_envs = max(1, int(config.get('n_envs', 1)))
+
+        # Multi-layout training: every worker pinned to a layout from a weighted set
+        curriculum = None
+        if config.get('train_layouts'):
+            from pbwizard.curriculum import LayoutCurriculum
+            curriculum = LayoutCurriculum(config['train_layouts'],
+                                          temperature=config.get('curriculum_temperature', 1.0),
+                                          min_share=config.get('curriculum_min_share', 0.05),
+                                          seed=config.get('seed'))
+            config = dict(config, env_layouts=curriculum.assign(n_envs))
+            # Per-layout evaluation is what moves the weights
+            config.setdefault('eval_layouts', curriculum.layouts)
+            if int(config.get('eval_interval', 0)) <= 0:
+                logger.warning("train_layouts without eval_interval: layout weights stay fixed")
+
+        # Per-process thread budgets (trainer, env workers, evaluator) so the
+        # pools don't oversubscribe the cores; 'reserve_cpus' stay with the
+        # web server, 'pin_cpus' also sets CPU affinity
+        pin = bool(config.get('pin_cpus', False))
+        layout = threads.training_layout(n_envs, evaluator=int(config.get('eval_interval', 0)) > 0,
+                                         torch_threads=config.get('torch_threads'),
+                                         reserve=config.get('reserve_cpus', threads.DEFAULT_RESERVE))
+        threads.log_layout(layout, pin)
+        threads.apply(layout['trainer'], pin=pin, name="trainer")
+        config = dict(config, env_thread_budgets=layout['envs'], eval_thread_budget=layout['eval'])
+
+        if n_envs > 1:
+            # One headless table per worker process, exchanged through shared memory
+            logger.info(f"Training with {n_envs} parallel environments")
+        # Several envs: worker 0 publishes the live view from its own process
+        env, cap = env_factory.make_training_vec_env(dict(config, live_view_name=live_view_name), n_envs,
+                                                     width=width, height=height)
+        env = agent.make_vec_normalize(env, config)
         
         # 2. Setup Agent
         model_name = config.get('model_name', 'ppo_pinball')
@@ -308,45 +432,103 @@ def train_worker(config, state_queue, command_queue, status_queue):
         agent_wrapper = agent.RLAgent(env=env, tensorboard_log=tensorboard_log)
         
         # 3. Callbacks
+        control = ControlChannel.attach(control_name)
         callbacks = [
-            StateSyncCallback(vision_wrapper, state_queue),
-            QueueStopCallback(command_queue),
-            WebStatsCallback(status_queue, total_timesteps, model_name=model_name),
+            ControlCallback(control),
+            WebStatsCallback(status_queue, total_timesteps, model_name=model_name,
+                             interval=config.get('stats_interval', 1.0)),
             ProgressBarCallback(total_timesteps),
             TensorboardRewardCallback(log_interval=config.get('tensorboard_log_interval', 2048))
         ]
+        checkpoint_interval = int(config.get('checkpoint_interval', 0))
+        if checkpoint_interval > 0:
+            checkpoint_writer = checkpoint.CheckpointWriter(
+                os.path.join(config.get('checkpoint_dir', checkpoint.DEFAULT_CHECKPOINT_DIR), model_name),
+                keep=config.get('checkpoint_keep', checkpoint.DEFAULT_KEEP))
+            callbacks.append(PeriodicCheckpointCallback(checkpoint_writer, checkpoint_interval,
+                                                        extra={'model_name': model_name, 'config': config}))
+        eval_interval = int(config.get('eval_interval', 0))
+        if eval_interval > 0:
+            # Fixed-seed games in a separate process, off the training loop
+            evaluator = evaluation.PolicyEvaluator(config)
+            callbacks.append(AsyncEvalCallback(evaluator, eval_interval, status_queue, curriculum=curriculum,
+                                               assignment=config.get('env_layouts')))
+        if live_view_name and cap is not None:
+            # Live view of the single, in-process training table
+            live_view = LiveStateRing.attach(live_view_name)
+            callbacks.insert(0, StateSyncCallback(cap, live_view, max_hz=config.get('live_view_hz', DEFAULT_PUBLISH_HZ)))
         
         # 4. Train
         status_queue.put(('status', 'started'))
-        agent_wrapper.train(total_timesteps=total_timesteps, callbacks=callbacks, hyperparams=config)
+        agent_wrapper.train(total_timesteps=total_timesteps, callbacks=callbacks, hyperparams=config,
+                            resume_from=config.get('resume_from'),
+                            pretrain_from=config.get('pretrain_dataset'))
         
         # 5. Save
-        models_dir = "models"
-        os.makedirs(models_dir, exist_ok=True)
-        
-        # Auto-increment version
-        import re
-        pattern = re.compile(rf"{model_name}_v(\d+).zip")
-        max_version = 0
-        for filename in os.listdir(models_dir):
-            match = pattern.match(filename)
-            if match:
-                version = int(match.group(1))
-                if version > max_version:
-                    max_version = version
-        next_version = max_version + 1
-        
-        save_path = os.path.join(models_dir, f"{model_name}_v{next_version}")
+        save_path = next_model_path(model_name)
         agent_wrapper.save(save_path)
+        # Inference (main.py) needs the same observation normalization
+        checkpoint.save_vec_normalize(agent_wrapper.model, agent.vec_normalize_path(save_path))
+        agent.save_obs_meta(save_path, config)
         
         logger.info(f"Training finished. Model saved to {save_path}")
+        if autotune_report is not None:
+            autotune.save_report(f"{save_path}_autotune.json", autotune_report)
         # Send model name (basename) so main process can load it
-        model_filename = f"{model_name}_v{next_version}.zip"
+        model_filename = f"{os.path.basename(save_path)}.zip"
         status_queue.put(('status', {'state': 'finished', 'model': model_filename}))
         
     except Exception as e:
         logger.error(f"Training Worker Error: {e}")
         status_queue.put(('error', str(e)))
     finally:
-        if 'cap' in locals():
+        if locals().get('cap') is not None:
             cap.stop()
+        if locals().get('live_view') is not None:
+            live_view.close()
+        if locals().get('control') is not None:
+            control.close()
+        if locals().get('checkpoint_writer') is not None:
+            checkpoint_writer.close()
+        if locals().get('evaluator') is not None:
+            evaluator.close()
+        if 'env' in locals():
+            env.close()
+
+
+if __name__ == "__main__":
+    # Standalone training (the web UI starts train_worker itself)
+    import json
+    import queue
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pinball Wizard training")
+    parser.add_argument("--config", default="config.json", help="Training config JSON (merged over config.json keys)")
+    parser.add_argument("--total-timesteps", type=int, help="Timesteps (per member with --pbt-members)")
+    parser.add_argument("--model-name", help="Saved model name prefix")
+    parser.add_argument("--pbt-members", type=int, help="Population based training with this many members")
+    parser.add_argument("--pbt-interval", type=int, help="Timesteps between PBT exploit/explore rounds")
+    parser.add_argument("--remote-listen", help="Collect rollouts from rollout_worker.py processes "
+                                                "(tcp://host:port or unix:///path)")
+    parser.add_argument("--remote-workers", type=int, help="Rollout workers to wait for before training")
+    args = parser.parse_args()
+
+    run_config = {}
+    if os.path.exists(args.config):
+        with open(args.config, 'r') as f:
+            run_config = json.load(f)
+    for key in ('total_timesteps', 'model_name', 'pbt_members', 'pbt_interval', 'remote_listen', 'remote_workers'):
+        if getattr(args, key) is not None:
+            run_config[key] = getattr(args, key)
+
+    channel = ControlChannel.create()
+    messages = queue.Queue()
+    try:
+        train_worker(run_config, None, channel.name, messages)
+    finally:
+        channel.close()
+    while not messages.empty():
+        msg_type, msg_data = messages.get()
+        if msg_type == 'error':
+            logger.error(f"Training failed: {msg_data}")
+            raise SystemExit(1)